@@ -0,0 +1,137 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SILENCE_FLOOR_DB = -120.0
+
+
+def block_level_db(block):
+    """RMS level of an audio block in dBFS (all channels together)."""
+    power = float(np.mean(np.square(block, dtype=np.float32))) if block.size else 0.0
+    return 10.0 * np.log10(power) if power > 0 else SILENCE_FLOOR_DB
+
+
+class VoiceActivityDetector:
+    """Energy-based speech/silence tracking over audio callback blocks.
+
+    A block is voiced when its RMS level is above threshold_db. Silences
+    longer than max_silence seconds are reported; in 'cut' mode they are
+    also shortened to max_silence by dropping the blocks past that point,
+    so long pauses do not end up in the file sent for transcription.
+    """
+
+    MODES = ('mark', 'cut')
+
+    def __init__(self, samplerate, mode='mark', threshold_db=-50.0, max_silence=2.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown VAD mode: {mode}")
+        self.samplerate = float(samplerate)
+        self.mode = mode
+        self.threshold_db = threshold_db
+        self.max_silence = max_silence
+        self.silences = []  # Silences longer than max_silence, in source and output time
+        self.source_frames = 0
+        self.output_frames = 0
+        self.removed_frames = 0
+        self._silence_start = None   # Source frame where the current silence began
+        self._silence_output = None  # Output frame where it began
+        self._removed_in_silence = 0
+
+    def process(self, block):
+        """Classify one block; returns the part to keep (None when it is cut)."""
+        frames = len(block)
+        voiced = block_level_db(block) > self.threshold_db
+        start = self.source_frames
+        self.source_frames += frames
+        if voiced:
+            self._end_silence(start)
+            self.output_frames += frames
+            return block
+        if self._silence_start is None:
+            self._silence_start = start
+            self._silence_output = self.output_frames
+        if self.mode == 'cut':
+            keep = int(self.max_silence * self.samplerate) - (start - self._silence_start)
+            if keep <= 0:
+                self._removed_in_silence += frames
+                self.removed_frames += frames
+                return None
+            if keep < frames:
+                self._removed_in_silence += frames - keep
+                self.removed_frames += frames - keep
+                block = block[:keep]
+        self.output_frames += len(block)
+        return block
+
+    def close(self):
+        self._end_silence(self.source_frames)
+
+    def _end_silence(self, end):
+        if self._silence_start is None:
+            return
+        duration = (end - self._silence_start) / self.samplerate
+        if duration > self.max_silence:
+            self.silences.append({
+                'start': round(self._silence_start / self.samplerate, 3),
+                'end': round(end / self.samplerate, 3),
+                'output_start': round(self._silence_output / self.samplerate, 3),
+                'removed': round(self._removed_in_silence / self.samplerate, 3),
+            })
+        self._silence_start = None
+        self._silence_output = None
+        self._removed_in_silence = 0
+
+    def report(self):
+        source_seconds = self.source_frames / self.samplerate
+        silent = sum(s['end'] - s['start'] for s in self.silences)
+        return {
+            'mode': self.mode,
+            'threshold_db': self.threshold_db,
+            'max_silence_seconds': self.max_silence,
+            'source_seconds': round(source_seconds, 3),
+            'output_seconds': round(self.output_frames / self.samplerate, 3),
+            'removed_seconds': round(self.removed_frames / self.samplerate, 3),
+            'long_silence_seconds': round(silent, 3),
+            'silences': self.silences,
+        }
+
+
+class SilenceStopDetector:
+    """Tracks how long the incoming audio has been continuously silent.
+
+    A meeting tab that has ended, or that nobody speaks in any more, feeds
+    the sink digital silence; window seconds of it are a stop signal that
+    does not depend on any page selector. Only counters are updated per
+    block, so it is safe to call from the audio callback.
+    """
+
+    def __init__(self, samplerate, window=120.0, threshold_db=-70.0):
+        self.samplerate = float(samplerate)
+        self.window = window
+        self.threshold_db = threshold_db
+        self.silent_frames = 0  # Consecutive frames below the threshold
+        self.longest_silence_frames = 0
+
+    def process(self, block):
+        if block_level_db(block) > self.threshold_db:
+            self.silent_frames = 0
+        else:
+            self.silent_frames += len(block)
+            self.longest_silence_frames = max(self.longest_silence_frames, self.silent_frames)
+
+    @property
+    def silent_seconds(self):
+        return self.silent_frames / self.samplerate
+
+    @property
+    def triggered(self):
+        return self.silent_seconds >= self.window
+
+    def report(self):
+        return {
+            'window_seconds': self.window,
+            'threshold_db': self.threshold_db,
+            'silent_seconds': round(self.silent_seconds, 3),
+            'longest_silence_seconds': round(self.longest_silence_frames / self.samplerate, 3),
+        }
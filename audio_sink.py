@@ -0,0 +1,193 @@
+import logging
+import threading
+import subprocess
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """Preallocated single-producer/single-consumer ring of audio frames.
+
+    The audio callback writes into it and a writer thread drains it, so the
+    memory used for audio stays constant however long the meeting runs.
+    """
+
+    def __init__(self, capacity, channels, dtype='float32'):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self._buffer = np.zeros((self.capacity, channels), dtype=dtype)
+        # Absolute frame counters; only the positions are shared under the lock,
+        # the copies themselves touch disjoint regions of the buffer.
+        self._read_pos = 0
+        self._write_pos = 0
+        self._lock = threading.Lock()
+        self._data_ready = threading.Event()
+        self.overflow_frames = 0
+
+    @property
+    def total_written(self):
+        return self._write_pos
+
+    def available(self):
+        """Number of frames waiting to be read."""
+        with self._lock:
+            return self._write_pos - self._read_pos
+
+    def write(self, block):
+        """Copy a block in; frames that do not fit are dropped and counted."""
+        with self._lock:
+            free = self.capacity - (self._write_pos - self._read_pos)
+            start = self._write_pos % self.capacity
+        frames = len(block)
+        if frames > free:
+            self.overflow_frames += frames - free
+            frames = free
+        if frames:
+            first = min(frames, self.capacity - start)
+            self._buffer[start:start + first] = block[:first]
+            if frames > first:
+                self._buffer[:frames - first] = block[first:frames]
+            with self._lock:
+                self._write_pos += frames
+            self._data_ready.set()
+        return frames
+
+    def read_into(self, out):
+        """Copy up to len(out) frames into out and return how many were copied."""
+        with self._lock:
+            frames = min(len(out), self._write_pos - self._read_pos)
+            start = self._read_pos % self.capacity
+        if frames:
+            first = min(frames, self.capacity - start)
+            out[:first] = self._buffer[start:start + first]
+            if frames > first:
+                out[first:frames] = self._buffer[:frames - first]
+            with self._lock:
+                self._read_pos += frames
+        return frames
+
+    def wait(self, timeout=None):
+        """Block until new data is written or the timeout expires."""
+        ready = self._data_ready.wait(timeout)
+        self._data_ready.clear()
+        return ready
+
+
+class StreamingAudioWriter:
+    """Drains an AudioRingBuffer into a sound file from a background thread."""
+
+    def __init__(self, path, samplerate, channels, buffer_seconds=10,
+                 chunk_frames=8192, subtype=None):
+        self.path = path
+        self.samplerate = int(samplerate)
+        self.channels = channels
+        self.subtype = subtype
+        self.ring = AudioRingBuffer(self.samplerate * buffer_seconds, channels)
+        self._chunk = np.empty((chunk_frames, channels), dtype='float32')
+        self.frames_written = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._file = None
+
+    @property
+    def frames_received(self):
+        return self.ring.total_written
+
+    @property
+    def overflow_frames(self):
+        return self.ring.overflow_frames
+
+    def start(self):
+        self._open()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def push(self, block):
+        """Called from the audio callback; never blocks on disk I/O."""
+        return self.ring.write(block)
+
+    def close(self):
+        """Flush everything still buffered and close the output."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._drain()
+        self._close_output()
+        if self.ring.overflow_frames:
+            logger.warning(f"Audio writer dropped {self.ring.overflow_frames} frames "
+                           f"({self.ring.overflow_frames / self.samplerate:.2f}s)")
+        logger.info(f"Audio written: {self.path} ({self.frames_written / self.samplerate:.1f}s "
+                    f"at {self.samplerate} Hz)")
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self.ring.wait(0.5)
+                self._drain()
+        except Exception as e:
+            logger.error(f"Audio writer failed: {str(e)}")
+
+    def _drain(self):
+        while True:
+            frames = self.ring.read_into(self._chunk)
+            if not frames:
+                break
+            self._write(self._chunk[:frames])
+            self.frames_written += frames
+
+    def _open(self):
+        self._file = sf.SoundFile(self.path, 'w', samplerate=self.samplerate,
+                                  channels=self.channels, subtype=self.subtype)
+
+    def _write(self, block):
+        self._file.write(block)
+
+    def _close_output(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class FFmpegAudioWriter(StreamingAudioWriter):
+    """Encodes the ring buffer's float32 PCM with ffmpeg as it arrives (e.g. Opus)."""
+
+    def __init__(self, path, samplerate, channels, codec_args=None, **kwargs):
+        super().__init__(path, samplerate, channels, **kwargs)
+        self.codec_args = codec_args or ['-c:a', 'libopus', '-b:a', '32k', '-application', 'voip']
+        self._process = None
+
+    def _open(self):
+        self._process = subprocess.Popen([
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'f32le', '-ar', str(self.samplerate), '-ac', str(self.channels),
+            '-i', 'pipe:0',
+            *self.codec_args,
+            self.path
+        ], stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._file = self._process.stdin
+
+    def _write(self, block):
+        if self._file is None:
+            return
+        try:
+            self._file.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+        except BrokenPipeError:
+            logger.error("Audio encoder exited, dropping remaining audio")
+            self._file = None
+
+    def _close_output(self):
+        if self._process is None:
+            return
+        try:
+            if self._file:
+                self._file.close()
+        except BrokenPipeError:
+            pass
+        self._file = None
+        returncode = self._process.wait()
+        self._process = None
+        if returncode != 0:
+            logger.error(f"Audio encoder exited with code {returncode}")
@@ -0,0 +1,122 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AVSync:
+    """Maps capture times onto the audio sample timeline and keeps video locked to it.
+
+    Audio is the master clock: sample n plays at n / nominal_rate seconds in
+    the output whatever the wall clock says. Every audio block is logged as
+    (monotonic arrival time, samples so far), and a running least-squares fit
+    of those points gives the device's real rate and the time of sample 0.
+    Video frames stamped with the same monotonic clock are then placed by
+    where the audio was when they were grabbed, which absorbs both the
+    start offset and the slow drift of the sound card against the system clock.
+    """
+
+    def __init__(self, nominal_rate, fps, min_fit_seconds=5.0):
+        self.nominal_rate = float(nominal_rate)
+        self.fps = fps
+        self.min_fit_seconds = min_fit_seconds
+        self._lock = threading.Lock()
+        self._origin = None      # Arrival time of the first block; fit x values are relative to it
+        self._samples = 0
+        self._n = 0
+        self._sum_x = self._sum_y = self._sum_xx = self._sum_xy = 0.0
+        self._last_x = 0.0
+        self.video_offset = None  # Audio-timeline seconds at which the first video frame is shown
+        self.frames_written = 0
+        self.frames_duplicated = 0
+        self.frames_dropped = 0
+        self.max_correction = 0.0  # Largest gap between capture pace and audio timeline seen (s)
+
+    def audio_block(self, frames, arrival=None):
+        """Record that `frames` more samples arrived (call from the audio callback)."""
+        arrival = time.monotonic() if arrival is None else arrival
+        with self._lock:
+            if self._origin is None:
+                # The first block's samples were recorded over the block duration before it arrived
+                self._origin = arrival - frames / self.nominal_rate
+                self._add_point(0.0, 0)
+            self._samples += frames
+            self._add_point(arrival - self._origin, self._samples)
+
+    def _add_point(self, x, y):
+        self._n += 1
+        self._sum_x += x
+        self._sum_y += y
+        self._sum_xx += x * x
+        self._sum_xy += x * y
+        self._last_x = x
+
+    def _fit(self):
+        """(rate in samples/s, sample count at the origin) of the block arrival line."""
+        if self._n > 2 and self._last_x >= self.min_fit_seconds:
+            denominator = self._n * self._sum_xx - self._sum_x ** 2
+            if denominator > 0:
+                rate = (self._n * self._sum_xy - self._sum_x * self._sum_y) / denominator
+                intercept = (self._sum_y - rate * self._sum_x) / self._n
+                return rate, intercept
+        return self.nominal_rate, 0.0
+
+    def media_time(self, timestamp):
+        """Audio-timeline position (seconds) of a monotonic timestamp."""
+        with self._lock:
+            if self._origin is None:
+                return 0.0
+            rate, intercept = self._fit()
+            return (intercept + rate * (timestamp - self._origin)) / self.nominal_rate
+
+    def start_video(self, timestamp):
+        """Anchor the video stream at the first frame; returns its audio-timeline offset."""
+        self.video_offset = max(0.0, self.media_time(timestamp))
+        return self.video_offset
+
+    def video_time(self, timestamp):
+        """Presentation time of a frame in the video stream (0 = first frame)."""
+        if self.video_offset is None:
+            self.start_video(timestamp)
+        return max(0.0, self.media_time(timestamp) - self.video_offset)
+
+    def cfr_repeats(self, timestamp):
+        """How many times to write this frame to a constant frame rate stream (0 drops it).
+
+        Frames are written as captured while the stream stays within one
+        frame of the audio timeline; beyond that a frame is repeated or
+        skipped, so corrections are applied gradually rather than at the end.
+        """
+        expected = self.video_time(timestamp) * self.fps
+        error = expected - self.frames_written
+        self.max_correction = max(self.max_correction, abs(error) / self.fps)
+        if error >= 1:
+            repeats = 1 + int(error)
+            self.frames_duplicated += repeats - 1
+        elif error <= -1:
+            repeats = 0
+            self.frames_dropped += 1
+        else:
+            repeats = 1
+        self.frames_written += repeats
+        return repeats
+
+    def report(self):
+        """Offset and drift measured over the recording."""
+        with self._lock:
+            rate, _ = self._fit()
+            duration = self._samples / self.nominal_rate
+        drift_ppm = (rate / self.nominal_rate - 1.0) * 1e6
+        return {
+            'nominal_rate': self.nominal_rate,
+            'measured_rate': round(rate, 3),
+            'drift_ppm': round(drift_ppm, 1),
+            # How far video would have slipped against audio by the end without correction
+            'drift_seconds': round(duration * drift_ppm / 1e6, 4),
+            'audio_seconds': round(duration, 3),
+            'video_offset_seconds': round(self.video_offset, 4) if self.video_offset is not None else None,
+            'frames_duplicated_for_sync': self.frames_duplicated,
+            'frames_dropped_for_sync': self.frames_dropped,
+            'max_correction_seconds': round(self.max_correction, 4),
+        }
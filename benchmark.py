@@ -0,0 +1,529 @@
+import os
+import sys
+import cv2
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from frame_ring import FrameRing
+from audio_sink import FFmpegAudioWriter, StreamingAudioWriter
+from capture_pipeline import CapturePipeline
+from capture_backends import CAPTURE_BACKENDS, create_capture_backend, open_capture_backend
+from isolation import IsolatedDisplay, IsolatedAudioSink, ParecAudioStream
+from browser_pool import BrowserPool, launch_chrome, resolve_chromedriver
+from metrics import current_rss_bytes
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# Path each platform's fixture is served under (the recorder detects the
+# platform from the URL) and the page that stands in for it
+FIXTURE_PAGES = {
+    'google': ('meet.google.com/abc-defg-hij', 'google.html'),
+    'zoom': ('app.zoom.us/wc/join/1234567890', 'zoom.html'),
+    'teams': ('teams.live.com/meet/1234567890', 'teams.html'),
+}
+
+
+def cpu_seconds():
+    """User and system CPU of this process and its reaped children (ffmpeg, chromedriver)."""
+    import resource
+    usage_self = resource.getrusage(resource.RUSAGE_SELF)
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (usage_self.ru_utime + usage_self.ru_stime
+            + usage_children.ru_utime + usage_children.ru_stime)
+
+
+def bench_frame_ring(args):
+    """Push a synthetic multi-hour capture through FrameRing and sample RSS."""
+    total_frames = int(args.hours * 3600 * args.fps)
+    sample_every = int(args.sample_minutes * 60 * args.fps)
+    ring = FrameRing(args.history_seconds, args.fps)
+    frame = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+
+    baseline = current_rss_bytes()
+    samples = []
+    started = time.perf_counter()
+    for i in range(total_frames):
+        # Touch a row so each frame differs without allocating a new one
+        frame[i % args.height, :, :] = i & 0xFF
+        ring.push(i / args.fps, frame)
+        if i % sample_every == 0:
+            samples.append((i / args.fps, current_rss_bytes()))
+    samples.append((total_frames / args.fps, current_rss_bytes()))
+    elapsed = time.perf_counter() - started
+
+    mb = 1024 * 1024
+    print(f"Synthetic capture: {args.hours}h at {args.fps} fps, {args.width}x{args.height} "
+          f"({total_frames} frames in {elapsed:.1f}s)")
+    print(f"Ring: {ring.capacity} frames, {ring.nbytes / mb:.1f} MB preallocated")
+    print(f"{'media time':>12} {'RSS MB':>10} {'delta MB':>10}")
+    for media_time, rss in samples:
+        print(f"{time.strftime('%H:%M:%S', time.gmtime(media_time)):>12} "
+              f"{rss / mb:>10.1f} {(rss - baseline) / mb:>10.1f}")
+    growth = samples[-1][1] - samples[1][1] if len(samples) > 2 else 0
+    print(f"RSS growth after first sample: {growth / mb:.1f} MB")
+
+
+# Repaints every frame, so the screencast keeps sending new images
+ANIMATED_PAGE = ('data:text/html,<style>body{margin:0;background:midnightblue}'
+                 'div{width:40vw;height:40vh;background:orange;animation:m 2s linear infinite alternate}'
+                 '@keyframes m{to{transform:translate(55vw,55vh) rotate(180deg)}}</style><div></div>')
+
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000 if samples else 0.0
+
+
+def bench_capture(args):
+    """Compare grab/convert latency and CPU cost of each capture backend."""
+    region = tuple(args.region) if args.region else None
+    print(f"{'backend':>8} {'size':>11} {'grab avg':>9} {'grab p95':>9} "
+          f"{'conv avg':>9} {'max fps':>8} {'CPU %':>7}")
+    for name in args.backends:
+        driver = None
+        if name == 'cdp':
+            # The screencast backend captures a browser tab rather than a display
+            width, height = (region[2], region[3]) if region else (1920, 1080)
+            driver = launch_chrome(extra_arguments=['--headless=new', f'--window-size={width},{height}'])
+            driver.get(args.url)
+        backend = create_capture_backend(name, args.display, driver)
+        try:
+            width, height = backend.open(None if driver else region, buffers=2)
+        except Exception as e:
+            print(f"{name:>8} unavailable: {str(e)}")
+            if driver:
+                driver.quit()
+            continue
+        grab_times, convert_times = [], []
+        try:
+            for _ in range(args.warmup):
+                backend.convert(backend.grab())
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            for _ in range(args.frames):
+                started = time.perf_counter()
+                raw = backend.grab()
+                grabbed = time.perf_counter()
+                backend.convert(raw)
+                grab_times.append(grabbed - started)
+                convert_times.append(time.perf_counter() - grabbed)
+            wall = time.perf_counter() - wall_started
+            cpu = time.process_time() - cpu_started
+        finally:
+            backend.close()
+            if driver:
+                driver.quit()
+        per_frame = wall / args.frames
+        print(f"{name:>8} {f'{width}x{height}':>11} "
+              f"{np.mean(grab_times) * 1000:>7.2f}ms {_percentile_ms(grab_times, 95):>7.2f}ms "
+              f"{np.mean(convert_times) * 1000:>7.2f}ms {1 / per_frame:>8.1f} "
+              f"{100 * cpu / wall:>7.1f}")
+
+
+def bench_scaling_worker(args):
+    """One synthetic isolated meeting; prints its CPU and RSS as JSON.
+
+    Runs the recorder's per-meeting stack (private Xvfb, PulseAudio sink,
+    parec capture, capture pipeline and writers) without a browser, so the
+    numbers are the fixed cost each extra meeting adds to a node. With
+    --audio-only there is no screen capture and audio is encoded to Opus.
+    """
+    workdir = tempfile.mkdtemp(prefix='scaling_')
+    display = IsolatedDisplay(args.width, args.height)
+    sink = IsolatedAudioSink()
+    display.start()
+    sink.start()
+    stop = threading.Event()
+    try:
+        if args.audio_only:
+            audio_writer = FFmpegAudioWriter(os.path.join(workdir, 'audio.opus'), 44100, 2)
+        else:
+            backend, (width, height) = open_capture_backend(args.backend, None, buffers=6,
+                                                             display=display.name)
+            video_writer = cv2.VideoWriter(os.path.join(workdir, 'video.mp4'),
+                                           cv2.VideoWriter_fourcc(*'mp4v'), args.fps, (width, height))
+            audio_writer = StreamingAudioWriter(os.path.join(workdir, 'audio.wav'), 44100, 2)
+        audio_writer.start()
+        stream = ParecAudioStream(sink.monitor, 44100, 2,
+                                  lambda indata, frames, time_info, status: audio_writer.push(indata))
+        stream.start()
+        pipeline = None
+        if not args.audio_only:
+            pipeline = CapturePipeline(backend.grab, backend.convert,
+                                       lambda timestamp, frame: video_writer.write(frame), args.fps)
+        threading.Timer(args.seconds, stop.set).start()
+        sampled_rss = {}
+
+        def sample_children():
+            while not stop.wait(1.0):
+                for name, pid in (('xvfb', display.process.pid), ('parec', stream.process.pid)):
+                    sampled_rss[name] = max(sampled_rss.get(name, 0), current_rss_bytes(pid))
+
+        threading.Thread(target=sample_children, daemon=True).start()
+        if pipeline:
+            pipeline.run(stop)
+        else:
+            stop.wait()
+        stream.close()
+        audio_writer.close()
+        if pipeline:
+            video_writer.release()
+            backend.close()
+    finally:
+        sink.stop()
+        display.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import resource
+    print(json.dumps({
+        'cpu_seconds': cpu_seconds(),
+        'rss_bytes': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+                      + sum(sampled_rss.values())),
+        'achieved_fps': pipeline.stats()['achieved_fps'] if pipeline else 0.0,
+        'backend': backend.name if pipeline else 'audio-only',
+    }))
+
+
+def bench_scaling(args):
+    """CPU and RSS as more isolated meetings run side by side on this host."""
+    counts = list(range(args.step, args.max_meetings + 1, args.step))
+    if not counts or counts[0] != 1:
+        counts.insert(0, 1)
+    worker_args = [sys.executable, os.path.abspath(__file__), 'scaling-worker',
+                   '--seconds', str(args.seconds), '--fps', str(args.fps),
+                   '--width', str(args.width), '--height', str(args.height),
+                   '--backend', args.backend]
+    if args.audio_only:
+        worker_args.append('--audio-only')
+    mb = 1024 * 1024
+    print(f"{'meetings':>8} {'CPU %':>8} {'CPU %/mtg':>10} {'+CPU %/extra':>13} "
+          f"{'RSS MB':>8} {'RSS MB/mtg':>11} {'min fps':>8}")
+    previous = None
+    for count in counts:
+        workers = [subprocess.Popen(worker_args, stdout=subprocess.PIPE, text=True)
+                   for _ in range(count)]
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode == 0 and output.strip():
+                results.append(json.loads(output.strip().splitlines()[-1]))
+        if len(results) != count:
+            print(f"{count:>8} {count - len(results)} worker(s) failed")
+            continue
+        cpu_percent = 100 * sum(r['cpu_seconds'] for r in results) / args.seconds
+        rss = sum(r['rss_bytes'] for r in results)
+        marginal = ''
+        if previous:
+            marginal = f"{(cpu_percent - previous[1]) / (count - previous[0]):.1f}"
+        print(f"{count:>8} {cpu_percent:>8.1f} {cpu_percent / count:>10.1f} {marginal:>13} "
+              f"{rss / mb:>8.0f} {rss / count / mb:>11.0f} "
+              f"{min(r['achieved_fps'] for r in results):>8.1f}")
+        previous = (count, cpu_percent)
+
+
+def bench_pool(args):
+    """Seconds until a driver is ready (and a page loaded): cold launch vs pooled lease."""
+    def load(driver):
+        started = time.perf_counter()
+        driver.get(args.url)
+        return time.perf_counter() - started
+
+    results = {'cold': [], 'cached': [], 'pooled': []}
+    for mode in ('cold', 'cached'):
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            if mode == 'cold':
+                resolve_chromedriver(refresh=True)
+            driver = launch_chrome()
+            ready = time.perf_counter() - started
+            results[mode].append((ready, load(driver)))
+            driver.quit()
+
+    pool = BrowserPool(size=args.pool_size)
+    pool.start()
+    try:
+        # Let the pool warm up, as it would between meetings
+        time.sleep(args.warmup)
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            browser = pool.lease()
+            ready = time.perf_counter() - started
+            results['pooled'].append((ready, load(browser.driver)))
+            pool.release(browser)
+            time.sleep(args.warmup)
+    finally:
+        pool.close()
+
+    print(f"{'mode':>8} {'driver ready s':>15} {'page load s':>12}")
+    for mode, samples in results.items():
+        ready = sum(r for r, _ in samples) / len(samples)
+        loaded = sum(l for _, l in samples) / len(samples)
+        print(f"{mode:>8} {ready:>15.2f} {loaded:>12.2f}")
+
+
+class FixtureServer:
+    """Serves the local meeting-page stand-ins under platform-looking paths."""
+
+    def __init__(self):
+        class Handler(SimpleHTTPRequestHandler):
+            def translate_path(self, path):
+                path = path.split('?', 1)[0]
+                for url_path, page in FIXTURE_PAGES.values():
+                    if path.startswith('/' + url_path.split('/')[0] + '/'):
+                        return os.path.join(FIXTURE_DIR, page)
+                if path.startswith('/fixtures/'):
+                    return os.path.join(FIXTURE_DIR, os.path.basename(path))
+                return os.path.join(FIXTURE_DIR, 'missing')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, platform, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        return f'http://127.0.0.1:{self._server.server_port}/{FIXTURE_PAGES[platform][0]}?{query}'
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def run_offline_meeting(server, platform, size, duration, args, on_sample=None):
+    """Join a fixture meeting and record it with synthetic media; returns the measurements."""
+    from main import ChromiumMeetingRecorder
+
+    workdir = tempfile.mkdtemp(prefix='offline_')
+    url = server.url(platform, prejoin=args.prejoin_delay, lobby=args.lobby_delay, duration=duration)
+    recorder = ChromiumMeetingRecorder(url, workdir, output_mode=args.output_mode, video_fps=args.fps,
+                                       capture_backend='synthetic', audio_source='synthetic',
+                                       chrome_arguments=['--headless=new'] if args.headless else None)
+    recorder.screen_size = size
+    result = {'platform': platform, 'size': f'{size[0]}x{size[1]}', 'duration': duration}
+    stop_sampling = threading.Event()
+    peak_rss = [current_rss_bytes()]
+
+    def sample():
+        started = time.monotonic()
+        next_report = args.sample_minutes * 60
+        while not stop_sampling.wait(1.0):
+            peak_rss[0] = max(peak_rss[0], current_rss_bytes())
+            elapsed = time.monotonic() - started
+            if on_sample and elapsed >= next_report:
+                next_report += args.sample_minutes * 60
+                on_sample(elapsed, current_rss_bytes(), recorder.capture_stats())
+
+    cpu_started = cpu_seconds()
+    wall_started = time.monotonic()
+    threading.Thread(target=sample, daemon=True).start()
+    try:
+        recorder.setup_chromium_driver()
+        if not recorder.join_meeting():
+            result['error'] = f"join failed in state {recorder.recording_metadata['join']['failed_state']}"
+            return result
+        recorder.start_recording()
+        # The fixture shows its "meeting ended" dialog after `duration`, which stops the recorder
+        recorder.monitoring_thread.join(duration + args.stop_grace)
+        if recorder.is_recording:
+            recorder.stop_recording()
+            result['error'] = 'meeting end not detected'
+        stats = recorder.capture_stats()
+        timings = recorder.timings
+        result.update({
+            'join_seconds': recorder.recording_metadata['join']['total_seconds'],
+            'achieved_fps': stats.get('achieved_fps', 0.0),
+            'frames_dropped': stats.get('frames_dropped', 0),
+            'finalize_seconds': round(timings['finalized'] - timings['stop_requested'], 2)
+                                if 'finalized' in timings else None,
+        })
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        recorder.stop_recording()
+        stop_sampling.set()
+        result['cpu_percent'] = round(100 * (cpu_seconds() - cpu_started)
+                                      / (time.monotonic() - wall_started), 1)
+        result['peak_rss_mb'] = round(peak_rss[0] / (1024 * 1024))
+        if args.keep:
+            result['output_dir'] = workdir
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def bench_page_state(args):
+    """Latency and CPU of one participant poll: per-platform Selenium lookups vs one state query."""
+    from main import ChromiumMeetingRecorder
+    from page_monitor import PageEventMonitor
+
+    server = FixtureServer()
+    server.start()
+    print(f"{'platform':>8} {'method':>8} {'mean ms':>8} {'p95 ms':>8} {'CPU ms':>8}  result")
+    try:
+        for platform in args.platforms:
+            workdir = tempfile.mkdtemp(prefix='page_state_')
+            # Long enough that the fixture meeting outlasts the measurement
+            url = server.url(platform, prejoin=0.2, lobby=0, duration=24 * 3600, participants=5)
+            recorder = ChromiumMeetingRecorder(url, workdir,
+                                               chrome_arguments=['--headless=new'] if args.headless else None)
+            try:
+                recorder.setup_chromium_driver()
+                if not recorder.join_meeting():
+                    print(f"{platform:>8} join failed")
+                    continue
+                monitor = PageEventMonitor(recorder.driver, recorder.meeting_type)
+                methods = (('lookups', recorder._get_participant_count),
+                           ('batched', lambda: monitor.read_state()['participants']))
+                for method, poll in methods:
+                    poll()  # Warm-up
+                    latencies = []
+                    cpu_started = cpu_seconds()
+                    for _ in range(args.polls):
+                        started = time.perf_counter()
+                        result = poll()
+                        latencies.append(time.perf_counter() - started)
+                    cpu_ms = 1000 * (cpu_seconds() - cpu_started) / args.polls
+                    print(f"{platform:>8} {method:>8} {np.mean(latencies) * 1000:>8.1f} "
+                          f"{_percentile_ms(latencies, 95):>8.1f} {cpu_ms:>8.2f}  {result}")
+            finally:
+                recorder.stop_recording()
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        server.stop()
+
+
+def _print_soak_sample(elapsed, rss, stats):
+    print(f"{time.strftime('%H:%M:%S', time.gmtime(elapsed)):>9} {rss / (1024 * 1024):>8.0f} "
+          f"{stats.get('achieved_fps', 0.0):>6.1f} {stats.get('frames_dropped', 0):>8}",
+          flush=True)
+
+
+def bench_offline(args):
+    """Join local fixture meetings and record synthetic media, without any network."""
+    sizes = [tuple(int(v) for v in resolution.split('x')) for resolution in args.resolutions]
+    durations = [args.soak_hours * 3600] if args.soak_hours else args.durations
+    on_sample = _print_soak_sample if args.soak_hours else None
+    if args.soak_hours:
+        print(f"{'elapsed':>9} {'RSS MB':>8} {'fps':>6} {'dropped':>8}")
+
+    server = FixtureServer()
+    server.start()
+    results = []
+    try:
+        for platform in args.platforms:
+            for size in sizes:
+                for duration in durations:
+                    results.append(run_offline_meeting(server, platform, size, duration, args, on_sample))
+    finally:
+        server.stop()
+
+    print(f"{'platform':>8} {'size':>10} {'length s':>9} {'join s':>7} {'fps':>6} {'dropped':>8} "
+          f"{'CPU %':>6} {'peak MB':>8} {'finalize s':>11}")
+    for r in results:
+        if 'error' in r and 'achieved_fps' not in r:
+            print(f"{r['platform']:>8} {r['size']:>10} {r['duration']:>9} failed: {r['error']}")
+            continue
+        print(f"{r['platform']:>8} {r['size']:>10} {r['duration']:>9} {r['join_seconds']:>7.1f} "
+              f"{r['achieved_fps']:>6.1f} {r['frames_dropped']:>8} {r['cpu_percent']:>6.1f} "
+              f"{r['peak_rss_mb']:>8} {r['finalize_seconds'] if r['finalize_seconds'] is not None else '-':>11}"
+              + (f"  ({r['error']})" if 'error' in r else ''))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Meeting recorder benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ring_parser = subparsers.add_parser('frame-ring', help='RSS of the frame ring over a long capture')
+    ring_parser.add_argument('--hours', type=float, default=3.0)
+    ring_parser.add_argument('--fps', type=float, default=15)
+    ring_parser.add_argument('--width', type=int, default=960)
+    ring_parser.add_argument('--height', type=int, default=1036)
+    ring_parser.add_argument('--history-seconds', type=float, default=2.0)
+    ring_parser.add_argument('--sample-minutes', type=float, default=15.0)
+    ring_parser.set_defaults(func=bench_frame_ring)
+
+    capture_parser = subparsers.add_parser('capture', help='Grab latency and CPU per capture backend')
+    capture_parser.add_argument('--backends', nargs='+', choices=list(CAPTURE_BACKENDS),
+                                default=list(CAPTURE_BACKENDS))
+    capture_parser.add_argument('--frames', type=int, default=300)
+    capture_parser.add_argument('--warmup', type=int, default=10)
+    capture_parser.add_argument('--display', help='X display to capture, e.g. :99')
+    capture_parser.add_argument('--region', type=int, nargs=4, metavar=('LEFT', 'TOP', 'WIDTH', 'HEIGHT'))
+    capture_parser.add_argument('--url', default=ANIMATED_PAGE,
+                                help='Page the cdp backend captures (default: a constantly animating page)')
+    capture_parser.set_defaults(func=bench_capture)
+
+    for name, handler, help_text in (
+            ('scaling', bench_scaling, 'CPU and RSS per extra isolated meeting'),
+            ('scaling-worker', bench_scaling_worker, 'Run a single scaling worker (used by scaling)')):
+        scaling_parser = subparsers.add_parser(name, help=help_text)
+        scaling_parser.add_argument('--seconds', type=float, default=30)
+        scaling_parser.add_argument('--fps', type=int, default=15)
+        scaling_parser.add_argument('--width', type=int, default=1920)
+        scaling_parser.add_argument('--height', type=int, default=1080)
+        scaling_parser.add_argument('--backend', choices=['auto'] + list(CAPTURE_BACKENDS), default='auto')
+        scaling_parser.add_argument('--audio-only', action='store_true',
+                                    help='No screen capture; audio encoded to Opus as it arrives')
+        if name == 'scaling':
+            scaling_parser.add_argument('--max-meetings', type=int, default=16)
+            scaling_parser.add_argument('--step', type=int, default=4)
+        scaling_parser.set_defaults(func=handler)
+
+    page_state_parser = subparsers.add_parser(
+        'page-state', help='Participant poll cost: Selenium lookups vs one batched state query')
+    page_state_parser.add_argument('--platforms', nargs='+', choices=list(FIXTURE_PAGES),
+                                   default=list(FIXTURE_PAGES))
+    page_state_parser.add_argument('--polls', type=int, default=50)
+    page_state_parser.add_argument('--headed', dest='headless', action='store_false',
+                                   help='Show the browser instead of running headless')
+    page_state_parser.set_defaults(func=bench_page_state)
+
+    pool_parser = subparsers.add_parser('pool', help='Driver startup: cold launch vs pooled lease')
+    pool_parser.add_argument('--runs', type=int, default=3)
+    pool_parser.add_argument('--pool-size', type=int, default=1)
+    pool_parser.add_argument('--warmup', type=float, default=10,
+                             help='Seconds the pool gets to refill before each lease')
+    pool_parser.add_argument('--url', default='https://meet.google.com/')
+    pool_parser.set_defaults(func=bench_pool)
+
+    offline_parser = subparsers.add_parser(
+        'offline', help='Join local fixture meetings with synthetic screen and audio (no network)')
+    offline_parser.add_argument('--platforms', nargs='+', choices=list(FIXTURE_PAGES),
+                                default=list(FIXTURE_PAGES))
+    offline_parser.add_argument('--resolutions', nargs='+', default=['1280x720', '1920x1080'])
+    offline_parser.add_argument('--durations', nargs='+', type=int, default=[30, 300],
+                                help='Meeting lengths in seconds')
+    offline_parser.add_argument('--soak-hours', type=float,
+                                help='Single long meeting per platform/size; prints RSS and fps periodically')
+    offline_parser.add_argument('--sample-minutes', type=float, default=15.0)
+    offline_parser.add_argument('--fps', type=int, default=15)
+    offline_parser.add_argument('--output-mode', choices=['classic', 'live'], default='classic')
+    offline_parser.add_argument('--prejoin-delay', type=float, default=1.0,
+                                help='Seconds the fixture takes to show its pre-join screen')
+    offline_parser.add_argument('--lobby-delay', type=float, default=1.0,
+                                help='Seconds spent in the fixture lobby (0 skips it)')
+    offline_parser.add_argument('--stop-grace', type=float, default=60,
+                                help='Extra seconds to wait for the recorder to notice the meeting ended')
+    offline_parser.add_argument('--headed', dest='headless', action='store_false',
+                                help='Show the browser instead of running headless')
+    offline_parser.add_argument('--keep', action='store_true', help='Keep the recordings')
+    offline_parser.add_argument('--json', help='Also write the results to this JSON file')
+    offline_parser.set_defaults(func=bench_offline)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
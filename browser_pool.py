@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import queue
+import logging
+import platform
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+from webdriver_manager.chrome import ChromeDriverManager
+from isolation import IsolatedDisplay, IsolatedAudioSink
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'meeting_recorder')
+DRIVER_CACHE_FILE = os.path.join(CACHE_DIR, 'chromedriver.json')
+
+
+def resolve_chromedriver(refresh=False):
+    """Path of a chromedriver binary, resolved once and then reused offline.
+
+    ChromeDriverManager checks the network on every call; the resolved path
+    is cached so later launches skip that step. Pass refresh=True when the
+    cached binary no longer matches the installed Chrome.
+    """
+    if not refresh:
+        try:
+            with open(DRIVER_CACHE_FILE) as f:
+                path = json.load(f)['path']
+            if os.path.exists(path):
+                return path
+        except (OSError, ValueError, KeyError):
+            pass
+    path = ChromeDriverManager().install()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(DRIVER_CACHE_FILE, 'w') as f:
+        json.dump({'path': path, 'resolved_at': time.time()}, f)
+    logger.info(f"Resolved chromedriver: {path}")
+    return path
+
+
+def ensure_fake_video():
+    """Write the fake camera clip once and share it between all sessions."""
+    fake_video = os.path.join(CACHE_DIR, "fake_video.y4m")
+    if not os.path.exists(fake_video):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(fake_video, 'wb') as f:
+            f.write(b'YUV4MPEG2 W1280 H720 F30:1 Ip A0:0 C420jpeg XYSCSS=420JPEG\n')
+            f.write(b'FRAME\n')
+            f.write(b'\x80' * (1280 * 720 * 3 // 2))
+    return fake_video
+
+
+def build_chrome_options(window_size=None, extra_arguments=None):
+    """Chrome options used for every meeting session."""
+    chrome_options = ChromeOptions()
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument('--use-fake-device-for-media-stream')
+    chrome_options.add_argument('--use-fake-ui-for-media-stream')
+    chrome_options.add_argument('--disable-infobars')
+    chrome_options.add_argument('--disable-encryption')
+    chrome_options.add_argument('--disable-popup-blocking')
+    chrome_options.add_argument('--auto-accept-camera-capture')
+    chrome_options.add_argument('--auto-accept-microphone-capture')
+    # Lets the in-page audio tap start its AudioContext without a user gesture
+    chrome_options.add_argument('--autoplay-policy=no-user-gesture-required')
+
+    if platform.system().lower() == "darwin":
+        chrome_options.add_argument('--start-maximized')
+
+    if window_size:
+        # Fill a private display so the whole screen is the meeting
+        chrome_options.add_argument('--window-position=0,0')
+        chrome_options.add_argument(f'--window-size={window_size[0]},{window_size[1]}')
+
+    chrome_options.add_experimental_option('prefs', {
+        'webrtc.ip_handling_policy': 'default_public_interface_only',
+        'webrtc.use_legacy_tls_version': False,
+    })
+
+    # Fake video
+    chrome_options.add_argument(f'--use-file-for-fake-video-capture={ensure_fake_video()}')
+    for argument in extra_arguments or ():
+        chrome_options.add_argument(argument)
+    return chrome_options
+
+
+def launch_chrome(display=None, audio_sink=None, window_size=None, extra_arguments=None):
+    """Start a configured Chrome session, optionally bound to a private display and sink."""
+    service_env = None
+    if display or audio_sink:
+        service_env = dict(os.environ)
+        if display:
+            service_env.update(display.env)
+        if audio_sink:
+            service_env.update(audio_sink.env)
+    options = build_chrome_options(window_size if display else None, extra_arguments)
+    try:
+        service = ChromeService(resolve_chromedriver(), env=service_env)
+        driver = webdriver.Chrome(service=service, options=options)
+    except Exception as e:
+        # Usually a cached driver that no longer matches an updated Chrome
+        logger.warning(f"Chrome launch failed with cached driver ({str(e)}), resolving again")
+        service = ChromeService(resolve_chromedriver(refresh=True), env=service_env)
+        driver = webdriver.Chrome(service=service, options=options)
+    # Explicit waits only: an implicit wait stalls every poll of a missing element
+    driver.implicitly_wait(0)
+    return driver
+
+
+class PooledBrowser:
+    """A launched Chrome session plus the private display/sink it is bound to."""
+
+    def __init__(self, driver, display=None, audio_sink=None):
+        self.driver = driver
+        self.display = display
+        self.audio_sink = audio_sink
+        self.created_at = time.time()
+        self.uses = 0
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Browser quit failed: {str(e)}")
+        if self.audio_sink:
+            self.audio_sink.stop()
+        if self.display:
+            self.display.stop()
+
+
+class BrowserPool:
+    """Keeps pre-launched Chrome sessions ready so a recorder can join immediately.
+
+    Sessions are launched in the background; lease() hands out a ready one
+    and release() either recycles it (cleared cookies and cache) or replaces
+    it with a fresh launch, keeping the pool at its target size. A failed
+    launch is retried with backoff a few times; a slot that still fails is
+    relaunched on the next lease(), which raises if nothing is ready in time.
+    """
+
+    def __init__(self, size=2, isolate=False, screen_size=(1920, 1080), max_uses=1):
+        self.size = size
+        self.isolate = isolate
+        self.screen_size = screen_size
+        self.max_uses = max_uses
+        self.launch_retry_delay = 5  # Doubled after every failed attempt
+        self.launch_attempts = 4
+        self.last_launch_error = None
+        self._failed_slots = 0
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._leased = set()
+        self._closed = False
+
+    def start(self):
+        for _ in range(self.size):
+            self._launch_async()
+
+    def lease(self, timeout=120):
+        """Take a ready session, waiting for one to finish launching if needed."""
+        with self._lock:
+            failed, self._failed_slots = self._failed_slots, 0
+        for _ in range(failed):
+            # Launches that gave up get another go now that a browser is needed
+            self._launch_async()
+        try:
+            browser = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No pooled browser ready within {timeout}s "
+                               f"(last launch error: {self.last_launch_error})")
+        browser.uses += 1
+        with self._lock:
+            self._leased.add(browser)
+        return browser
+
+    def release(self, browser, recycle=True):
+        """Return a session after a meeting; reuse it or replace it."""
+        with self._lock:
+            self._leased.discard(browser)
+        if self._closed:
+            browser.close()
+            return
+        if recycle and browser.uses < self.max_uses and self._reset(browser):
+            self._ready.put(browser)
+            return
+        threading.Thread(target=browser.close, daemon=True).start()
+        self._launch_async()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._ready.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            leased = list(self._leased)
+        for browser in leased:
+            browser.close()
+
+    def _reset(self, browser):
+        try:
+            browser.driver.get('about:blank')
+            browser.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            browser.driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            return True
+        except Exception as e:
+            logger.warning(f"Could not recycle browser, replacing it: {str(e)}")
+            return False
+
+    def _launch_async(self):
+        threading.Thread(target=self._launch, daemon=True).start()
+
+    def _launch(self, attempt=1):
+        display = audio_sink = None
+        try:
+            started = time.time()
+            if self.isolate:
+                display = IsolatedDisplay(*self.screen_size)
+                display.start()
+                audio_sink = IsolatedAudioSink()
+                audio_sink.start()
+            driver = launch_chrome(display, audio_sink, self.screen_size)
+            browser = PooledBrowser(driver, display, audio_sink)
+            if self._closed:
+                browser.close()
+                return
+            self._ready.put(browser)
+            logger.info(f"Pooled browser ready in {time.time() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Pooled browser launch failed (attempt {attempt}): {str(e)}")
+            self.last_launch_error = str(e)
+            if audio_sink:
+                audio_sink.stop()
+            if display:
+                display.stop()
+            if self._closed:
+                return
+            if attempt >= self.launch_attempts:
+                with self._lock:
+                    self._failed_slots += 1
+                return
+            # Keep the pool at its target size once the cause goes away
+            delay = self.launch_retry_delay * 2 ** (attempt - 1)
+            retry = threading.Timer(delay, self._launch, args=(attempt + 1,))
+            retry.daemon = True
+            retry.start()
@@ -0,0 +1,463 @@
+import os
+import base64
+import ctypes
+import ctypes.util
+import logging
+import platform
+import threading
+import cv2
+import numpy as np
+from PIL import ImageGrab
+from synthetic_media import SyntheticScreen
+from cdp import CDPSession, cdp_available
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureBackend:
+    """Grabs a screen region into a numpy array.
+
+    grab() should be as cheap as possible and may return the backend's native
+    pixel layout; convert() turns that into the BGR frame the writers expect.
+    Both are called from different pipeline stages.
+    """
+
+    name = 'base'
+    captures_page = False  # Frames show the page viewport rather than the screen
+
+    def __init__(self, display=None, driver=None):
+        self.display = display
+        self.driver = driver  # WebDriver of the meeting tab, for backends that capture from the browser
+        self.region = None
+        self.crop = None  # (x, y, width, height) inside the region, or None for all of it
+
+    def open(self, region=None, buffers=1):
+        """Prepare to capture region (left, top, width, height), or the whole screen.
+
+        Returns the (width, height) that will be captured. buffers is the number
+        of grabbed images that may be alive at once downstream.
+        """
+        raise NotImplementedError
+
+    def grab(self):
+        raise NotImplementedError
+
+    def convert(self, raw):
+        raise NotImplementedError
+
+    def set_crop(self, rect):
+        """Capture only rect (x, y, width, height) of the opened region from the next grab on.
+
+        The rectangle is clamped to the region and rounded to even sizes; one
+        that ends up empty means the whole region. Safe to call while the
+        pipeline runs. Returns the crop in effect.
+        """
+        if rect is not None:
+            x, y, width, height = rect
+            region_width, region_height = self.region[2:]
+            x, y = min(max(0, x), region_width), min(max(0, y), region_height)
+            width, height = min(width, region_width - x), min(height, region_height - y)
+            width, height = width - width % 2, height - height % 2
+            rect = (x, y, width, height) if width >= 16 and height >= 16 else None
+            if rect == (0, 0, region_width, region_height):
+                rect = None
+        self.crop = rect
+        return rect
+
+    def close(self):
+        pass
+
+
+class PILCaptureBackend(CaptureBackend):
+    """Portable fallback using PIL.ImageGrab; copies and converts every frame."""
+
+    name = 'pil'
+
+    def open(self, region=None, buffers=1):
+        self._grab_kwargs = {}
+        if self.display and platform.system().lower() == 'linux':
+            self._grab_kwargs['xdisplay'] = self.display
+        if region:
+            left, top, width, height = region
+            self._grab_kwargs['bbox'] = (left, top, left + width, top + height)
+            self.region = region
+        else:
+            width, height = ImageGrab.grab(**self._grab_kwargs).size
+            self.region = (0, 0, width, height)
+        return self.region[2], self.region[3]
+
+    def grab(self):
+        kwargs = self._grab_kwargs
+        crop = self.crop
+        if crop:
+            left, top = self.region[0] + crop[0], self.region[1] + crop[1]
+            kwargs = dict(kwargs, bbox=(left, top, left + crop[2], top + crop[3]))
+        try:
+            return ImageGrab.grab(**kwargs)
+        except Exception:
+            # Window moved off screen or bbox rejected: fall back to the whole screen
+            return ImageGrab.grab(xdisplay=self._grab_kwargs.get('xdisplay'))
+
+    def convert(self, raw):
+        return cv2.cvtColor(np.asarray(raw), cv2.COLOR_RGB2BGR)
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """Generated frames instead of a screen, for benchmarks without a display.
+
+    Grabs render into a pool of BGRA buffers like the MIT-SHM backend, so
+    the convert and encode stages do the same work as with a real grab.
+    """
+
+    name = 'synthetic'
+    default_size = (1920, 1080)
+
+    def open(self, region=None, buffers=1):
+        width, height = region[2:] if region else self.default_size
+        self.region = (0, 0, width, height)
+        self._screen = SyntheticScreen(width, height)
+        self._buffers = [np.empty((height, width, 4), dtype=np.uint8) for _ in range(buffers)]
+        self._next = 0
+        return width, height
+
+    def grab(self):
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        frame = self._screen.render(buffer)
+        crop = self.crop
+        if crop:
+            x, y, width, height = crop
+            return frame[y:y + height, x:x + width]
+        return frame
+
+    def convert(self, raw):
+        return cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR)
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', ctypes.c_ulong),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage; the struct is only used through pointers
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+    ]
+
+
+_ZPIXMAP = 2
+_ALL_PLANES = ctypes.c_ulong(-1).value
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+@_X_ERROR_HANDLER
+def _log_x_error(display, event):
+    # Xlib's default handler exits the process; a failed grab should only skip a frame
+    logger.warning("X server reported an error during screen capture")
+    return 0
+
+
+def _load_x11():
+    x11_path = ctypes.util.find_library('X11')
+    xext_path = ctypes.util.find_library('Xext')
+    if not x11_path or not xext_path:
+        raise RuntimeError("libX11/libXext not found")
+    x11 = ctypes.CDLL(x11_path)
+    xext = ctypes.CDLL(xext_path)
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    x11.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XRootWindow.restype = ctypes.c_ulong
+    x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDefaultVisual.restype = ctypes.c_void_p
+    x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    x11.XSetErrorHandler.argtypes = [_X_ERROR_HANDLER]
+    x11.XSetErrorHandler.restype = ctypes.c_void_p
+
+    xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+    xext.XShmCreateImage.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+        ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint
+    ]
+    xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+    xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+    xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+    xext.XShmGetImage.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+        ctypes.c_int, ctypes.c_int, ctypes.c_ulong
+    ]
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+    return x11, xext, libc
+
+
+class XShmCaptureBackend(CaptureBackend):
+    """X11 MIT-SHM capture straight into reusable shared-memory numpy buffers.
+
+    The X server copies pixels into a System V segment that is mapped as a
+    BGRA numpy view, so grab() does no allocation and no Python-side copy.
+    A small pool of segments is rotated so frames still queued downstream
+    are not overwritten by the next grab.
+    """
+
+    name = 'xshm'
+
+    def __init__(self, display=None, driver=None):
+        super().__init__(display, driver)
+        self._display = None
+        self._buffers = []
+        self._next = 0
+
+    def open(self, region=None, buffers=1):
+        self._x11, self._xext, self._libc = _load_x11()
+        self._x11.XSetErrorHandler(_log_x_error)
+        name = self.display or os.environ.get('DISPLAY')
+        self._display = self._x11.XOpenDisplay(name.encode() if name else None)
+        if not self._display:
+            raise RuntimeError(f"Cannot open X display {name}")
+        if not self._xext.XShmQueryExtension(self._display):
+            self.close()
+            raise RuntimeError("X server has no MIT-SHM extension")
+
+        screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XRootWindow(self._display, screen)
+        screen_width = self._x11.XDisplayWidth(self._display, screen)
+        screen_height = self._x11.XDisplayHeight(self._display, screen)
+        if region:
+            left, top, width, height = region
+            # XShmGetImage fails outright if the rectangle leaves the screen
+            left = min(max(0, left), screen_width - 1)
+            top = min(max(0, top), screen_height - 1)
+            width = min(width, screen_width - left)
+            height = min(height, screen_height - top)
+        else:
+            left, top, width, height = 0, 0, screen_width, screen_height
+        self.region = (left, top, width, height)
+
+        visual = self._x11.XDefaultVisual(self._display, screen)
+        depth = self._x11.XDefaultDepth(self._display, screen)
+        try:
+            for _ in range(max(1, buffers)):
+                self._buffers.append(self._create_buffer(visual, depth, width, height))
+        except Exception:
+            self.close()
+            raise
+        return width, height
+
+    def _create_buffer(self, visual, depth, width, height):
+        info = _XShmSegmentInfo()
+        image = self._xext.XShmCreateImage(self._display, visual, depth, _ZPIXMAP,
+                                           None, ctypes.byref(info), width, height)
+        if not image:
+            raise RuntimeError("XShmCreateImage failed")
+        if image.contents.bits_per_pixel != 32:
+            self._x11.XFree(image)
+            raise RuntimeError(f"Unsupported X visual: {image.contents.bits_per_pixel} bpp")
+
+        stride = image.contents.bytes_per_line
+        size = stride * height
+        info.shmid = self._libc.shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            self._x11.XFree(image)
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        address = self._libc.shmat(info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(info.shmid, _IPC_RMID, None)
+            self._x11.XFree(image)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        info.shmaddr = address
+        info.readOnly = 0
+        image.contents.data = address
+        self._xext.XShmAttach(self._display, ctypes.byref(info))
+        self._x11.XSync(self._display, 0)
+        # Mark for removal now; the segment lives until both sides detach
+        self._libc.shmctl(info.shmid, _IPC_RMID, None)
+
+        pixels = np.ctypeslib.as_array((ctypes.c_ubyte * size).from_address(address))
+        array = pixels.reshape(height, stride // 4, 4)[:, :width]
+        return image, info, array, pixels
+
+    def grab(self):
+        image, info, array, pixels = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        left, top, width, height = self.region
+        crop = self.crop
+        if crop:
+            # Ask the server for the crop only; it packs the rows at 4 bytes per pixel
+            left, top = left + crop[0], top + crop[1]
+            width, height = crop[2], crop[3]
+            array = pixels[:width * height * 4].reshape(height, width, 4)
+        image.contents.width, image.contents.height = width, height
+        if not self._xext.XShmGetImage(self._display, self._root, image, left, top, _ALL_PLANES):
+            raise RuntimeError("XShmGetImage failed")
+        return array
+
+    def convert(self, raw):
+        return cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR)
+
+    def close(self):
+        if not self._display:
+            return
+        for image, info, _, _ in self._buffers:
+            self._xext.XShmDetach(self._display, ctypes.byref(info))
+            self._libc.shmdt(info.shmaddr)
+            self._x11.XFree(image)
+        self._buffers = []
+        self._x11.XSync(self._display, 0)
+        self._x11.XCloseDisplay(self._display)
+        self._display = None
+
+
+class CDPScreencastBackend(CaptureBackend):
+    """Frames pushed by Chrome itself through the DevTools Page.startScreencast API.
+
+    Needs no X display, so it works with headless Chrome, and captures only
+    the page, never browser chrome. Chrome sends a JPEG whenever the page
+    repaints; grab() just picks up the latest one, and convert() decodes a
+    frame only once, reusing the decoded image while the page is static.
+    OpenCV's Python imdecode has no output argument, so a changed frame
+    always decodes into a new array; copying it into a pooled buffer would
+    add a copy without saving the allocation.
+    """
+
+    name = 'cdp'
+    captures_page = True
+    quality = 85
+
+    def __init__(self, display=None, driver=None):
+        super().__init__(display, driver)
+        self._session = None
+        self._latest = (0, None)
+        self._decoded = (0, None)
+        self._first_frame = None
+
+    def open(self, region=None, buffers=1):
+        if self.driver is None:
+            raise RuntimeError("CDP capture needs the browser's WebDriver")
+        if not cdp_available():
+            raise RuntimeError("websocket-client is not installed")
+        self._first_frame = threading.Event()
+        self._session = CDPSession.for_driver(self.driver)
+        if region:
+            width, height = region[2:]
+        else:
+            viewport = self._session.send('Runtime.evaluate', {
+                'expression': '[innerWidth * devicePixelRatio, innerHeight * devicePixelRatio]',
+                'returnByValue': True,
+            })['result']['value']
+            width, height = int(viewport[0]), int(viewport[1])
+        self.region = (0, 0, width, height)
+        self._session.on('Page.screencastFrame', self._on_frame)
+        self._session.send('Page.startScreencast', {
+            'format': 'jpeg', 'quality': self.quality,
+            'maxWidth': width, 'maxHeight': height, 'everyNthFrame': 1,
+        })
+        if not self._first_frame.wait(5):
+            self.close()
+            raise RuntimeError("Chrome sent no screencast frame")
+        return width, height
+
+    def _on_frame(self, params):
+        # Chrome sends the next frame only after this one is acknowledged
+        self._session.notify('Page.screencastFrameAck', {'sessionId': params['sessionId']})
+        self._latest = (self._latest[0] + 1, base64.b64decode(params['data']))
+        self._first_frame.set()
+
+    def grab(self):
+        return self._latest
+
+    def convert(self, raw):
+        sequence, data = raw
+        if sequence != self._decoded[0]:
+            # Frames handed out earlier stay valid: a new decode never writes into them
+            self._decoded = (sequence, cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR))
+        frame = self._decoded[1]
+        crop = self.crop
+        if crop and frame is not None:
+            # Chrome may scale frames down from the requested size
+            scale = frame.shape[1] / self.region[2]
+            x, y, width, height = (int(value * scale) for value in crop)
+            frame = frame[y:y + height, x:x + width]
+        return frame
+
+    def close(self):
+        if self._session is None:
+            return
+        try:
+            self._session.send('Page.stopScreencast', timeout=2)
+        except Exception as e:
+            logger.debug(f"Stopping screencast failed: {str(e)}")
+        self._session.close()
+        self._session = None
+
+
+CAPTURE_BACKENDS = {
+    PILCaptureBackend.name: PILCaptureBackend,
+    XShmCaptureBackend.name: XShmCaptureBackend,
+    SyntheticCaptureBackend.name: SyntheticCaptureBackend,
+    CDPScreencastBackend.name: CDPScreencastBackend,
+}
+
+
+def xshm_available(display=None):
+    """MIT-SHM capture needs Linux, an X display and the Xlib/Xext libraries."""
+    if platform.system().lower() != 'linux':
+        return False
+    if not (display or os.environ.get('DISPLAY')):
+        return False
+    return bool(ctypes.util.find_library('X11') and ctypes.util.find_library('Xext'))
+
+
+def create_capture_backend(name='auto', display=None, driver=None):
+    """Instantiate a capture backend by name; 'auto' prefers MIT-SHM when available."""
+    if name == 'auto':
+        name = XShmCaptureBackend.name if xshm_available(display) else PILCaptureBackend.name
+    if name not in CAPTURE_BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name}")
+    return CAPTURE_BACKENDS[name](display, driver)
+
+
+def open_capture_backend(name, region=None, buffers=1, display=None, driver=None):
+    """Create and open a backend, falling back to PIL if the requested one fails."""
+    backend = create_capture_backend(name, display, driver)
+    try:
+        size = backend.open(region, buffers)
+    except Exception as e:
+        if backend.name == PILCaptureBackend.name:
+            raise
+        logger.warning(f"{backend.name} capture unavailable ({str(e)}), falling back to PIL")
+        backend = PILCaptureBackend(display)
+        size = backend.open(region, buffers)
+    logger.info(f"Capture backend: {backend.name}, region {backend.region}")
+    return backend, size
@@ -0,0 +1,300 @@
+import time
+import queue
+import logging
+import threading
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# What to do when the encoder falls behind the capture schedule
+DROP_OLDEST = 'drop-oldest'  # Discard stale frames; output has gaps but stays current
+DUPLICATE = 'duplicate'      # Repeat the last frame for missed ticks to keep constant frame rate
+DROP_POLICIES = (DROP_OLDEST, DUPLICATE)
+
+_STOP = object()
+
+
+class StageTimer:
+    """Running timing statistics and a latency histogram for one pipeline stage."""
+
+    # Histogram upper bounds in seconds (Prometheus-style, cumulative on export)
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self._bucket_counts = [0] * len(self.BUCKETS)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            if seconds > self.max:
+                self.max = seconds
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    self._bucket_counts[i] += 1
+                    break
+
+    def histogram(self):
+        """Cumulative bucket counts as [(upper_bound, count)], plus sum and count."""
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(self.BUCKETS, self._bucket_counts):
+                running += count
+                cumulative.append((bound, running))
+            return {'buckets': cumulative, 'sum': self.total, 'count': self.count}
+
+    def snapshot(self):
+        with self._lock:
+            avg = self.total / self.count if self.count else 0.0
+            return {
+                'count': self.count,
+                'avg_ms': round(avg * 1000, 2),
+                'max_ms': round(self.max * 1000, 2),
+                'last_ms': round(self.last * 1000, 2),
+            }
+
+
+class FrameChangeDetector:
+    """Cheap check whether a frame differs visibly from the last emitted one.
+
+    Compares a strided thumbnail (every step-th pixel) against the previous
+    one and reports a change when enough sampled pixels moved by more than
+    pixel_threshold. A frame is always emitted after max_static_seconds so
+    players still get regular keyframes.
+    """
+
+    def __init__(self, pixel_threshold=16, area_threshold=0.0005, step=8, max_static_seconds=1.0):
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.step = step
+        self.max_static_seconds = max_static_seconds
+        self._last = None
+        self._last_emitted = None
+
+    def changed(self, image, timestamp):
+        thumb = np.ascontiguousarray(image[::self.step, ::self.step])
+        if (self._last is not None and thumb.shape == self._last.shape
+                and timestamp - self._last_emitted < self.max_static_seconds):
+            diff = cv2.absdiff(thumb, self._last)
+            moved = np.count_nonzero(diff > self.pixel_threshold)
+            if moved < self.area_threshold * diff.size:
+                return False
+        self._last = thumb
+        self._last_emitted = timestamp
+        return True
+
+
+class CapturePipeline:
+    """Grab, convert and encode stages on separate threads joined by bounded queues.
+
+    grab() returns a raw image, convert(raw) returns a BGR frame (or None to
+    skip it) and encode(timestamp, frame) hands the frame to the writer. The
+    grab stage is driven by a fixed schedule of ticks at the target fps; when
+    a downstream queue is full the oldest queued frame is discarded.
+    Timestamps come from time.monotonic(), the clock audio blocks are
+    stamped with, so they can be placed on the audio timeline.
+
+    With a change detector, frames identical to the last one are skipped
+    before conversion and the writer is expected to honour the timestamps
+    (variable frame rate), so gaps are never filled with duplicates.
+    """
+
+    def __init__(self, grab, convert, encode, fps, queue_size=4, drop_policy=DUPLICATE,
+                 change_detector=None):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.grab = grab
+        self.convert = convert
+        self.encode = encode
+        self.fps = fps
+        self.drop_policy = drop_policy
+        self.change_detector = change_detector
+        self.queue_size = queue_size
+        self.timers = {name: StageTimer(name) for name in ('grab', 'convert', 'encode')}
+        self._convert_queue = queue.Queue(maxsize=queue_size)
+        self._encode_queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.frames_grabbed = 0
+        self.frames_encoded = 0
+        self.frames_dropped = 0     # Discarded from a full queue or unusable
+        self.ticks_missed = 0       # Schedule ticks the grab stage could not serve in time
+        self.frames_duplicated = 0
+        self.frames_unchanged = 0   # Skipped by the change detector
+        self.started_at = None
+        self.error = None
+        self._stop_event = None
+
+    def run(self, stop_event):
+        """Run until stop_event is set, then flush the queues and return."""
+        self._stop_event = stop_event
+        self.started_at = time.monotonic()
+        workers = [
+            threading.Thread(target=self._convert_stage, daemon=True),
+            threading.Thread(target=self._encode_stage, daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            self._grab_stage()
+        finally:
+            self._convert_queue.put(_STOP)
+            for worker in workers:
+                worker.join()
+        if self.error:
+            raise self.error
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        with self._lock:
+            stats = {
+                'target_fps': self.fps,
+                'achieved_fps': round(self.frames_encoded / elapsed, 2) if elapsed else 0.0,
+                'frames_grabbed': self.frames_grabbed,
+                'frames_encoded': self.frames_encoded,
+                'frames_dropped': self.frames_dropped,
+                'frames_duplicated': self.frames_duplicated,
+                'ticks_missed': self.ticks_missed,
+                'frames_unchanged': self.frames_unchanged,
+                'skip_ratio': round(self.frames_unchanged / self.frames_grabbed, 4)
+                              if self.frames_grabbed else 0.0,
+                'convert_queue': self._convert_queue.qsize(),
+                'encode_queue': self._encode_queue.qsize(),
+            }
+        stats['stages'] = {name: timer.snapshot() for name, timer in self.timers.items()}
+        return stats
+
+    def set_fps(self, fps):
+        """Change the capture rate; the grab schedule restarts at the new interval."""
+        self.fps = fps
+
+    def _grab_stage(self):
+        fps = self.fps
+        interval = 1.0 / fps
+        tick = 0
+        next_tick_time = time.monotonic()
+        while not self._stop_event.is_set():
+            if self.fps != fps:
+                fps = self.fps
+                interval = 1.0 / fps
+                next_tick_time = time.monotonic()
+            # Sleep until the next tick instead of spinning
+            delay = next_tick_time - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+            now = time.monotonic()
+            late = int((now - next_tick_time) / interval)
+            if late > 0:
+                # Grab fell behind: skip the ticks we can no longer serve
+                tick += late
+                next_tick_time += late * interval
+                with self._lock:
+                    self.ticks_missed += late
+
+            started = time.perf_counter()
+            try:
+                raw = self.grab()
+            except Exception as e:
+                logger.warning(f"Frame grab failed: {str(e)}")
+                raw = None
+            self.timers['grab'].record(time.perf_counter() - started)
+
+            if raw is not None:
+                with self._lock:
+                    self.frames_grabbed += 1
+                self._put_latest(self._convert_queue, (tick, now, raw))
+            tick += 1
+            next_tick_time += interval
+
+    def _convert_stage(self):
+        while True:
+            item = self._convert_queue.get()
+            if item is _STOP:
+                self._encode_queue.put(_STOP)
+                return
+            tick, timestamp, raw = item
+            started = time.perf_counter()
+            unchanged = False
+            try:
+                # Array sources are compared before paying for conversion;
+                # PIL images can only be compared once converted
+                if isinstance(raw, np.ndarray):
+                    unchanged = self._unchanged(raw, timestamp)
+                frame = None if unchanged else self.convert(raw)
+                if frame is not None and not isinstance(raw, np.ndarray):
+                    unchanged = self._unchanged(frame, timestamp)
+            except Exception as e:
+                logger.warning(f"Frame conversion failed: {str(e)}")
+                frame = None
+            self.timers['convert'].record(time.perf_counter() - started)
+            if unchanged:
+                continue
+            if frame is None:
+                with self._lock:
+                    self.frames_dropped += 1
+                continue
+            self._put_latest(self._encode_queue, (tick, timestamp, frame))
+
+    def _encode_stage(self):
+        last_tick = None
+        last_frame = None
+        while True:
+            item = self._encode_queue.get()
+            if item is _STOP:
+                return
+            if self.error:
+                continue  # Keep draining so upstream stages never block
+            tick, timestamp, frame = item
+            try:
+                if (self.drop_policy == DUPLICATE and self.change_detector is None
+                        and last_tick is not None):
+                    interval = 1.0 / self.fps
+                    # Fill every tick between the previous frame and this one
+                    for missing in range(last_tick + 1, tick):
+                        self._encode_timed(timestamp - (tick - missing) * interval, last_frame)
+                        with self._lock:
+                            self.frames_duplicated += 1
+                self._encode_timed(timestamp, frame)
+            except Exception as e:
+                logger.error(f"Frame encode failed: {str(e)}")
+                self.error = e
+                self._stop_event.set()
+                continue
+            last_tick = tick
+            last_frame = frame
+
+    def _unchanged(self, image, timestamp):
+        if self.change_detector is None or self.change_detector.changed(image, timestamp):
+            return False
+        with self._lock:
+            self.frames_unchanged += 1
+        return True
+
+    def _encode_timed(self, timestamp, frame):
+        started = time.perf_counter()
+        self.encode(timestamp, frame)
+        self.timers['encode'].record(time.perf_counter() - started)
+        with self._lock:
+            self.frames_encoded += 1
+
+    def _put_latest(self, target, item):
+        """Queue an item, discarding the oldest queued one if the queue is full."""
+        while True:
+            try:
+                target.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    target.get_nowait()
+                    with self._lock:
+                        self.frames_dropped += 1
+                except queue.Empty:
+                    pass
@@ -0,0 +1,118 @@
+import json
+import logging
+import threading
+import itertools
+import urllib.request
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+logger = logging.getLogger(__name__)
+
+
+def cdp_available():
+    return websocket is not None
+
+
+def page_websocket_url(driver):
+    """DevTools websocket of the tab the WebDriver session is on."""
+    address = driver.capabilities['goog:chromeOptions']['debuggerAddress']
+    with urllib.request.urlopen(f'http://{address}/json/list', timeout=5) as response:
+        targets = json.load(response)
+    pages = [target for target in targets if target.get('type') == 'page']
+    # chromedriver uses DevTools target ids as window handles
+    handle = driver.current_window_handle
+    for target in pages:
+        if target['id'] == handle:
+            return target['webSocketDebuggerUrl']
+    if not pages:
+        raise RuntimeError(f"No page target at {address}")
+    return pages[0]['webSocketDebuggerUrl']
+
+
+class CDPSession:
+    """Chrome DevTools Protocol connection to one page, alongside chromedriver's own.
+
+    send() blocks until the command's result arrives; notify() sends without
+    waiting, which is what event handlers must use. Events are dispatched
+    to the handlers registered with on(), on the reader thread.
+    """
+
+    def __init__(self, websocket_url, timeout=10):
+        if websocket is None:
+            raise RuntimeError("websocket-client is not installed (pip install websocket-client)")
+        self.timeout = timeout
+        # No Origin header, so Chrome accepts the connection without --remote-allow-origins
+        self._ws = websocket.create_connection(websocket_url, timeout=timeout, suppress_origin=True)
+        self._ws.settimeout(None)
+        self._ids = itertools.count(1)
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._handlers = {}
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def for_driver(cls, driver, timeout=10):
+        return cls(page_websocket_url(driver), timeout)
+
+    def on(self, event, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    def notify(self, method, params=None):
+        """Send a command and ignore its result."""
+        message_id = next(self._ids)
+        with self._send_lock:
+            self._ws.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+        return message_id
+
+    def send(self, method, params=None, timeout=None):
+        """Send a command and return its result; raises on a protocol error."""
+        waiter = {'event': threading.Event()}
+        message_id = next(self._ids)
+        self._pending[message_id] = waiter
+        try:
+            with self._send_lock:
+                self._ws.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+            if not waiter['event'].wait(timeout or self.timeout):
+                raise TimeoutError(f"No reply to {method}")
+        finally:
+            self._pending.pop(message_id, None)
+        if 'error' in waiter:
+            raise RuntimeError(f"{method} failed: {waiter['error'].get('message')}")
+        return waiter.get('result', {})
+
+    def _read(self):
+        while not self._closed:
+            try:
+                message = json.loads(self._ws.recv())
+            except Exception as e:
+                if not self._closed:
+                    logger.warning(f"DevTools connection lost: {str(e)}")
+                break
+            if 'id' in message:
+                waiter = self._pending.get(message['id'])
+                if waiter:
+                    waiter.update({key: message[key] for key in ('result', 'error') if key in message})
+                    waiter['event'].set()
+                continue
+            for handler in self._handlers.get(message.get('method'), ()):
+                try:
+                    handler(message.get('params', {}))
+                except Exception as e:
+                    logger.error(f"DevTools {message['method']} handler failed: {str(e)}")
+        # Wake anyone still waiting for a reply
+        for waiter in list(self._pending.values()):
+            waiter['error'] = {'message': 'connection closed'}
+            waiter['event'].set()
+
+    def close(self):
+        self._closed = True
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+        self._reader.join(timeout=2)
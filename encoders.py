@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from fractions import Fraction
+import cv2
+import numpy as np
+from synthetic_media import SyntheticScreen
+
+try:
+    import av
+except ImportError:
+    av = None
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'meeting_recorder', 'encoders.json')
+
+# H.264 settings per use case; OpenCV's mp4v writer cannot honour them
+ENCODER_PROFILES = {
+    'balanced': {'preset': 'veryfast', 'crf': 23},
+    'archival': {'preset': 'slow', 'crf': 18},
+    'low-cpu': {'preset': 'ultrafast', 'crf': 28, 'threads': 2},
+    'low-bandwidth': {'preset': 'medium', 'crf': 32, 'maxrate': '600k', 'bufsize': '1200k'},
+}
+
+
+def pyav_available():
+    return av is not None
+
+
+def x264_args(profile='balanced'):
+    """ffmpeg output arguments for a profile (also used by the live muxer)."""
+    settings = ENCODER_PROFILES[profile]
+    args = ['-c:v', 'libx264', '-preset', settings['preset'], '-crf', str(settings['crf'])]
+    if 'threads' in settings:
+        args += ['-threads', str(settings['threads'])]
+    if 'maxrate' in settings:
+        args += ['-maxrate', settings['maxrate'], '-bufsize', settings['bufsize']]
+    return args + ['-pix_fmt', 'yuv420p']
+
+
+class VideoEncoder:
+    """Writes BGR frames to a video file.
+
+    Constant frame rate encoders ignore the timestamp passed to write();
+    variable frame rate ones use it as the frame's presentation time.
+    """
+
+    name = 'base'
+    variable_frame_rate = False
+    supports_profiles = True
+
+    def __init__(self, path, width, height, fps, profile='balanced'):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.profile = profile
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def write(self, frame, timestamp=None):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class OpenCVEncoder(VideoEncoder):
+    """cv2.VideoWriter with the mp4v codec: cheap, but large files and no tuning."""
+
+    name = 'opencv'
+    supports_profiles = False
+
+    def __init__(self, path, width, height, fps, profile='balanced'):
+        super().__init__(path, width, height, fps, profile)
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+
+    def write(self, frame, timestamp=None):
+        self._writer.write(frame)
+
+    def release(self):
+        self._writer.release()
+
+
+class FFmpegPipeEncoder(VideoEncoder):
+    """libx264 in an ffmpeg child process fed raw frames over stdin."""
+
+    name = 'ffmpeg'
+
+    def __init__(self, path, width, height, fps, profile='balanced'):
+        super().__init__(path, width, height, fps, profile)
+        self.process = subprocess.Popen([
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-framerate', str(fps),
+            '-i', 'pipe:0',
+            *x264_args(profile),
+            path
+        ], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr_thread = threading.Thread(target=self._log_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    @classmethod
+    def available(cls):
+        return shutil.which('ffmpeg') is not None
+
+    def write(self, frame, timestamp=None):
+        self.process.stdin.write(frame)
+
+    def release(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.process.wait()
+        self._stderr_thread.join(timeout=5)
+        self.process = None
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg encoder exited with code {returncode}")
+
+    def _log_stderr(self):
+        for line in self.process.stderr:
+            logger.warning(f"ffmpeg: {line.decode(errors='replace').rstrip()}")
+
+
+class PyAVEncoder(VideoEncoder):
+    """H.264 writer that stamps every frame with its own capture timestamp.
+
+    Unlike cv2.VideoWriter this produces variable frame rate output, so
+    frames skipped as unchanged simply extend the previous frame on screen.
+    """
+
+    name = 'pyav'
+    variable_frame_rate = True
+    # Millisecond timestamps are precise enough for screen capture
+    time_base = Fraction(1, 1000)
+
+    def __init__(self, path, width, height, fps, profile='balanced', codec='libx264'):
+        if av is None:
+            raise RuntimeError("PyAV is not installed (pip install av)")
+        super().__init__(path, width, height, fps, profile)
+        settings = ENCODER_PROFILES[profile]
+        self.container = av.open(path, mode='w')
+        self.stream = self.container.add_stream(codec, rate=fps)
+        self.stream.width = width
+        self.stream.height = height
+        self.stream.pix_fmt = 'yuv420p'
+        self.stream.time_base = self.time_base
+        self.stream.codec_context.time_base = self.time_base
+        options = {'preset': settings['preset'], 'crf': str(settings['crf'])}
+        if 'maxrate' in settings:
+            options.update(maxrate=settings['maxrate'], bufsize=settings['bufsize'])
+        self.stream.options = options
+        if 'threads' in settings:
+            self.stream.codec_context.thread_count = settings['threads']
+        self._last_pts = -1
+
+    @classmethod
+    def available(cls):
+        return av is not None
+
+    def write(self, frame, timestamp=None):
+        """Encode a BGR frame shown from `timestamp` seconds after the start."""
+        video_frame = av.VideoFrame.from_ndarray(frame, format='bgr24')
+        # Timestamps must be strictly increasing in the stream's time base
+        pts = max(int(round((timestamp or 0.0) / self.time_base)), self._last_pts + 1)
+        video_frame.pts = pts
+        video_frame.time_base = self.time_base
+        self._last_pts = pts
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+
+    def release(self):
+        """Flush the encoder and close the file (mirrors cv2.VideoWriter)."""
+        if self.container is None:
+            return
+        for packet in self.stream.encode(None):
+            self.container.mux(packet)
+        self.container.close()
+        self.container = None
+
+
+ENCODER_BACKENDS = {
+    OpenCVEncoder.name: OpenCVEncoder,
+    FFmpegPipeEncoder.name: FFmpegPipeEncoder,
+    PyAVEncoder.name: PyAVEncoder,
+}
+
+
+def create_encoder(name, path, width, height, fps, profile='balanced'):
+    if name not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {name}")
+    encoder_class = ENCODER_BACKENDS[name]
+    if not encoder_class.available():
+        raise RuntimeError(f"Encoder backend {name} is not available on this host")
+    if not encoder_class.supports_profiles and profile != 'balanced':
+        logger.warning(f"{name} encoder ignores the {profile} profile")
+    return encoder_class(path, width, height, fps, profile)
+
+
+def _calibration_key(profile, fps):
+    return f'{profile}@{fps}'
+
+
+def calibrated_encoder(profile, fps):
+    """Encoder picked by the last calibration for this profile and fps, or None."""
+    try:
+        with open(CALIBRATION_FILE) as f:
+            return json.load(f)[_calibration_key(profile, fps)]['encoder']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def measure_encoder(name, width, height, fps, profile, frames):
+    """Encode synthetic frames as fast as possible; returns throughput and cost."""
+    screen = SyntheticScreen(width, height)
+    bgra = np.empty((height, width, 4), dtype=np.uint8)
+    samples = [np.ascontiguousarray(screen.render(bgra)[:, :, :3]) for _ in range(30)]
+    workdir = tempfile.mkdtemp(prefix='encoder_calibration_')
+    path = os.path.join(workdir, 'calibration.mp4')
+    try:
+        cpu_started = os.times()
+        started = time.perf_counter()
+        encoder = create_encoder(name, path, width, height, fps, profile)
+        for i in range(frames):
+            encoder.write(samples[i % len(samples)], i / fps)
+        encoder.release()
+        elapsed = time.perf_counter() - started
+        cpu_finished = os.times()
+        # Children covers ffmpeg, which has exited and been reaped by release()
+        cpu = sum(cpu_finished[:4]) - sum(cpu_started[:4])
+        return {
+            'encoder': name,
+            'max_fps': round(frames / elapsed, 1),
+            'cpu_ms_per_frame': round(1000 * cpu / frames, 2),
+            'bytes_per_frame': os.path.getsize(path) // frames,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def calibrate_encoders(width=1920, height=1080, fps=15, profile='balanced', seconds=10, headroom=1.25):
+    """Benchmark every available backend and remember the cheapest that keeps up.
+
+    A backend qualifies when it encodes at least headroom x the target fps;
+    among those the lowest CPU cost per frame wins. Backends that cannot
+    apply the profile's quality settings are only considered for low-cpu.
+    """
+    results = []
+    for name, encoder_class in ENCODER_BACKENDS.items():
+        if not encoder_class.available():
+            continue
+        if not encoder_class.supports_profiles and profile != 'low-cpu':
+            continue
+        try:
+            result = measure_encoder(name, width, height, fps, profile, int(fps * seconds))
+        except Exception as e:
+            logger.warning(f"Calibration of {name} failed: {str(e)}")
+            continue
+        logger.info(f"Encoder {name}: {result}")
+        results.append(result)
+    if not results:
+        raise RuntimeError("No encoder backend could be calibrated")
+
+    sustaining = [r for r in results if r['max_fps'] >= fps * headroom]
+    if sustaining:
+        chosen = min(sustaining, key=lambda r: r['cpu_ms_per_frame'])
+    else:
+        logger.warning(f"No encoder sustains {fps} fps at {width}x{height}, picking the fastest")
+        chosen = max(results, key=lambda r: r['max_fps'])
+
+    try:
+        with open(CALIBRATION_FILE) as f:
+            calibration = json.load(f)
+    except (OSError, ValueError):
+        calibration = {}
+    calibration[_calibration_key(profile, fps)] = {
+        'encoder': chosen['encoder'],
+        'width': width,
+        'height': height,
+        'calibrated_at': time.time(),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
+    with open(CALIBRATION_FILE, 'w') as f:
+        json.dump(calibration, f, indent=2)
+    return chosen, results
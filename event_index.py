@@ -0,0 +1,164 @@
+import os
+import struct
+import logging
+import argparse
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File layout: one 32-byte header, then fixed 32-byte little-endian records
+# (time in the recording, video frame number, kind, flags, value, subject).
+# Subjects are 1-based line numbers in the .names file next to the index.
+MAGIC = b'MRIDX\x00'
+VERSION = 1
+HEADER = struct.Struct('<6sHI20x')
+RECORD = struct.Struct('<dqHHiI4x')
+EVENT_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('frame', '<i8'),
+    ('kind', '<u2'),
+    ('flags', '<u2'),
+    ('value', '<i4'),
+    ('subject', '<u4'),
+    ('reserved', 'V4'),
+])
+
+EVENT_KINDS = {
+    'frame': 1,          # frame = output frame number, time = its position in the file
+    'participants': 2,   # value = participant count (-1 when unreadable)
+    'joined': 3,         # subject = participant name
+    'left': 4,
+    'speaker': 5,        # subject = active speaker name (0 when nobody)
+    'share_start': 6,
+    'share_stop': 7,
+    'ended': 8,
+}
+KIND_NAMES = {code: name for name, code in EVENT_KINDS.items()}
+
+# Flush frame records at least this often; other events are flushed at once
+FRAME_FLUSH_EVERY = 64
+
+
+def index_paths(recording_path):
+    base = os.path.splitext(recording_path)[0]
+    return base + '.events', base + '.events.names'
+
+
+class EventIndexWriter:
+    """Appends timestamped meeting events to a fixed-record binary index.
+
+    Records are flushed as they are written (frame mappings in small
+    batches), so the index is usable while the meeting is still running
+    and after a crash; a torn last record is ignored by the reader.
+    """
+
+    def __init__(self, recording_path):
+        self.path, self.names_path = index_paths(recording_path)
+        self._lock = threading.Lock()
+        self._subjects = {}
+        self._unflushed = 0
+        self.records = 0
+        self._file = open(self.path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._names = open(self.names_path, 'w', encoding='utf-8')
+
+    def _subject(self, name):
+        if not name:
+            return 0
+        name = ' '.join(str(name).split())  # One name per line
+        subject = self._subjects.get(name)
+        if subject is None:
+            subject = len(self._subjects) + 1
+            self._subjects[name] = subject
+            self._names.write(name + '\n')
+            self._names.flush()
+        return subject
+
+    def add(self, kind, time, value=0, name=None, frame=-1, flags=0):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(RECORD.pack(time, frame, EVENT_KINDS[kind], flags, value, self._subject(name)))
+            self.records += 1
+            self._unflushed += 1
+            if kind != 'frame' or self._unflushed >= FRAME_FLUSH_EVERY:
+                self._file.flush()
+                self._unflushed = 0
+
+    def frame(self, number, time):
+        self.add('frame', time, frame=number)
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._names.close()
+            self._file = None
+        logger.info(f"Event index: {self.records} records in {self.path}")
+
+
+def read_event_index(path):
+    """(structured array with EVENT_DTYPE, list of subject names) of an index file."""
+    with open(path, 'rb') as f:
+        magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"{path} is not an event index")
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    records = np.fromfile(path, dtype=EVENT_DTYPE, count=count, offset=HEADER.size)
+    names_path = os.path.splitext(path)[0] + '.events.names'
+    names = []
+    if os.path.exists(names_path):
+        with open(names_path, encoding='utf-8') as f:
+            names = f.read().splitlines()
+    return records, names
+
+
+def find_events(path, kind, name=None):
+    """Records of one kind, optionally only those about a named participant."""
+    records, names = read_event_index(path)
+    selected = records[records['kind'] == EVENT_KINDS[kind]]
+    if name is not None:
+        subject = names.index(name) + 1 if name in names else -1
+        selected = selected[selected['subject'] == subject]
+    return selected
+
+
+def frame_at(path, seconds):
+    """Number of the frame shown at `seconds` into the recording."""
+    frames = find_events(path, 'frame')
+    if not len(frames):
+        return None
+    position = np.searchsorted(frames['time'], seconds, side='right') - 1
+    return int(frames['frame'][max(0, position)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query a recording event index')
+    parser.add_argument('index', help='.events file written next to the recording')
+    parser.add_argument('--kind', choices=[k for k in EVENT_KINDS if k != 'frame'],
+                        help='Only events of this kind')
+    parser.add_argument('--name', help='Only events about this participant')
+    parser.add_argument('--frame-at', type=float, metavar='SECONDS',
+                        help='Print the frame number shown at this time and exit')
+    args = parser.parse_args()
+
+    if args.frame_at is not None:
+        print(frame_at(args.index, args.frame_at))
+        return
+    records, names = read_event_index(args.index)
+    records = records[records['kind'] != EVENT_KINDS['frame']]
+    if args.kind:
+        records = records[records['kind'] == EVENT_KINDS[args.kind]]
+    for record in records:
+        name = names[record['subject'] - 1] if record['subject'] else ''
+        if args.name is not None and name != args.name:
+            continue
+        kind = KIND_NAMES.get(int(record['kind']), str(record['kind']))
+        value = record['value'] if kind == 'participants' else ''
+        print(f"{record['time']:>10.3f}  {kind:<12} {name}{value}")
+
+
+if __name__ == '__main__':
+    main()
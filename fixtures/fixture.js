@@ -0,0 +1,51 @@
+// Shared behaviour of the offline meeting pages served by `benchmark.py offline`.
+// Screens live in <template>s and are only added to the DOM when they are
+// reached, so presence checks behave like they do on the real sites.
+// Query parameters (seconds): prejoin, lobby, duration; participants (count).
+const params = new URLSearchParams(location.search);
+
+const fixture = {
+    prejoinDelay: Number(params.get('prejoin') || 1) * 1000,
+    lobbyDelay: Number(params.get('lobby') || 1) * 1000,
+    duration: Number(params.get('duration') || 60) * 1000,
+    participants: Number(params.get('participants') || 3),
+
+    stage() {
+        return document.getElementById('stage');
+    },
+
+    clear() {
+        this.stage().replaceChildren();
+    },
+
+    reveal(templateId, delay) {
+        const show = () => {
+            const content = document.getElementById(templateId).content.cloneNode(true);
+            content.querySelectorAll('[data-count]').forEach(el => {
+                el.textContent = String(this.participants);
+            });
+            this.stage().appendChild(content);
+        };
+        if (delay) setTimeout(show, delay); else show();
+    },
+
+    // Pre-join -> optional lobby -> in call -> ended after `duration`
+    join() {
+        this.clear();
+        if (this.lobbyDelay > 0) this.reveal('lobby');
+        setTimeout(() => {
+            this.clear();
+            this.reveal('call');
+            this.reveal('ended', this.duration);
+        }, this.lobbyDelay);
+    },
+
+    onClick(selector, handler) {
+        document.addEventListener('click', event => {
+            if (event.target.closest(selector)) {
+                event.preventDefault();
+                handler();
+            }
+        });
+    },
+};
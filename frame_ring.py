@@ -0,0 +1,66 @@
+import threading
+import numpy as np
+
+
+class FrameRing:
+    """Preallocated ring holding the last few seconds of captured frames.
+
+    Storage is allocated once on the first push (when the frame shape is
+    known) and then reused, so memory does not grow with meeting length.
+    """
+
+    def __init__(self, history_seconds, fps):
+        self.capacity = max(1, int(round(history_seconds * fps)))
+        self._frames = None
+        self._timestamps = np.full(self.capacity, np.nan, dtype=np.float64)
+        self._count = 0  # Total frames pushed
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total_pushed(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return 0 if self._frames is None else self._frames.nbytes
+
+    def push(self, timestamp, frame):
+        """Copy a frame into the next slot, overwriting the oldest one."""
+        with self._lock:
+            if self._frames is None or self._frames.shape[1:] != frame.shape:
+                self._frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+                self._timestamps.fill(np.nan)
+                self._count = 0
+            slot = self._count % self.capacity
+            np.copyto(self._frames[slot], frame)
+            self._timestamps[slot] = timestamp
+            self._count += 1
+
+    def latest(self):
+        """Return (timestamp, frame copy) of the newest frame, or None."""
+        with self._lock:
+            if not self._count:
+                return None
+            slot = (self._count - 1) % self.capacity
+            return float(self._timestamps[slot]), self._frames[slot].copy()
+
+    def timestamps(self):
+        """Timestamps of the frames held, oldest first."""
+        with self._lock:
+            return self._timestamps[self._order()].copy()
+
+    def snapshot(self):
+        """Return (timestamps, frames) copies, oldest first."""
+        with self._lock:
+            if not self._count:
+                return np.empty(0), None
+            order = self._order()
+            return self._timestamps[order].copy(), self._frames[order]
+
+    def _order(self):
+        held = min(self._count, self.capacity)
+        start = self._count - held
+        return np.arange(start, self._count) % self.capacity
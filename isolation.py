@@ -0,0 +1,171 @@
+import os
+import time
+import uuid
+import select
+import shutil
+import logging
+import threading
+import subprocess
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IsolatedDisplay:
+    """Private Xvfb server so each recorder has its own screen to draw and grab."""
+
+    def __init__(self, width=1920, height=1080, depth=24):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.name = None
+        self.process = None
+
+    def start(self, timeout=10):
+        if not shutil.which('Xvfb'):
+            raise RuntimeError("Xvfb is not installed")
+        # -displayfd lets Xvfb pick a free display number and report it back
+        read_fd, write_fd = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                ['Xvfb', '-displayfd', str(write_fd),
+                 '-screen', '0', f'{self.width}x{self.height}x{self.depth}',
+                 '-nolisten', 'tcp'],
+                pass_fds=(write_fd,),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            os.close(write_fd)
+            write_fd = None
+            number = self._read_display_number(read_fd, timeout)
+        finally:
+            if write_fd is not None:
+                os.close(write_fd)
+            os.close(read_fd)
+        self.name = f':{number}'
+        logger.info(f"Started Xvfb on display {self.name} ({self.width}x{self.height})")
+        return self.name
+
+    def _read_display_number(self, read_fd, timeout):
+        deadline = time.monotonic() + timeout
+        data = b''
+        while not data.endswith(b'\n'):
+            remaining = deadline - time.monotonic()
+            ready, _, _ = select.select([read_fd], [], [], max(0, remaining))
+            chunk = os.read(read_fd, 16) if ready else b''
+            if not chunk:
+                self.stop()
+                raise RuntimeError("Xvfb did not report a display number")
+            data += chunk
+        return int(data.strip())
+
+    @property
+    def env(self):
+        return {'DISPLAY': self.name}
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+def ensure_pulseaudio():
+    """Start a per-user PulseAudio daemon if none is running (e.g. in containers)."""
+    if subprocess.run(['pactl', 'info'], stdout=subprocess.DEVNULL,
+                      stderr=subprocess.DEVNULL).returncode == 0:
+        return
+    subprocess.run(['pulseaudio', '--start', '--exit-idle-time=-1'], check=True)
+
+
+class IsolatedAudioSink:
+    """PulseAudio null sink whose monitor carries only this recorder's browser audio."""
+
+    def __init__(self, name=None):
+        self.sink_name = name or f'recorder_{uuid.uuid4().hex[:8]}'
+        self.module_id = None
+
+    def start(self):
+        if not shutil.which('pactl'):
+            raise RuntimeError("pactl is not installed")
+        ensure_pulseaudio()
+        result = subprocess.run(
+            ['pactl', 'load-module', 'module-null-sink',
+             f'sink_name={self.sink_name}',
+             f'sink_properties=device.description={self.sink_name}'],
+            check=True, capture_output=True, text=True
+        )
+        self.module_id = int(result.stdout.strip())
+        logger.info(f"Created PulseAudio sink {self.sink_name}")
+        return self.sink_name
+
+    @property
+    def monitor(self):
+        return f'{self.sink_name}.monitor'
+
+    @property
+    def env(self):
+        # Chrome's PulseAudio output honours PULSE_SINK
+        return {'PULSE_SINK': self.sink_name}
+
+    def stop(self):
+        if self.module_id is None:
+            return
+        subprocess.run(['pactl', 'unload-module', str(self.module_id)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.module_id = None
+
+
+class ParecAudioStream:
+    """Reads a PulseAudio source through parec with a sounddevice-style callback.
+
+    Exposes the parts of sd.InputStream the recorder uses (samplerate,
+    channels, start/stop/close), so it can replace the default input device.
+    """
+
+    def __init__(self, source, samplerate, channels, callback, blocksize=1024):
+        self.source = source
+        self.samplerate = float(samplerate)
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize
+        self.process = None
+        self._thread = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            ['parec', f'--device={self.source}', '--format=float32le',
+             f'--rate={int(self.samplerate)}', f'--channels={self.channels}',
+             '--latency-msec=50'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        buffer = bytearray(self.blocksize * self.channels * 4)
+        view = memoryview(buffer)
+        block = np.frombuffer(buffer, dtype=np.float32).reshape(self.blocksize, self.channels)
+        while True:
+            filled = 0
+            while filled < len(buffer):
+                read = self.process.stdout.readinto(view[filled:])
+                if not read:
+                    return
+                filled += read
+            self.callback(block, self.blocksize, None, None)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.process = None
@@ -0,0 +1,102 @@
+import time
+import logging
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+# Join states shared by every platform
+LANDING = 'landing'    # Meeting URL loaded, before the pre-join screen
+PRE_JOIN = 'pre-join'  # Device toggles and name field are usable
+LOBBY = 'lobby'        # Waiting room: asked to join, not admitted yet
+IN_CALL = 'in-call'    # Admitted; meeting UI is up
+
+
+def _report_missed(conditions):
+    """Tell the selector registry which expected elements never appeared."""
+    for condition in conditions:
+        missed = getattr(condition, 'missed', None)
+        if missed:
+            missed()
+
+
+class JoinTimeout(Exception):
+    """A join step did not reach its next state in time."""
+
+    def __init__(self, platform, state, waiting_for, timeout):
+        super().__init__(f"{platform} join stuck in state '{state}': "
+                         f"no {' or '.join(waiting_for)} after {timeout}s")
+        self.platform = platform
+        self.state = state
+        self.waiting_for = waiting_for
+
+
+class JoinStateMachine:
+    """Tracks a join through its states and waits on DOM conditions instead of sleeping.
+
+    advance() polls the conditions of the candidate next states and moves to
+    the first one that holds, so each step takes as long as the page does.
+    Every transition is timestamped relative to start() for join latency charts.
+    """
+
+    def __init__(self, driver, platform, poll_frequency=0.25):
+        self.driver = driver
+        self.platform = platform
+        self.poll_frequency = poll_frequency
+        self.state = None
+        self.transitions = []
+        self.failed = None
+        self._started = None
+
+    def start(self):
+        """Start the clock; the caller enters LANDING once the meeting URL has loaded."""
+        self._started = time.monotonic()
+
+    def enter(self, state):
+        elapsed = round(time.monotonic() - self._started, 3)
+        self.transitions.append({'state': state, 'at': elapsed})
+        logger.info(f"{self.platform} join: {self.state or 'start'} -> {state} ({elapsed:.1f}s)")
+        self.state = state
+
+    def advance(self, conditions, timeout):
+        """Wait for the first of {state: condition} to hold, enter that state and return its result."""
+        def first_match(driver):
+            for state, condition in conditions.items():
+                try:
+                    result = condition(driver)
+                except (NoSuchElementException, StaleElementReferenceException):
+                    continue
+                if result:
+                    return state, result
+            return False
+
+        try:
+            state, result = WebDriverWait(self.driver, timeout, self.poll_frequency).until(first_match)
+        except TimeoutException:
+            self.failed = self.state
+            _report_missed(conditions.values())
+            raise JoinTimeout(self.platform, self.state, list(conditions), timeout)
+        if state != self.state:
+            self.enter(state)
+        return result
+
+    def wait(self, condition, timeout, description):
+        """Wait for a condition within the current state (a step, not a transition)."""
+        try:
+            return WebDriverWait(self.driver, timeout, self.poll_frequency).until(condition)
+        except TimeoutException:
+            self.failed = self.state
+            _report_missed([condition])
+            raise JoinTimeout(self.platform, self.state, [description], timeout)
+
+    def summary(self):
+        return {
+            'platform': self.platform,
+            'transitions': self.transitions,
+            'failed_state': self.failed,
+            'total_seconds': self.transitions[-1]['at'] if self.transitions else None,
+        }
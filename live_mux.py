@@ -0,0 +1,217 @@
+import os
+import re
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from audio_sink import StreamingAudioWriter
+
+logger = logging.getLogger(__name__)
+
+
+SEGMENT_MANIFEST = 'segments.ffconcat'
+
+
+def live_mux_supported():
+    """Live muxing feeds audio through a named pipe, which needs a POSIX host."""
+    return hasattr(os, 'mkfifo') and shutil.which('ffmpeg') is not None
+
+
+_ffmpeg_version = None
+
+
+def ffmpeg_version():
+    """(major, minor) of the ffmpeg on PATH; None for builds without a release number."""
+    global _ffmpeg_version
+    if _ffmpeg_version is None:
+        try:
+            banner = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            banner = ''
+        match = re.search(r'ffmpeg version n?(\d+)\.(\d+)', banner)
+        _ffmpeg_version = (int(match.group(1)), int(match.group(2))) if match else ()
+    return _ffmpeg_version or None
+
+
+def vfr_output_args():
+    """Keep the input timestamps: -fps_mode needs ffmpeg 5.1, older builds only know -vsync."""
+    version = ffmpeg_version()
+    # Git snapshots report no version and are newer than any release
+    if version is None or version >= (5, 1):
+        return ['-fps_mode', 'vfr']
+    return ['-vsync', 'vfr']
+
+
+def segment_dir_for(output_path):
+    """Directory the segments of output_path are written to."""
+    return os.path.splitext(output_path)[0] + '_segments'
+
+
+def concat_segments(segment_dir, output_path):
+    """Join the completed segments listed in the manifest into one file, without re-encoding."""
+    manifest = os.path.join(segment_dir, SEGMENT_MANIFEST)
+    if not os.path.exists(manifest):
+        raise RuntimeError(f"No segment manifest in {segment_dir}")
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'concat', '-safe', '0', '-i', manifest,
+        '-c', 'copy', '-movflags', '+faststart',
+        output_path
+    ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    logger.info(f"Concatenated segments from {segment_dir} into {output_path}")
+
+
+class PipeAudioWriter(StreamingAudioWriter):
+    """Streams raw float32 PCM from the ring buffer into a FIFO."""
+
+    def _open(self):
+        # Opening a FIFO for writing blocks until the reader shows up, so it is
+        # done from the writer thread; samples wait in the ring meanwhile.
+        pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                # ENXIO until ffmpeg opens the read end
+                time.sleep(0.05)
+                continue
+            os.set_blocking(fd, True)
+            self._file = open(fd, 'wb')
+            break
+        super()._run()
+
+    def _write(self, block):
+        if self._file is None:
+            return
+        try:
+            self._file.write(block)
+        except BrokenPipeError:
+            logger.error("Audio pipe closed by the muxer, dropping remaining audio")
+            self._file = None
+
+    def _close_output(self):
+        if self._file:
+            try:
+                self._file.close()
+            except BrokenPipeError:
+                pass
+            self._file = None
+
+
+class LiveMuxer:
+    """One long-running ffmpeg process fed raw BGR frames and PCM samples.
+
+    Video goes over the encoder's stdin and audio over a named pipe, so the
+    final MP4 is complete as soon as both inputs are closed. With vfr=True
+    frames are stamped with their arrival time, so skipped unchanged frames
+    leave gaps instead of shortening the video.
+
+    With segment_seconds, ffmpeg writes self-contained MP4 segments and
+    appends each finished one to a manifest instead, so a crash loses at
+    most the segment in progress; close() joins them with a stream copy.
+    """
+
+    def __init__(self, output_path, fps, video_args=None, vfr=False, segment_seconds=None):
+        self.output_path = output_path
+        self.fps = fps
+        self.vfr = vfr
+        self.segment_seconds = segment_seconds
+        self.segment_dir = segment_dir_for(output_path) if segment_seconds else None
+        self.video_args = video_args or ['-c:v', 'libx264', '-preset', 'veryfast',
+                                         '-pix_fmt', 'yuv420p']
+        self.process = None
+        self.bytes_written = 0
+        self._pipe_dir = tempfile.mkdtemp(prefix='meeting_mux_')
+        self.audio_pipe = os.path.join(self._pipe_dir, 'audio.pcm')
+        os.mkfifo(self.audio_pipe)
+        self._stderr_thread = None
+
+    def start(self, width, height, samplerate, channels, video_offset=0.0):
+        """Launch ffmpeg once the frame size and audio format are known."""
+        video_input = [
+            '-thread_queue_size', '512',
+            '-itsoffset', f'{video_offset:.3f}',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-framerate', str(self.fps),
+        ]
+        if self.vfr:
+            video_input = ['-use_wallclock_as_timestamps', '1'] + video_input
+        command = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            *video_input,
+            '-i', 'pipe:0',
+            '-thread_queue_size', '512',
+            '-f', 'f32le', '-ar', str(int(samplerate)), '-ac', str(channels),
+            '-i', self.audio_pipe,
+            '-map', '0:v', '-map', '1:a',
+            *self.video_args,
+            *(vfr_output_args() if self.vfr else []),
+            '-c:a', 'aac', '-b:a', '128k',
+            *self._output_args()
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr_thread = threading.Thread(target=self._log_stderr, daemon=True)
+        self._stderr_thread.start()
+        logger.info(f"Live muxer started: {width}x{height} @ {self.fps} fps, "
+                    f"{int(samplerate)} Hz x {channels} -> {self.output_path}")
+
+    def _output_args(self):
+        if not self.segment_seconds:
+            return [self.output_path]
+        os.makedirs(self.segment_dir, exist_ok=True)
+        return [
+            # Keyframe at every boundary so each segment starts cleanly
+            '-force_key_frames', f'expr:gte(t,n_forced*{self.segment_seconds})',
+            '-f', 'segment', '-segment_time', str(self.segment_seconds),
+            '-segment_format', 'mp4', '-reset_timestamps', '1',
+            '-segment_list', os.path.join(self.segment_dir, SEGMENT_MANIFEST),
+            '-segment_list_type', 'ffconcat',
+            os.path.join(self.segment_dir, 'segment_%05d.mp4')
+        ]
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def write_video(self, frame):
+        self.process.stdin.write(frame)
+        self.bytes_written += frame.nbytes
+
+    def close(self, timeout=60, concat=True):
+        """Close the video input and wait for ffmpeg to finish the file.
+
+        The audio writer must be closed first so the FIFO reaches EOF.
+        With concat=False segments are left in place for a later join.
+        """
+        try:
+            if self.process:
+                try:
+                    self.process.stdin.close()
+                except BrokenPipeError:
+                    pass
+                returncode = self.process.wait(timeout=timeout)
+                if self._stderr_thread:
+                    self._stderr_thread.join(timeout=5)
+                if self.segment_seconds and concat:
+                    # Whatever segments were completed are still worth joining
+                    concat_segments(self.segment_dir, self.output_path)
+                if returncode != 0:
+                    raise RuntimeError(f"ffmpeg exited with code {returncode}")
+                if self.segment_seconds and concat:
+                    shutil.rmtree(self.segment_dir, ignore_errors=True)
+                logger.info(f"Live mux finished: {self.output_path}")
+        finally:
+            shutil.rmtree(self._pipe_dir, ignore_errors=True)
+
+    def kill(self):
+        if self.running:
+            self.process.kill()
+        shutil.rmtree(self._pipe_dir, ignore_errors=True)
+
+    def _log_stderr(self):
+        for line in self.process.stderr:
+            logger.warning(f"ffmpeg: {line.decode(errors='replace').rstrip()}")
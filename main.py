@@ -1,25 +1,40 @@
 import os
+import sys
 import cv2
+import json
 import time
 import random
 import logging
 import platform
-import pyautogui
 import threading
+import shutil
 import argparse
 import subprocess
-import numpy as np
-import soundfile as sf
 import sounddevice as sd
-from PIL import ImageGrab
-from selenium import webdriver
 # from moviepy import *
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
+from audio_sink import FFmpegAudioWriter, StreamingAudioWriter
+from frame_ring import FrameRing
+from live_mux import LiveMuxer, PipeAudioWriter, live_mux_supported, concat_segments
+from capture_pipeline import CapturePipeline, FrameChangeDetector, StageTimer, DUPLICATE, DROP_POLICIES
+from capture_backends import CAPTURE_BACKENDS, open_capture_backend
+from encoders import (ENCODER_BACKENDS, ENCODER_PROFILES, OpenCVEncoder, PyAVEncoder,
+                      calibrate_encoders, calibrated_encoder, create_encoder, pyav_available, x264_args)
+from isolation import IsolatedDisplay, IsolatedAudioSink, ParecAudioStream
+from synthetic_media import SyntheticAudioStream
+from page_audio import PageAudioTap, PageAudioStream
+from audio_activity import SilenceStopDetector, VoiceActivityDetector
+from page_monitor import PageEventMonitor
+from stage_region import stage_crop, letterbox
+from selector_registry import SelectorRegistry, default_registry
+from browser_pool import BrowserPool, launch_chrome
+from av_sync import AVSync
+from postprocess import PostProcessQueue, merge_audio_video
+from event_index import EventIndexWriter
+from quality_controller import QualityController, build_quality_ladder
+from metrics import MetricsServer, current_rss_bytes
+from join_flow import JoinStateMachine, LANDING, LOBBY, IN_CALL, PRE_JOIN
 
 if platform.system().lower() == "windows":
     import pygetwindow as gw
@@ -32,21 +47,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Which signals end a recording: the participant count, sustained audio silence, or a combination
+END_POLICIES = ('participants', 'audio', 'either', 'both')
+
 class ChromiumMeetingRecorder:
-    def __init__(self, meeting_url, save_path=None):
+    def __init__(self, meeting_url, save_path=None, audio_format='wav', frame_history_seconds=0,
+                 output_mode='classic', video_fps=15, drop_policy=DUPLICATE, capture_queue_size=4,
+                 capture_backend='auto', skip_static=False, isolate=False, browser_pool=None,
+                 audio_source='device', chrome_arguments=None, segment_seconds=10,
+                 encoder='auto', encoder_profile='balanced', adaptive_quality=False, min_fps=5,
+                 audio_only=False, audio_codec='opus', vad=None, vad_threshold_db=-50.0,
+                 max_silence=2.0, end_policy='participants', silence_timeout=120.0,
+                 silence_threshold_db=-70.0, postprocess_queue=None, selector_registry=None,
+                 page_audio_tracks=False, crop_stage=False):
+        self._created_at = time.monotonic()
+        self.timings = {}  # Seconds from creation to each milestone
         self.meeting_url = meeting_url
         self.meeting_type = self._identify_meeting_type()
         self.driver = None
+        self.browser_pool = browser_pool
+        # Finalization is handed to this queue when set, so the browser is released right away
+        self.postprocess_queue = postprocess_queue
+        self.postprocess_job = None
+        # Fallback chains for every page element, shared across meetings in this process
+        self.selectors = selector_registry or default_registry()
+        self.event_index = None  # Join/leave, speaker, screen share and frame times for seeking
+        self.vfr_frames_written = 0
+        self.browser_lease = None
+        self.chrome_arguments = chrome_arguments  # Extra Chrome switches, e.g. --headless=new
         self.is_recording = False
-        self.audio_start_time = 0
+        self.audio_start_time = 0  # time.monotonic(), the clock shared by audio and video
         self.video_start_time = 0
-        self.sync_lock = threading.Lock()
-        self.video_frame = []
-        self.audio_frame = []
+        self.av_sync = None
         self.audio_stream = None
+        self.audio_writer = None
         self.video_writer = None
+        self.muxer = None
         self.recording_thread = None
         self.monitoring_thread = None
+        self.page_monitor = None
+        self.capture_pipeline = None
+        self.capture_backend = None
+        self.capture_backend_name = capture_backend  # 'auto', 'xshm', 'pil', 'cdp' or 'synthetic'
+        # 'device', 'page' (remote WebRTC tracks tapped inside the page) or 'synthetic' (generated tone)
+        self.audio_source = audio_source
+        self.page_audio = None
+        self.page_audio_tracks = page_audio_tracks  # Also keep one Opus/WebM file per remote track
         script_dir = os.path.dirname(os.path.abspath(__file__))
         if save_path:
             self.save_dir = os.path.abspath(save_path)
@@ -55,10 +101,95 @@ class ChromiumMeetingRecorder:
         os.makedirs(self.save_dir, exist_ok=True)
         self.sample_rate = 44100
         self.channels = 2
-        self.video_fps = 15
+        self.audio_format = audio_format  # 'wav' or 'flac'
+        self.audio_buffer_seconds = 10  # Size of the in-memory audio ring
+        self.temp_audio_path = os.path.join(self.save_dir, f'temp_audio.{audio_format}')
+        self.temp_video_path = os.path.join(self.save_dir, 'temp_video.mp4')
+        self.video_fps = video_fps
+        self.drop_policy = drop_policy  # See capture_pipeline.DROP_POLICIES
+        self.capture_queue_size = capture_queue_size
+        # Step the frame rate down under load, within these bounds
+        self.adaptive_quality = adaptive_quality
+        self.min_fps = min_fps
+        self.quality_controller = None
+        # Capture only the meeting stage the page reports, letterboxed into a fixed output size
+        self.crop_stage = crop_stage
+        self.stage = None  # Latest stage box from the page
+        self.stage_crop = None  # The box in capture pixels, as applied to the backend
+        self.stage_output_size = None
+        self.stage_changes = 0
+        # Last few seconds of frames for sync checks and debugging; off by default, since at
+        # 1080p every second held costs ~90 MB per recorder plus a copy of each frame
+        self.video_frame = FrameRing(frame_history_seconds, self.video_fps) if frame_history_seconds > 0 else None
         self.stop_event = threading.Event()
+        # Stopping runs once; later callers wait for it instead of tearing down underneath it
+        self._stop_lock = threading.Lock()
+        self._stopping = False
+        self.finalized = threading.Event()
+        # 'classic' writes temp files and merges them at stop, 'live' muxes while recording,
+        # 'segmented' muxes into rolling segments that survive a crash
+        if output_mode in ('live', 'segmented') and not live_mux_supported():
+            logger.warning("Live muxing needs ffmpeg and named pipes, falling back to classic output")
+            output_mode = 'classic'
+        # Audio only: no screen capture, audio is encoded straight into the final file
+        self.audio_only = audio_only
+        if audio_only and output_mode != 'classic':
+            logger.warning(f"{output_mode} output muxes video; audio-only recordings ignore it")
+            output_mode = 'classic'
+        if audio_only and audio_codec == 'opus' and not shutil.which('ffmpeg'):
+            logger.warning("Opus encoding needs ffmpeg, writing FLAC instead")
+            audio_codec = 'flac'
+        self.audio_codec = audio_codec  # 'opus' or 'flac'
+        # Voice activity: 'mark' reports long silences, 'cut' also shortens them (audio only)
+        if vad == 'cut' and not audio_only:
+            logger.warning("Cutting silences would break A/V sync, only marking them")
+            vad = 'mark'
+        self.vad_mode = vad
+        self.vad_threshold_db = vad_threshold_db
+        self.max_silence = max_silence
+        self.vad = None
+        if end_policy not in END_POLICIES:
+            raise ValueError(f"Unknown end policy: {end_policy}")
+        self.end_policy = end_policy
+        self.silence_timeout = silence_timeout
+        self.silence_threshold_db = silence_threshold_db
+        self.silence_detector = None
+        self.output_mode = output_mode
+        self.segment_seconds = segment_seconds
+        # Skip unchanged frames and write variable frame rate video
+        if skip_static and output_mode == 'classic' and not pyav_available():
+            logger.warning("Static-frame skipping needs PyAV for timestamped output, disabling it")
+            skip_static = False
+        self.skip_static = skip_static
+        # A lower capture rate only saves encoding when frames are written with their own
+        # timestamps; constant frame rate output would repeat every missing frame
+        if adaptive_quality and output_mode == 'classic' and not pyav_available():
+            logger.warning("Adaptive quality needs PyAV for variable frame rate output, disabling it")
+            self.adaptive_quality = adaptive_quality = False
+        self.variable_frame_rate = skip_static or adaptive_quality
+        # Video encoder for classic output; 'auto' uses the last calibration result
+        self.encoder_profile = encoder_profile
+        if encoder == 'auto':
+            encoder = calibrated_encoder(encoder_profile, video_fps) or OpenCVEncoder.name
+        if not ENCODER_BACKENDS[encoder].available():
+            logger.warning(f"{encoder} encoder is not available, falling back to OpenCV")
+            encoder = OpenCVEncoder.name
+        if self.variable_frame_rate and not ENCODER_BACKENDS[encoder].variable_frame_rate:
+            # Skipped frames and frame rate steps only work with per-frame timestamps
+            encoder = PyAVEncoder.name
+        self.encoder_name = encoder
+        self.recording_metadata = {}
+        # Health counters exposed through metrics_snapshot()
+        self.audio_status_counts = {'input_overflow': 0, 'input_underflow': 0}
+        self.monitor_timer = StageTimer('monitor')  # Participant-monitor latency
+        # Own Xvfb display and PulseAudio sink so several recorders can share a host
+        self.isolate = isolate
+        self.display = None
+        self.audio_sink = None
+        self.screen_size = (1920, 1080)
         self.min_participants = 2  # Minimum participants to consider meeting active
         self.empty_meeting_timeout = 30  # Seconds to wait before stopping when empty
+        self.lobby_timeout = 600  # Seconds to wait for a host to admit us from the waiting room
 
     def _identify_meeting_type(self):
         """Identify meeting type from URL."""
@@ -104,172 +235,175 @@ class ChromiumMeetingRecorder:
     def setup_chromium_driver(self):
         """Configure Chrome to join meetings."""
         try:
-            chrome_options = ChromeOptions()
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument('--use-fake-device-for-media-stream')
-            chrome_options.add_argument('--use-fake-ui-for-media-stream')
-            chrome_options.add_argument('--disable-infobars')
-            chrome_options.add_argument('--disable-encryption')
-            chrome_options.add_argument('--disable-popup-blocking')
-            chrome_options.add_argument('--auto-accept-camera-capture')
-            chrome_options.add_argument('--auto-accept-microphone-capture')
-
-            if platform.system().lower() == "darwin":
-                chrome_options.add_argument('--start-maximized')
-
-            chrome_options.add_experimental_option('prefs', {
-                'webrtc.ip_handling_policy': 'default_public_interface_only',
-                'webrtc.use_legacy_tls_version': False,
-            })
-
-            # Fake video
-            fake_video = os.path.join(self.save_dir, "fake_video.y4m")
-            if not os.path.exists(fake_video):
-                with open(fake_video, 'wb') as f:
-                    f.write(b'YUV4MPEG2 W1280 H720 F30:1 Ip A0:0 C420jpeg XYSCSS=420JPEG\n')
-                    f.write(b'FRAME\n')
-                    f.write(b'\x80' * (1280 * 720 * 3 // 2))
-            chrome_options.add_argument(f'--use-file-for-fake-video-capture={fake_video}')
-
-            # Auto-download ChromeDriver
-            service = ChromeService(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.implicitly_wait(15)
+            if self.browser_pool:
+                # Pre-launched session: already configured and bound to its own display/sink
+                self.browser_lease = self.browser_pool.lease()
+                self.driver = self.browser_lease.driver
+                self.display = self.browser_lease.display
+                self.audio_sink = self.browser_lease.audio_sink
+            else:
+                if self.isolate:
+                    self._start_isolation()
+                self.driver = launch_chrome(self.display, self.audio_sink, self.screen_size,
+                                            self.chrome_arguments)
+            if self.audio_source == 'page':
+                # Has to be in place before the meeting page creates its peer connections
+                self.page_audio = PageAudioTap(self.driver, per_track=self.page_audio_tracks)
+                self.page_audio.install()
+            self._mark_timing('driver_ready')
 
         except Exception as e:
             logger.error(f"Chrome setup failed: {str(e)}")
             raise
 
+    def _mark_timing(self, name):
+        """Record seconds since the recorder was created, for time-to-first-frame tracking."""
+        if name not in self.timings:
+            self.timings[name] = round(time.monotonic() - self._created_at, 3)
+
+    def _start_isolation(self):
+        """Launch this recorder's private display and audio sink."""
+        self.display = IsolatedDisplay(*self.screen_size)
+        self.display.start()
+        self.audio_sink = IsolatedAudioSink()
+        try:
+            self.audio_sink.start()
+        except Exception:
+            self.display.stop()
+            raise
+
+    def _stop_isolation(self):
+        if self.audio_sink:
+            self.audio_sink.stop()
+            self.audio_sink = None
+        if self.display:
+            self.display.stop()
+            self.display = None
+
+    def _press_escape(self):
+        """Dismiss native browser dialogs on the display Chrome runs on."""
+        if self.display:
+            subprocess.run(['xdotool', 'key', 'Escape'], env=dict(os.environ, **self.display.env),
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return
+        try:
+            # Imported lazily: pyautogui needs a global display at import time
+            import pyautogui
+        except Exception as e:
+            # Headless Chrome has no native dialogs; Escape inside the page is enough
+            logger.debug(f"pyautogui unavailable ({str(e)}), sending Escape to the page")
+            ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+            return
+        pyautogui.press('esc')
+
     def join_meeting(self):
         """Join Google Meet, Zoom, or Teams."""
+        join = JoinStateMachine(self.driver, self.meeting_type)
         try:
             logger.info(f"Joining {self.meeting_type} meeting: {self.meeting_url}")
+            join.start()
             self.driver.get(self.meeting_url)
+            join.enter(LANDING)
             
             if self.meeting_type == 'google':
-                self._join_google_meet()
+                self._join_google_meet(join)
             elif self.meeting_type == 'zoom':
-                self._join_zoom_meeting()
+                self._join_zoom_meeting(join)
             elif self.meeting_type == 'teams':
-                self._join_teams_meeting()
+                self._join_teams_meeting(join)
                 
+            self._mark_timing('joined')
             logger.info("Meeting joined successfully")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to join meeting: {str(e)}")
+            join.failed = join.failed or join.state
+            logger.error(f"Failed to join meeting in state '{join.failed}': {str(e)}")
             return False
+        finally:
+            self.recording_metadata['join'] = join.summary()
+
+    def _wait_for_admission(self, join, lobby, in_call, timeout):
+        """After clicking join: wait for the call, allowing for a waiting room on the way."""
+        join.advance({LOBBY: lobby, IN_CALL: in_call}, timeout)
+        if join.state == LOBBY:
+            logger.info("Waiting in the lobby to be admitted")
+            join.advance({IN_CALL: in_call}, self.lobby_timeout)
 
-    def _join_google_meet(self):
+    def _join_google_meet(self, join):
         """Google Meet joining logic."""
         try:            
-            mic_button = WebDriverWait(self.driver, 2000).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, 
-                "div[aria-label='Turn off microphone'][role='button'], "  
-                "div[aria-label*='microphone'][role='button']"  
-            ))
-            )
+            mic_button = join.advance({PRE_JOIN: self.selectors.clickable('google', 'mic_button')}, 60)
             mic_button.click()
-            video_button = WebDriverWait(self.driver, 30).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, 
-                "div[aria-label='Turn off camera'], "
-                "div[aria-label='Turn off camera'][role='button']"
-								))
-            )
+            video_button = join.wait(self.selectors.clickable('google', 'camera_button'), 10, 'camera toggle')
             video_button.click()
-            name_input = WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[aria-label='Your name'], "
-                                                "input[placeholder='Your name']"))
-            )
+            name_input = join.wait(self.selectors.present('google', 'name_input'), 10, 'name field')
             name_input.send_keys(f"User{random.randint(1000, 9999)}")
             
-            join_button = WebDriverWait(self.driver, 30).until(
-                EC.element_to_be_clickable((By.XPATH,
-                "//*[contains(text(), 'Ask to join') and "\
-                "(self::button or self::span or self::div)]"
-            	))
-            )
+            join_button = join.wait(self.selectors.clickable('google', 'join_button'), 10, "'Ask to join' button")
             join_button.click()
-            time.sleep(10)
+
+            self._wait_for_admission(
+                join,
+                lobby=self.selectors.present('google', 'lobby'),
+                in_call=self.selectors.present('google', 'in_call'),
+                timeout=30
+            )
             
         except Exception as e:
             logger.error(f"Google Meet error: {str(e)}")
             raise
 
-    def _join_zoom_meeting(self):
+    def _join_zoom_meeting(self, join):
         try:
             try:
-                pyautogui.press('esc')
-                time.sleep(1)                
+                self._press_escape()
             except Exception as e:
                 logger.error(f"ESC key press error: {str(e)}")
 
-            launch_button = WebDriverWait(self.driver, 30).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "div.mbTuDeF1[role='button']"))
-            )
+            launch_button = join.wait(self.selectors.clickable('zoom', 'launch_button'),
+                                      30, "'Launch Meeting' button")
             launch_button.click()
             logger.info("Clicked 'Launch Meeting' button")
-            time.sleep(2)
 
+            join_browser_link = join.wait(self.selectors.clickable('zoom', 'browser_link'),
+                                          10, "'Join from your browser' link")
+            # The link shows up with the open-app prompt, which can be dismissed now
             try:
-                pyautogui.press('esc')
-                time.sleep(1)
+                self._press_escape()
             except Exception as e:
                 logger.error(f"ESC key press error: {str(e)}")
-
-            join_browser_link = WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "a[web_client][role='button']"))
-            )
             join_browser_link.click()            
             logger.info("Clicked 'Join from your browser' link")
             
-            iframe = WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.ID, "webclient"))
-            )
-            self.driver.switch_to.frame(iframe)
-            time.sleep(20)
+            join.wait(self.selectors.frame('zoom', 'client_frame'), 30, 'web client frame')
             
-            mic_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "preview-audio-control-button"))
-            )
+            mic_button = join.advance({PRE_JOIN: self.selectors.clickable('zoom', 'mic_button')}, 60)
             mic_button.click()
-            camera_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "preview-video-control-button"))
-            )
+            camera_button = join.wait(self.selectors.clickable('zoom', 'camera_button'), 10, 'camera toggle')
             camera_button.click()
             logger.info("Turned off camera and microphone")
 
-            name_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "input-for-name"))
-            )
+            name_input = join.wait(self.selectors.present('zoom', 'name_input'), 10, 'name field')
             
             random_name = f"User{random.randint(1000, 9999)}"
             name_input.clear()
             name_input.send_keys(random_name)
             logger.info(f"Entered name: {random_name}")
-            time.sleep(1)
 
-            join_button = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button.preview-join-button"))
-            )
+            join_button = join.wait(self.selectors.clickable('zoom', 'join_button'), 15, "'Join' button")
             join_button.click()
             logger.info("Clicked 'Join' button")
 
-            self.driver.switch_to.default_content()
-            pyautogui.press('esc')
             logger.info("Waiting for meeting to load...")
-            
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.XPATH,
-                    "//div[contains(@class, 'pwa') or contains(@id, 'pwa-client')]"))
+            self._wait_for_admission(
+                join,
+                lobby=self.selectors.present('zoom', 'lobby'),
+                in_call=self.selectors.present('zoom', 'in_call'),
+                timeout=30
             )
-            time.sleep(5)
-            pyautogui.press('esc')
-            time.sleep(10)
+            self.driver.switch_to.default_content()
+            self._press_escape()
             logger.info("Zoom meeting joined successfully")
             return True
 
@@ -277,60 +411,44 @@ class ChromiumMeetingRecorder:
             logger.error(f"Zoom meeting join failed: {str(e)}")
             self._take_screenshot("zoom_join_error")
             raise
+        finally:
+            self.driver.switch_to.default_content()
 
-    def _join_teams_meeting(self):
+    def _join_teams_meeting(self, join):
         try:
             try:
-                pyautogui.press('esc')
-                time.sleep(1)                
+                self._press_escape()
             except Exception as e:
                 logger.error(f"JavaScript execution error: {str(e)}")
 
-            continue_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, 
-                    "//button[contains(@data-tid, 'joinOnWeb') or "
-                    "contains(@aria-label, 'Join meeting from this browser')]"))
-            )
+            continue_button = join.wait(self.selectors.clickable('teams', 'continue_button'),
+                                        20, "'Continue on this browser' button")
             continue_button.click()
             logger.info("Clicked 'Continue on this browser' button")
-            time.sleep(50)
 
-            pyautogui.press('esc')
-            mic_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@data-tid='toggle-mute']"))
-            )
+            self._press_escape()
+            mic_button = join.advance({PRE_JOIN: self.selectors.clickable('teams', 'mic_button')}, 90)
             mic_button.click()
             logger.info("Toggled microphone")
 
-            video_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@data-tid='toggle-video']"))
-            )
+            video_button = join.wait(self.selectors.clickable('teams', 'camera_button'), 20, 'camera toggle')
             video_button.click()
             logger.info("Toggled video")
-            name_input = WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.XPATH,
-                    "//input[@data-tid='prejoin-display-name-input' or "
-                    "@placeholder='Type your name']"))
-            )
+            name_input = join.wait(self.selectors.present('teams', 'name_input'), 15, 'name field')
             random_name = f"User{random.randint(1000, 9999)}"
             name_input.clear()
             name_input.send_keys(random_name)
             logger.info(f"Entered name: {random_name}")
-            time.sleep(1)
             
-            join_button = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH,
-                    "//button[@data-tid='prejoin-join-button' or "
-                    "@aria-label='Join now' or "
-                    "contains(text(), 'Join now')]"))
-            )
+            join_button = join.wait(self.selectors.clickable('teams', 'join_button'), 15, "'Join now' button")
             join_button.click()
             logger.info("Clicked 'Join now' button")
 
-            WebDriverWait(self.driver, 60).until(
-                EC.presence_of_element_located((By.XPATH,
-                    "//span[contains(@data-tid, 'call-duration') or "
-                    "contains(@class, 'meeting-container')]"))
+            self._wait_for_admission(
+                join,
+                lobby=self.selectors.present('teams', 'lobby'),
+                in_call=self.selectors.present('teams', 'in_call'),
+                timeout=60
             )
             logger.info("Teams meeting joined successfully")
             return True
@@ -342,19 +460,64 @@ class ChromiumMeetingRecorder:
 
     def _monitor_meeting_status(self):  
         logger.info("Starting real-time meeting monitor")  
+
+        # Prefer changes pushed by an in-page observer; poll the DOM only if it cannot be installed
+        event_driven = True
+        self.page_monitor = PageEventMonitor(self.driver, self.meeting_type, registry=self.selectors)
+        try:
+            self.page_monitor.install()
+        except Exception as e:
+            logger.warning(f"Page observer unavailable, falling back to polling: {str(e)}")
+            event_driven = False
         
         # Real-time tracking variables  
         last_participant_count = 1  
+        current_count = 1
         empty_start_time = None  
         
         while self.is_recording and not self.stop_event.is_set():  
             try:  
-                # Immediate, lightweight participant count retrieval  
-                current_count = self._get_participant_count()  
+                if event_driven:
+                    # Returns as soon as the page reports a change, or after a short timeout
+                    for event in self.page_monitor.wait_events():
+                        # Delay from the page noticing the change to us handling it
+                        self.monitor_timer.record(max(0.0, time.time() - event['time'] / 1000))
+                        self._index_page_event(event)
+                        if event['type'] == 'participants':
+                            current_count = event['value']
+                        elif event['type'] in ('joined', 'left'):
+                            logger.info(f"Participant {event['type']}: {event['name']}")
+                        elif event['type'] == 'share':
+                            logger.info(f"Screen share {'started' if event['value'] else 'stopped'}")
+                        elif event['type'] == 'stage' and self.crop_stage:
+                            self._apply_stage(event['value'])
+                        elif event['type'] == 'ended':
+                            logger.info(f"Meeting ended: {event['reason']}. Stopping recording.")
+                            self.stop_recording()
+                            return
+                else:
+                    # Immediate, lightweight participant count retrieval  
+                    poll_started = time.perf_counter()
+                    state = self._read_page_state()
+                    current_count = state['participants']
+                    self.monitor_timer.record(time.perf_counter() - poll_started)
+                    if state['ended']:
+                        logger.info(f"Meeting ended: {state['ended']}. Stopping recording.")
+                        self.stop_recording()
+                        return
+                    if self.crop_stage:
+                        self._apply_stage(state['stage'])
+                    if current_count != last_participant_count:
+                        self._index_page_event({'type': 'participants', 'value': current_count,
+                                                'time': time.time() * 1000})
                 current_time = time.time()  
+                if current_count is None and self.end_policy == 'participants':
+                    # An unreadable counter counts as 1 when it is the only signal
+                    current_count = 1
                 
                 # Real-time state machine for meeting status  
-                if current_count < self.min_participants:  
+                participants_ended = False
+                if current_count is not None and current_count < self.min_participants:  
                     if empty_start_time is None:  
                         # First detection of low participant count  
                         empty_start_time = current_time  
@@ -362,20 +525,26 @@ class ChromiumMeetingRecorder:
                     
                     # Check if meeting has been empty beyond timeout  
                     elif (current_time - empty_start_time) > self.empty_meeting_timeout:  
-                        logger.info("Meeting consistently empty. Stopping recording.")  
-                        self.stop_recording()  
-                        break  
+                        participants_ended = True
                 else:  
                     # Reset empty tracking if participants return  
                     empty_start_time = None  
+
+                audio_ended = self.silence_detector is not None and self.silence_detector.triggered
+                reason = self._end_reason(participants_ended, audio_ended, current_count is None)
+                if reason:
+                    logger.info(f"Meeting over ({reason}). Stopping recording.")
+                    self.recording_metadata['end_reason'] = reason
+                    self.stop_recording()
+                    break
                 
                 # Real-time participant count change tracking  
                 if current_count != last_participant_count:  
                     logger.info(f"Participants changed: {last_participant_count} → {current_count}")  
                     last_participant_count = current_count  
                 
-                # Lightweight, rapid checking  
-                time.sleep(1)  # Reduced from 5 to 1 second for real-time responsiveness  
+                if not event_driven:
+                    time.sleep(1)
             
             except Exception as e:  
                 logger.error(f"Real-time monitoring interruption: {e}")  
@@ -383,6 +552,35 @@ class ChromiumMeetingRecorder:
         
         logger.info("Real-time meeting monitor completed")  
 
+    def _end_reason(self, participants_ended, audio_ended, count_unknown):
+        """Why the recording should stop under the end policy, or None to keep going.
+
+        With 'both', an unreadable participant count leaves the decision to
+        the audio, so a broken selector neither stops nor pins the recording.
+        """
+        empty = 'meeting consistently empty'
+        silent = f'no audio for {self.silence_timeout:.0f}s'
+        if self.end_policy == 'participants':
+            return empty if participants_ended else None
+        if self.end_policy == 'audio':
+            return silent if audio_ended else None
+        if self.end_policy == 'either':
+            if participants_ended:
+                return empty
+            return silent if audio_ended else None
+        if audio_ended and (participants_ended or count_unknown):
+            return f'{empty}, {silent}' if participants_ended else f'participant count unknown, {silent}'
+        return None
+
+    def _read_page_state(self):
+        """Monitored page state in one round trip; falls back to the per-platform lookups."""
+        try:
+            return self.page_monitor.read_state()
+        except Exception as e:
+            logger.warning(f"Page state query failed, using element lookups: {str(e)}")
+            return {'participants': self._get_participant_count(), 'ended': None,
+                    'waiting': False, 'share': False, 'speaker': None, 'stage': self.stage}
+
     def _get_participant_count(self):
         """Get current number of participants based on meeting type."""
         try:
@@ -392,117 +590,125 @@ class ChromiumMeetingRecorder:
                 return self._get_zoom_participants()
             elif self.meeting_type == 'teams':
                 return self._get_teams_participants()
-            return 1  # Default if detection fails
+            return None  # Unknown platform
         except Exception as e:
             logger.warning(f"Failed to get participant count: {str(e)}")
-            return 1  # Assume meeting is still active if detection fails
+            return None  # Unknown; the end policy decides what that means
 
     def _get_google_participants(self):
         """Get participant count for Google Meet."""
         try:
-            pyautogui.press('esc')
-            participant_count = WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.XPATH,
-                    "//div[contains(@class, 'uGOf1d')] | "
-                    "//div[contains(@class, 'gFyGKf')]//div[contains(@class, 'uGOf1d')]"
-                    ))
-            )
+            self._press_escape()
+            participant_count = self.selectors.wait(
+                self.driver, self.selectors.present('google', 'participant_count'), 30)
             count_text = participant_count.text.strip()
             if count_text.isdigit():
                 return int(count_text)
         except:
             logger.warning("Google Meet participant count detection failed")
-            return 1
+        return None
 
     def _get_zoom_participants(self): 
         """Get participant count for Zoom."""
         try:
-            iframe = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "iframe.pwa-webclient__iframe#webclient"))
-            )
-            self.driver.switch_to.frame(iframe)
-            participant_count = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "span.footer-button__number-counter > span"))
-            )
+            self.selectors.wait(self.driver, self.selectors.frame('zoom', 'client_frame'), 10)
+            participant_count = self.selectors.wait(
+                self.driver, self.selectors.present('zoom', 'participant_count'), 10)
             count_text = participant_count.get_attribute("textContent").strip()
             if count_text.isdigit():
                 return int(count_text)
         except:
             logger.warning("Zoom participant count detection failed")
-            return 1
         finally:
             self.driver.switch_to.default_content()
+        return None
 
     def _get_teams_participants(self):
         try:
-            participant_count = WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.XPATH, "//span[@data-tid='roster-button-tile']"))
-            )
+            participant_count = self.selectors.wait(
+                self.driver, self.selectors.present('teams', 'participant_count'), 15)
             count_text = participant_count.text
             return int(count_text)
         except:
             logger.warning("Teams participant count detection failed")
-            return 1
+            return None
 
     def _start_audio_recording(self):
         """Start recording system audio with proper device selection and error handling."""
         try:
-            # Get and verify audio devices
-            devices = sd.query_devices()
-            if not devices:
-                raise RuntimeError("No audio devices found on system")
-
-            # Find default input device if no explicit selection
-            default_input = sd.default.device[0]
-            if default_input == -1:
-                # No default input, try to find any input device
-                input_devices = [i for i, d in enumerate(devices) 
-                            if d['max_input_channels'] > 0]
-                if not input_devices:
-                    raise RuntimeError("No audio input devices available")
-                device_index = input_devices[0]
-            else:
-                device_index = default_input
-
-            # Verify the selected device
-            device_info = sd.query_devices(device_index)
-            logger.info(f"Using audio device: {device_info['name']} (Index: {device_index})")
-            logger.info(f"Device specs: {device_info['max_input_channels']} channels, "
-                    f"{device_info['default_samplerate']} Hz")
-
-            # Adjust our recording parameters to match device capabilities
-            actual_channels = min(self.channels, device_info['max_input_channels'])
-            actual_samplerate = float(device_info['default_samplerate'])
-
-            # Audio buffer setup
-            self.audio_frames = []
-            self.audio_start_time = time.time()
+            self.audio_start_time = time.monotonic()
             
             def audio_callback(indata, frames, time_info, status):
                 """Callback function for audio stream."""
                 if status:
                     logger.warning(f"Audio stream warning: {status}")
-                timestamp = time.time() - self.audio_start_time
-                with self.sync_lock:
-                    self.audio_frames.append((timestamp, indata.copy()))
-
-            # Start the stream with error handling
-            self.audio_stream = sd.InputStream(
-                device=device_index,
-                channels=actual_channels,
-                samplerate=actual_samplerate,
-                callback=audio_callback,
-                dtype='float32',
-                blocksize=1024,  # Appropriate buffer size
-                latency='high'  # Better for system audio capture
+                    if status.input_overflow:
+                        self.audio_status_counts['input_overflow'] += 1
+                    if status.input_underflow:
+                        self.audio_status_counts['input_underflow'] += 1
+                if self.silence_detector:
+                    self.silence_detector.process(indata)
+                if self.vad:
+                    indata = self.vad.process(indata)
+                    if indata is None:
+                        return
+                # Only samples that made it into the file count towards the audio timeline
+                self.av_sync.audio_block(self.audio_writer.push(indata))
+
+            if self.page_audio:
+                # Decoded remote tracks, independent of any system audio device or sink
+                self.audio_stream = PageAudioStream(self.page_audio, self.sample_rate, self.channels,
+                                                    audio_callback)
+                track_dir = None
+                if self.page_audio_tracks:
+                    track_dir = os.path.splitext(self.output_file)[0] + '_tracks'
+                self.page_audio.start(track_dir)
+            elif self.audio_sink:
+                # Only this recorder's Chrome plays into the sink, so its monitor is the meeting audio
+                logger.info(f"Using audio source: {self.audio_sink.monitor}")
+                self.audio_stream = ParecAudioStream(
+                    self.audio_sink.monitor,
+                    self.sample_rate,
+                    self.channels,
+                    audio_callback
+                )
+            elif self.audio_source == 'synthetic':
+                self.audio_stream = SyntheticAudioStream(self.sample_rate, self.channels, audio_callback)
+            else:
+                self.audio_stream = self._open_input_device(audio_callback)
+
+            # Audio sample count is the master timeline video frames are placed on
+            self.av_sync = AVSync(self.audio_stream.samplerate, self.video_fps)
+
+            if self.end_policy != 'participants':
+                self.silence_detector = SilenceStopDetector(self.audio_stream.samplerate, self.silence_timeout,
+                                                            self.silence_threshold_db)
+            if self.vad_mode:
+                self.vad = VoiceActivityDetector(self.audio_stream.samplerate, self.vad_mode,
+                                                 self.vad_threshold_db, self.max_silence)
+
+            # Stream samples straight to disk (or the muxer) at the rate the device actually runs at
+            if self.audio_only:
+                # The final file itself; FLAC through soundfile, Opus through ffmpeg
+                writer_class = FFmpegAudioWriter if self.audio_codec == 'opus' else StreamingAudioWriter
+                audio_path = self.output_file
+            else:
+                writer_class = PipeAudioWriter if self.muxer else StreamingAudioWriter
+                audio_path = self.muxer.audio_pipe if self.muxer else self.temp_audio_path
+            self.audio_writer = writer_class(
+                audio_path,
+                self.audio_stream.samplerate,
+                self.audio_stream.channels,
+                buffer_seconds=self.audio_buffer_seconds
             )
+            self.audio_writer.start()
             
             self.audio_stream.start()
             logger.info("Audio recording started successfully")
             
             # Test if we're actually getting data
             time.sleep(0.5)  # Wait briefly for callback to trigger
-            if not self.audio_frames:
+            if not self.audio_writer.frames_received:
                 self.audio_stream.stop()
                 raise RuntimeError("Audio callback not receiving any data")
 
@@ -510,81 +716,259 @@ class ChromiumMeetingRecorder:
             logger.error(f"Failed to start audio recording: {str(e)}")
             if hasattr(self, 'audio_stream') and self.audio_stream:
                 self.audio_stream.close()
+            if self.audio_writer:
+                self.audio_writer.close()
             raise
 
+    def _resolve_capture_region(self):
+        """Screen rectangle (left, top, width, height) of the meeting window, or None for the whole screen."""
+        system = platform.system().lower()
+        if system == "windows":
+            chrome_windows = [w for w in gw.getAllWindows()
+                              if 'google' in w.title.lower() or 'meet' in w.title.lower() or 'app.zoom.us' in w.title.lower()]
+            if not chrome_windows:
+                raise Exception("No matching chrome windows found")
+            chrome_window = chrome_windows[0]
+            if not chrome_window.isActive:
+                chrome_window.activate()
+                chrome_window.restore()
+            left, top = chrome_window.left, chrome_window.top
+            width, height = chrome_window.width, chrome_window.height
+
+        elif system == "darwin":
+            chrome_windows = self._get_mac_windows()
+            if not chrome_windows:
+                raise Exception("No matching chrome windows found")
+            window_info = chrome_windows[0]
+            bounds = window_info.get('kCGWindowBounds', {})
+            width = int(bounds.get('Width', 1680))
+            height = int(bounds.get('Height', 1050))
+            left = int(bounds.get('X', 20))
+            top = int(bounds.get('Y', 20))
+
+        else:
+            # Linux/Xvfb: the browser is the only thing on the display
+            return None
+
+        if width <= 500 and height <= 500:
+            width = 960
+            height = 1036
+        # H.264 with yuv420p needs even dimensions
+        return left, top, width - width % 2, height - height % 2
+
+    def _open_input_device(self, callback):
+        """Open the default (or first available) input device with sounddevice."""
+        # Get and verify audio devices
+        devices = sd.query_devices()
+        if not devices:
+            raise RuntimeError("No audio devices found on system")
+
+        # Find default input device if no explicit selection
+        default_input = sd.default.device[0]
+        if default_input == -1:
+            # No default input, try to find any input device
+            input_devices = [i for i, d in enumerate(devices) 
+                        if d['max_input_channels'] > 0]
+            if not input_devices:
+                raise RuntimeError("No audio input devices available")
+            device_index = input_devices[0]
+        else:
+            device_index = default_input
+
+        # Verify the selected device
+        device_info = sd.query_devices(device_index)
+        logger.info(f"Using audio device: {device_info['name']} (Index: {device_index})")
+        logger.info(f"Device specs: {device_info['max_input_channels']} channels, "
+                f"{device_info['default_samplerate']} Hz")
+
+        # Adjust our recording parameters to match device capabilities
+        actual_channels = min(self.channels, device_info['max_input_channels'])
+        actual_samplerate = float(device_info['default_samplerate'])
+
+        return sd.InputStream(
+            device=device_index,
+            channels=actual_channels,
+            samplerate=actual_samplerate,
+            callback=callback,
+            dtype='float32',
+            blocksize=1024,  # Appropriate buffer size
+            latency='high'  # Better for system audio capture
+        )
+
     def _capture_video(self):
-        self.video_start_time = time.time()
-        interval = 1.0 / self.video_fps
-        try:            
-            system = platform.system().lower()
-            if system == "windows": 
-               chrome_windows = [w for w in gw.getAllTitles() 
-                            if 'google' in w.title.lower() or 'meet' in w.title.lower() or 'app.zoom.us' in w.title.lower()]
-               chrome_window = chrome_windows[0]
-               if not chrome_window.isActive:
-                   chrome_window.activate()
-                   chrome_window.restore()
-                         
-            elif system == "darwin":
-               chrome_windows = self._get_mac_windows()
-               if not chrome_windows:
-                   raise Exception("No matching chrome windows found")
-               window_info = chrome_windows[0]
-               bounds = window_info.get('kCGWindowBounds', {})
-               width = int(bounds.get('width', 1680))
-               height = int(bounds.get('Height', 1050))
-               left = int(bounds.get('X', 20))
-               top = int(bounds.get('Y', 20))
-            
-            if width <= 500 and height <= 500:
-                width = 960
-                height = 1036
-            # Set up video writer
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            temp_video_path = os.path.join(self.save_dir, 'temp_video.mp4')
-
-            self.video_writer = cv2.VideoWriter(
-                temp_video_path,
-                fourcc,
-                self.video_fps,
-                (width, height)
+        self.video_start_time = time.monotonic()
+        try:
+            if self.capture_backend_name == 'synthetic':
+                region = (0, 0) + self.screen_size
+            elif self.capture_backend_name == 'cdp':
+                # Chrome sends the page itself; no window to locate
+                region = None
+            else:
+                region = self._resolve_capture_region()
+            # Every raw frame that can sit in the convert queue needs its own buffer
+            self.capture_backend, (width, height) = open_capture_backend(
+                self.capture_backend_name, region,
+                buffers=self.capture_queue_size + 2,
+                display=self.display.name if self.display else None,
+                driver=self.driver
             )
-            next_frame_time = time.time()
-            while self.is_recording and not self.stop_event.is_set():
-                now = time.time()
-                if now >= next_frame_time:
-                    try:
-                        # Capture window region
-                        img = ImageGrab.grab(bbox=(
-                            chrome_window.left,
-                            chrome_window.top,
-                            chrome_window.left + width,
-                            chrome_window.top + height
-                        ))                    
-                    except Exception as e:
-                        img = ImageGrab.grab()
-                    frame = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-
-                    if frame is None or frame.size == 0:
-                        logger.warning("Empty frame captured, skipping")
-                        continue
-                        
-                    if frame.shape[0] != height or frame.shape[1] != width:
+            backend = self.capture_backend
+            width, height = width - width % 2, height - height % 2
+            if self.crop_stage:
+                crop = self._apply_stage(self.stage)
+                if crop:
+                    # The first stage box fixes the output size; later layouts are letterboxed into it
+                    width, height = crop[2], crop[3]
+                else:
+                    logger.warning("Meeting stage not found, capturing the whole region until it appears")
+                self.stage_output_size = (width, height)
+
+            if self.muxer:
+                # Single-pass output: frames go straight into the muxing encoder
+                self.muxer.start(
+                    width, height,
+                    self.audio_writer.samplerate,
+                    self.audio_writer.channels,
+                    video_offset=self.av_sync.start_video(time.monotonic())
+                )
+                if self.variable_frame_rate:
+                    # ffmpeg stamps frames with their arrival time
+                    def write_frame(timestamp, frame):
+                        self.muxer.write_video(frame)
+                        self._index_frame(timestamp)
+                else:
+                    def write_frame(timestamp, frame):
+                        repeats = self.av_sync.cfr_repeats(timestamp)
+                        for _ in range(repeats):
+                            self.muxer.write_video(frame)
+                        self._index_frame(timestamp, repeats)
+            else:
+                self.video_writer = create_encoder(self.encoder_name, self.temp_video_path, width, height,
+                                                   self.video_fps, self.encoder_profile)
+                logger.info(f"Video encoder: {self.encoder_name} ({self.encoder_profile})")
+                if self.video_writer.variable_frame_rate:
+                    # Variable frame rate: every written frame carries its place on the audio timeline
+                    def write_frame(timestamp, frame):
+                        self.video_writer.write(frame, self.av_sync.video_time(timestamp))
+                        self._index_frame(timestamp)
+                else:
+                    def write_frame(timestamp, frame):
+                        # Repeat or skip frames to stay within a frame of the audio timeline
+                        repeats = self.av_sync.cfr_repeats(timestamp)
+                        for _ in range(repeats):
+                            self.video_writer.write(frame)
+                        self._index_frame(timestamp, repeats)
+
+            def convert(raw):
+                frame = backend.convert(raw)
+                if frame is None or frame.size == 0:
+                    logger.warning("Empty frame captured, skipping")
+                    return None
+                if frame.shape[0] != height or frame.shape[1] != width:
+                    if self.crop_stage:
+                        frame = letterbox(frame, width, height)
+                    else:
                         frame = cv2.resize(frame, (width, height))
-                        
+                return frame
+
+            def encode(timestamp, frame):
+                if self.video_frame is not None:
+                    self.video_frame.push(timestamp - self.video_start_time, frame)
+                write_frame(timestamp, frame)
+                if 'first_frame' not in self.timings:
+                    self._mark_timing('first_frame')
+                    logger.info(f"Time to first frame: {self.timings['first_frame']:.1f}s ({self.timings})")
 
-                    with self.sync_lock:
-                        self.video_frame.append((now - self.video_start_time, frame))
-                    self.video_writer.write(frame)
-                    next_frame_time += interval
-                time.sleep(0.001)                    
+            # Grab, convert and encode run on their own threads so a slow
+            # encoder no longer pushes the grab schedule back
+            self.capture_pipeline = CapturePipeline(
+                backend.grab, convert, encode, self.video_fps,
+                queue_size=self.capture_queue_size,
+                drop_policy=self.drop_policy,
+                change_detector=FrameChangeDetector() if self.skip_static else None
+            )
+            if self.adaptive_quality:
+                self.quality_controller = QualityController(
+                    self.capture_pipeline,
+                    build_quality_ladder(self.video_fps, self.min_fps),
+                    audio_writer=self.audio_writer
+                )
+                self.quality_controller.start()
+            try:
+                self.capture_pipeline.run(self.stop_event)
+            finally:
+                if self.quality_controller:
+                    self.quality_controller.stop()
+                    self.recording_metadata['quality'] = {
+                        'ladder': self.quality_controller.ladder,
+                        'events': self.quality_controller.events,
+                    }
+            stats = self.capture_stats()
+            logger.info(f"Capture stats: {stats}")
+            if self.skip_static:
+                logger.info(f"Static-frame skip ratio: {stats['skip_ratio']:.1%} "
+                            f"({stats['frames_unchanged']} of {stats['frames_grabbed']} frames)")
         except Exception as e:
             logger.error(f"Video capture failed: {str(e)}")
             raise
         finally:
             if hasattr(self, 'video_writer') and self.video_writer:
                 self.video_writer.release()
+            if self.capture_backend:
+                self.capture_backend.close()
     
+    def capture_stats(self):
+        """Per-stage timing and frame counters of the running capture pipeline."""
+        if not self.capture_pipeline:
+            return {}
+        return self.capture_pipeline.stats()
+
+    def metrics_snapshot(self):
+        """Live health metrics: capture rate and latency, audio buffering, memory and output size."""
+        capture = self.capture_stats()
+        capture.pop('stages', None)  # Exported as histograms below
+        audio = {
+            'callback_overflows': self.audio_status_counts['input_overflow'],
+            'callback_underflows': self.audio_status_counts['input_underflow'],
+        }
+        writer = self.audio_writer
+        if writer:
+            audio.update({
+                'frames_received': writer.frames_received,
+                'frames_written': writer.frames_written,
+                'ring_overflow_frames': writer.overflow_frames,
+                'queue_frames': writer.ring.available(),
+                'queue_capacity_frames': writer.ring.capacity,
+            })
+        histograms = {'monitor_latency': self.monitor_timer.histogram()}
+        if self.capture_pipeline:
+            for name, timer in self.capture_pipeline.timers.items():
+                histograms[f'{name}_latency'] = timer.histogram()
+        if self.quality_controller:
+            capture['quality_level'] = self.quality_controller.level
+            capture['current_fps'] = self.quality_controller.fps
+        return {
+            'recording': self.is_recording,
+            'uptime_seconds': round(time.monotonic() - self._created_at, 1),
+            'capture': capture,
+            'audio': audio,
+            'monitor': self.monitor_timer.snapshot(),
+            'process': {
+                'rss_bytes': current_rss_bytes(),
+                'bytes_written': self._bytes_written(),
+            },
+            'histograms': histograms,
+        }
+
+    def _bytes_written(self):
+        if self.muxer:
+            return self.muxer.bytes_written
+        total = 0
+        for path in (self.temp_video_path, self.temp_audio_path):
+            if path and self.is_recording and os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
     def _get_mac_windows(self):
         window_list = []
         windows = CGWindowListCopyWindowInfo(kCGWindowListOptionAll, kCGNullWindowID)        
@@ -604,34 +988,22 @@ class ChromiumMeetingRecorder:
         """Combine audio (WAV) + video (MP4) into one file."""
         try:
             # The following code snippet used the ffmpeg to merge the video and audio
-            temp_audio = os.path.join(self.save_dir, 'temp_audio.wav')
-            temp_video = os.path.join(self.save_dir, 'temp_video.mp4')
+            temp_audio = self.temp_audio_path
+            temp_video = self.temp_video_path
             logger.info(f"temp audio and video files exist: {temp_audio} and {temp_video}")
-            audio_data = np.concatenate([af[1] for af in self.audio_frames], axis=0)
-            sf.write(temp_audio, audio_data, self.sample_rate)
             
             try:
-                subprocess.run([
-                    'ffmpeg', '-y',
-                    '-i', temp_video,
-                    '-i', temp_audio,
-                    '-af', 'aresample=async=1000',  # Fixed: Space after the filter
-                    '-c:v', 'copy',
-                    '-c:a', 'aac',
-                    '-shortest',
-                    '-strict', 'experimental',
-                    self.output_file
-                ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                merge_audio_video(temp_video, temp_audio, self.output_file, self._video_offset())
                 logger.info("Merged with FFmpeg")
-                return
             except Exception as e:
+                # Keep the temp files so the recording can still be merged by hand
                 logger.warning(f"FFmpeg not available: {str(e)}")
                 raise Exception("FFmpeg required for merging")
-            finally: 
-                if os.path.exists(temp_audio):
-                    os.remove(temp_audio)
-                if os.path.exists(temp_video):
-                    os.remove(temp_video)        
+            if os.path.exists(temp_audio):
+                os.remove(temp_audio)
+            if os.path.exists(temp_video):
+                os.remove(temp_video)
+            return
             # The following commented part used the moviepy module to generate the merged video file
             # temp_audio = os.path.join(self.save_dir, 'temp_audio.wav')
             # temp_video = os.path.join(self.save_dir, 'temp_video.mp4')
@@ -658,24 +1030,104 @@ class ChromiumMeetingRecorder:
             raise
         
 
+    def _index_frame(self, timestamp, repeats=None):
+        """Record where the output frame written for a capture sits in the final file.
+
+        repeats is what cfr_repeats returned for constant frame rate output,
+        None for variable frame rate output (one frame at its capture time).
+        """
+        if not self.event_index or repeats == 0:
+            return
+        if repeats is None:
+            position = self.av_sync.video_time(timestamp)
+            number = self.vfr_frames_written
+            self.vfr_frames_written += 1
+        else:
+            number = self.av_sync.frames_written - repeats
+            position = number / self.video_fps
+        self.event_index.frame(number, self.av_sync.video_offset + position)
+
+    def _recording_time(self, wall_time):
+        """Position in the recording (audio timeline, seconds) of a time.time() value."""
+        if not self.av_sync:
+            return 0.0
+        return max(0.0, self.av_sync.media_time(time.monotonic() - (time.time() - wall_time)))
+
+    def _index_page_event(self, event):
+        """Add an event pushed by the page observer to the event index."""
+        if not self.event_index:
+            return
+        at = self._recording_time(event['time'] / 1000)
+        kind = event['type']
+        if kind == 'participants':
+            count = event['value']
+            self.event_index.add('participants', at, value=count if count is not None else -1)
+        elif kind in ('joined', 'left', 'speaker'):
+            self.event_index.add(kind, at, name=event['name'])
+        elif kind == 'share':
+            self.event_index.add('share_start' if event['value'] else 'share_stop', at)
+        elif kind == 'ended':
+            self.event_index.add('ended', at, name=event['reason'])
+
+    def _apply_stage(self, stage):
+        """Point the capture backend at the stage box the page reported; returns the crop in effect."""
+        self.stage = stage
+        backend = self.capture_backend
+        if not backend or not backend.region:
+            return None
+        crop = backend.set_crop(stage_crop(stage, backend))
+        if crop != self.stage_crop:
+            self.stage_crop = crop
+            self.stage_changes += 1
+            logger.info(f"Capturing stage {crop}" if crop else "Stage not visible, capturing the whole region")
+        return crop
+
+    def _video_offset(self):
+        # Video was written against the audio timeline; it only needs its start offset
+        return self.av_sync.video_offset if self.av_sync and self.av_sync.video_offset else 0.0
+
     def start_recording(self):
         """Start recording and monitoring."""
         try:
             timestamp = int(time.time())
+            # Per-recording temp files: a queued merge may still be reading the previous ones
+            self.temp_audio_path = os.path.join(self.save_dir, f'temp_audio_{timestamp}.{self.audio_format}')
+            self.temp_video_path = os.path.join(self.save_dir, f'temp_video_{timestamp}.mp4')
             self.audio_file = os.path.join(self.save_dir, f"meeting_{timestamp}.wav")
             self.video_file = os.path.join(self.save_dir, f"meeting_{timestamp}.mp4")
             self.output_file = os.path.join(self.save_dir, f"meeting_final_{timestamp}.mp4")
+            if self.audio_only:
+                self.output_file = os.path.join(self.save_dir, f"meeting_final_{timestamp}.{self.audio_codec}")
+
+            self.event_index = EventIndexWriter(self.output_file)
 
+            if self.output_mode in ('live', 'segmented'):
+                self.muxer = LiveMuxer(
+                    self.output_file, self.video_fps, video_args=x264_args(self.encoder_profile),
+                    vfr=self.variable_frame_rate,
+                    segment_seconds=self.segment_seconds if self.output_mode == 'segmented' else None
+                )
             
             self._start_audio_recording()
+
+            if self.crop_stage and not self.audio_only:
+                # Read before the threads start; the monitor keeps it current afterwards
+                try:
+                    self.stage = PageEventMonitor(self.driver, self.meeting_type,
+                                                  registry=self.selectors).read_state()['stage']
+                except Exception as e:
+                    logger.warning(f"Could not read the meeting stage: {str(e)}")
             
-            self.recording_thread = threading.Thread(target=self._capture_video, daemon=True)
-            self.recording_thread.start()
+            # Mark as recording before the worker threads check the flag
+            self.is_recording = True
+
+            if not self.audio_only:
+                self.recording_thread = threading.Thread(target=self._capture_video, daemon=True)
+                self.recording_thread.start()
             
             self.monitoring_thread = threading.Thread(target=self._monitor_meeting_status, daemon=True)
             self.monitoring_thread.start()
             
-            self.is_recording = True
             logger.info("Recording and monitoring started")
             
         except Exception as e:
@@ -683,50 +1135,183 @@ class ChromiumMeetingRecorder:
             raise
 
     def stop_recording(self):
+        """Stop, finalize and clean up; safe to call from several threads, the work runs once.
+
+        The monitor thread stops the recording itself when the meeting ends, and
+        the caller's own stop then has to wait for that to finish rather than
+        killing the muxer or quitting the browser while it is still finalizing.
+        """
+        with self._stop_lock:
+            in_flight = self._stopping
+            self._stopping = True
+        if in_flight:
+            if threading.current_thread() is not self.monitoring_thread:
+                self.finalized.wait()
+            return
+        try:
+            self._finish_recording()
+        finally:
+            self.finalized.set()
+
+    def _finish_recording(self):
         if not self.is_recording:
+            # Still release the browser and any private display/sink if joining failed
+            self._cleanup()
             return
         
         self.is_recording = False
         self.stop_event.set()
+        self._mark_timing('stop_requested')
         
         try:
             # Stop audio recording
             if hasattr(self, 'audio_stream') and self.audio_stream:
                 self.audio_stream.stop()
                 self.audio_stream.close()
-                
-                if hasattr(self, 'frames') and self.frames:
-                    audio_data = np.concatenate(self.frames, axis=0)
-                    sf.write(self.audio_file, audio_data, self.sample_rate)
-                    logger.info(f"Audio saved: {self.audio_file}")
 
-            # Stop video recording
-            if hasattr(self, 'video_writer') and self.video_writer:
-                self.video_writer.release()
-                logger.info(f"Video saved: {self.video_file}")
+            # Flush whatever the writer thread has not drained yet
+            if self.audio_writer:
+                self.audio_writer.close()
+                self.audio_writer = None
+            if self.vad:
+                self.vad.close()
+                logger.info(f"Voice activity: {self.vad.report()['long_silence_seconds']}s in long silences, "
+                            f"{self.vad.report()['removed_seconds']}s cut")
 
-            # Wait for threads to finish
+            # Wait for threads to finish; the pipeline flushes queued frames first and
+            # the capture thread releases the video writer on its way out, so no
+            # timeout here: releasing it under a still-running writer corrupts the file
             if hasattr(self, 'recording_thread') and self.recording_thread:
-                self.recording_thread.join(timeout=5) 
-            logger.info("Waiting for threads to finish")
+                logger.info("Waiting for threads to finish")
+                self.recording_thread.join()
+            if self.event_index:
+                self.event_index.close()
+
+            if hasattr(self, 'video_writer') and self.video_writer:
+                logger.info(f"Video saved: {self.video_file}")
 
             # Merge audio + video
-            self._merge_audio_video()
-            logger.info(f"Final recording saved: {self.output_file}")
+            if self.av_sync:
+                sync = self.av_sync.report()
+                logger.info(f"A/V sync: offset {sync['video_offset_seconds']}s, drift {sync['drift_ppm']} ppm "
+                            f"({sync['drift_seconds']}s over the recording), "
+                            f"{sync['frames_duplicated_for_sync']} frames repeated, "
+                            f"{sync['frames_dropped_for_sync']} skipped")
+            if self.postprocess_queue and not self.audio_only:
+                self._queue_finalization()
+                self._mark_timing('handed_off')
+            else:
+                self._finalize_output()
+                self._mark_timing('finalized')
+                logger.info(f"Final recording saved: {self.output_file}")
 
         except Exception as e:
             logger.error(f"Stop error: {str(e)}")
             raise
         finally:
+            self._write_recording_metadata()
             self._cleanup()
             logger.info("Recording completed")
 
+    def _finalize_output(self):
+        """Produce the final file for the configured output mode."""
+        if self.audio_only:
+            # The audio writer encoded straight into the final file
+            return
+        if self.muxer:
+            # Audio writer is already closed, so ffmpeg only needs to drain and write the index
+            self.muxer.close()
+            self.muxer = None
+        else:
+            self._merge_audio_video()
+
+    def _queue_finalization(self):
+        """Hand the slow part of finalizing to the post-processing queue.
+
+        The capture side is already flushed: the classic temp files are
+        complete, and the live muxer only has to finish its last segment.
+        """
+        name = os.path.splitext(os.path.basename(self.output_file))[0]
+        steps = []
+        if self.muxer:
+            # ffmpeg is our child process, so it has to be finished here
+            self.muxer.close(concat=False)
+            if self.muxer.segment_dir:
+                steps.append({'type': 'concat', 'segment_dir': self.muxer.segment_dir,
+                              'output': self.output_file})
+                steps.append({'type': 'remove', 'paths': [self.muxer.segment_dir]})
+            else:
+                steps.append({'type': 'faststart', 'path': self.output_file})
+            self.muxer = None
+        else:
+            steps.append({'type': 'merge', 'video': self.temp_video_path, 'audio': self.temp_audio_path,
+                          'output': self.output_file, 'video_offset': self._video_offset()})
+            steps.append({'type': 'remove', 'paths': [self.temp_video_path, self.temp_audio_path]})
+        steps.append({'type': 'thumbnail', 'video': self.output_file,
+                      'output': os.path.splitext(self.output_file)[0] + '.jpg'})
+        self.postprocess_job = self.postprocess_queue.submit(name, steps, self.output_file)
+
+    def _write_recording_metadata(self):
+        """Write a JSON sidecar next to the recording with capture statistics."""
+        try:
+            metadata = {
+                'meeting_url': self.meeting_url,
+                'meeting_type': self.meeting_type,
+                'output_file': self.output_file,
+                'output_mode': self.output_mode,
+                'variable_frame_rate': self.variable_frame_rate,
+                'encoder': self.encoder_name if self.output_mode == 'classic' else 'ffmpeg',
+                'encoder_profile': self.encoder_profile,
+                'segment_seconds': self.segment_seconds if self.output_mode == 'segmented' else None,
+                'capture': self.capture_stats(),
+                'timings': self.timings,
+                'av_sync': self.av_sync.report() if self.av_sync and not self.audio_only else None,
+                'audio_only': self.audio_only,
+                'audio_codec': self.audio_codec if self.audio_only else None,
+                'vad': self.vad.report() if self.vad else None,
+                'end_policy': self.end_policy,
+                'silence': self.silence_detector.report() if self.silence_detector else None,
+                'postprocess_job': self.postprocess_job,
+                'event_index': self.event_index.path if self.event_index else None,
+                'selectors': {'version': self.selectors.version, 'stats': self.selectors.stats()},
+                'page_audio': self.page_audio.report() if self.page_audio else None,
+                'stage': {'output_size': self.stage_output_size, 'crop': self.stage_crop,
+                          'changes': self.stage_changes} if self.crop_stage else None,
+            }
+            metadata.update(self.recording_metadata)
+            metadata_path = os.path.splitext(self.output_file)[0] + '.json'
+            with open(metadata_path, 'w') as f:
+                json.dump(metadata, f, indent=2)
+            logger.info(f"Recording metadata saved: {metadata_path}")
+        except Exception as e:
+            logger.error(f"Failed to write recording metadata: {str(e)}")
+
     def _cleanup(self):
         try:
+            if self.muxer:
+                self.muxer.kill()
+                if self.muxer.segment_dir:
+                    logger.warning(f"Recording left as segments in {self.muxer.segment_dir}; "
+                                   f"join them with --recover")
+                self.muxer = None
+            if self.page_audio:
+                self.page_audio.close()
+                self.page_audio = None
+            if self.browser_lease:
+                # Pool owns the session and its display/sink: hand it back for reuse or replacement
+                self.browser_pool.release(self.browser_lease)
+                self.browser_lease = None
+                self.driver = None
+                self.display = None
+                self.audio_sink = None
             if hasattr(self, 'driver') and self.driver:
                 self.driver.quit()
+                self.driver = None
             if hasattr(self, 'video_writer') and self.video_writer:
                 self.video_writer.release()
+                self.video_writer = None
+            self._stop_isolation()
+            self.selectors.save_stats()
             logger.info("Cleanup complete")
         except Exception as e:
             logger.error(f"Cleanup error: {str(e)}")
@@ -734,19 +1319,44 @@ class ChromiumMeetingRecorder:
     def _take_screenshot(self, name):
         """Take screenshot for debugging."""
         try:
-            screenshot_path = os.path.join(self.temp_dir, f"{name}_{int(time.time())}.png")
+            screenshot_path = os.path.join(self.save_dir, f"{name}_{int(time.time())}.png")
             self.driver.save_screenshot(screenshot_path)
             logger.info(f"Screenshot saved: {screenshot_path}")
         except Exception as e:
             logger.error(f"Failed to take screenshot: {str(e)}")
 
-def main():
-    parser = argparse.ArgumentParser(description='Automatic Meeting Recorder')
-    parser.add_argument('meeting_url', help='URL of the meeting to join')
-    parser.add_argument('--output', '-o', help='Output directory for recordings', default=None)
-    args = parser.parse_args()
-
-    recorder = ChromiumMeetingRecorder(args.meeting_url, args.output)
+def record_meeting(meeting_url, args, browser_pool=None, metrics_server=None, postprocess_queue=None,
+                   selector_registry=None):
+    recorder = ChromiumMeetingRecorder(meeting_url, args.output, audio_format=args.audio_format,
+                                       frame_history_seconds=args.frame_history,
+                                       output_mode=args.output_mode,
+                                       video_fps=args.fps,
+                                       drop_policy=args.drop_policy,
+                                       capture_queue_size=args.capture_queue,
+                                       capture_backend=args.capture_backend,
+                                       skip_static=args.skip_static,
+                                       isolate=args.isolate,
+                                       browser_pool=browser_pool,
+                                       audio_source=args.audio_source,
+                                       segment_seconds=args.segment_seconds,
+                                       encoder=args.encoder,
+                                       encoder_profile=args.encoder_profile,
+                                       adaptive_quality=args.adaptive_quality,
+                                       min_fps=args.min_fps,
+                                       audio_only=args.audio_only,
+                                       audio_codec=args.audio_codec,
+                                       vad=args.vad,
+                                       vad_threshold_db=args.vad_threshold,
+                                       max_silence=args.max_silence,
+                                       end_policy=args.end_policy,
+                                       silence_timeout=args.silence_timeout,
+                                       silence_threshold_db=args.silence_threshold,
+                                       postprocess_queue=postprocess_queue,
+                                       selector_registry=selector_registry,
+                                       page_audio_tracks=args.page_audio_tracks,
+                                       crop_stage=args.crop_stage)
+    if metrics_server:
+        metrics_server.source = recorder
     try:
         recorder.setup_chromium_driver()
         if recorder.join_meeting():
@@ -762,5 +1372,134 @@ def main():
     finally:
         recorder.stop_recording()
 
+def main():
+    parser = argparse.ArgumentParser(description='Automatic Meeting Recorder')
+    parser.add_argument('meeting_url', nargs='?', help='URL of the meeting to join')
+    parser.add_argument('--output', '-o', help='Output directory for recordings', default=None)
+    parser.add_argument('--audio-format', choices=['wav', 'flac'], default='wav',
+                        help='Container for the intermediate audio track')
+    parser.add_argument('--audio-only', action='store_true',
+                        help='Record audio only, encoded as it arrives; no screen capture')
+    parser.add_argument('--audio-codec', choices=['opus', 'flac'], default='opus',
+                        help='Codec of audio-only recordings')
+    parser.add_argument('--vad', choices=VoiceActivityDetector.MODES,
+                        help='Voice activity detection: mark long silences, or cut them (audio only)')
+    parser.add_argument('--vad-threshold', type=float, default=-50.0,
+                        help='Level in dBFS below which audio counts as silence')
+    parser.add_argument('--max-silence', type=float, default=2.0,
+                        help='Silences longer than this many seconds are marked or cut down to it')
+    parser.add_argument('--end-policy', choices=END_POLICIES, default='participants',
+                        help='What ends the recording: participant count, audio silence, either or both')
+    parser.add_argument('--silence-timeout', type=float, default=120.0,
+                        help='Seconds of continuous silence that count as the meeting being over')
+    parser.add_argument('--silence-threshold', type=float, default=-70.0,
+                        help='Level in dBFS below which audio counts as silence for --end-policy')
+    parser.add_argument('--async-finalize', action='store_true',
+                        help='Merge and finish recordings in background processes and release the browser at once')
+    parser.add_argument('--postprocess-workers', type=int, default=1,
+                        help='Processes finishing recordings with --async-finalize')
+    parser.add_argument('--job-dir',
+                        help='Where post-processing job status files are kept (default: <output>/jobs)')
+    parser.add_argument('--selectors',
+                        help='Selector registry file to use instead of the bundled selectors.json')
+    parser.add_argument('--frame-history', type=float, default=0,
+                        help='Seconds of recent video frames kept in memory for debugging (default 0, off)')
+    parser.add_argument('--output-mode', choices=['classic', 'live', 'segmented'], default='classic',
+                        help='live muxes audio and video into the final file while recording; '
+                             'segmented writes crash-safe rolling segments joined at stop')
+    parser.add_argument('--segment-seconds', type=int, default=10,
+                        help='Segment length in segmented mode (at most this much is lost on a crash)')
+    parser.add_argument('--encoder', choices=['auto'] + list(ENCODER_BACKENDS), default='auto',
+                        help='Video encoder for classic output; auto uses the --calibrate-encoders result')
+    parser.add_argument('--encoder-profile', choices=list(ENCODER_PROFILES), default='balanced',
+                        help='H.264 quality/speed trade-off')
+    parser.add_argument('--calibrate-encoders', action='store_true',
+                        help='Benchmark the encoders for --fps and --encoder-profile, remember the cheapest '
+                             'that keeps up, and exit')
+    parser.add_argument('--recover', metavar='SEGMENT_DIR',
+                        help='Join the segments of an interrupted segmented recording and exit')
+    parser.add_argument('--fps', type=int, default=15, help='Target video frame rate')
+    parser.add_argument('--drop-policy', choices=DROP_POLICIES, default=DUPLICATE,
+                        help='What to do when encoding falls behind the capture schedule')
+    parser.add_argument('--capture-queue', type=int, default=4,
+                        help='Frames buffered between capture pipeline stages')
+    parser.add_argument('--capture-backend', choices=['auto'] + list(CAPTURE_BACKENDS), default='auto',
+                        help='Screen grabber; auto uses X11 shared memory when available')
+    parser.add_argument('--adaptive-quality', action='store_true',
+                        help='Lower the frame rate while the host cannot keep up, restore it after '
+                             '(writes variable frame rate video; classic output needs PyAV)')
+    parser.add_argument('--min-fps', type=int, default=5, help='Lowest frame rate adaptive quality may use')
+    parser.add_argument('--crop-stage', action='store_true',
+                        help='Capture and encode only the meeting stage (video/share area), following layout changes')
+    parser.add_argument('--skip-static', action='store_true',
+                        help='Skip unchanged frames and write variable frame rate video')
+    parser.add_argument('--audio-source', choices=['device', 'page', 'synthetic'], default='device',
+                        help='page taps the remote WebRTC audio inside the browser; synthetic records '
+                             'a generated tone instead of an input device (for benchmarks)')
+    parser.add_argument('--page-audio-tracks', action='store_true',
+                        help='With --audio-source page, also save each remote audio track to its own file')
+    parser.add_argument('--isolate', action='store_true',
+                        help='Run Chrome on a private Xvfb display and PulseAudio sink (Linux)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Record meeting URLs read from stdin, one per line, using pre-launched browsers')
+    parser.add_argument('--pool-size', type=int, default=1,
+                        help='Browsers kept launched and ready in worker mode')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve live metrics on this port (/metrics for Prometheus, /metrics.json)')
+    args = parser.parse_args()
+
+    if args.calibrate_encoders:
+        chosen, results = calibrate_encoders(fps=args.fps, profile=args.encoder_profile)
+        for result in results:
+            print(f"{result['encoder']:>8}: {result['max_fps']:>7.1f} fps max, "
+                  f"{result['cpu_ms_per_frame']:>6.2f} ms CPU/frame, {result['bytes_per_frame']} bytes/frame")
+        print(f"Selected {chosen['encoder']} for {args.encoder_profile} at {args.fps} fps")
+        return
+
+    if args.recover:
+        output_file = args.recover.rstrip(os.sep).rsplit('_segments', 1)[0] + '.mp4'
+        concat_segments(args.recover, output_file)
+        return
+
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(args.metrics_port)
+        metrics_server.start()
+
+    selector_registry = SelectorRegistry(args.selectors) if args.selectors else None
+
+    postprocess_queue = None
+    if args.async_finalize:
+        job_dir = args.job_dir or os.path.join(
+            os.path.abspath(args.output) if args.output else os.path.dirname(os.path.abspath(__file__)), 'jobs')
+        postprocess_queue = PostProcessQueue(job_dir, workers=args.postprocess_workers)
+        # Finish whatever a previous run left behind
+        postprocess_queue.resume()
+
+    try:
+        if not args.worker:
+            if not args.meeting_url:
+                parser.error('meeting_url is required unless --worker or --recover is given')
+            record_meeting(args.meeting_url, args, metrics_server=metrics_server,
+                           postprocess_queue=postprocess_queue, selector_registry=selector_registry)
+            return
+
+        browser_pool = BrowserPool(size=args.pool_size, isolate=args.isolate)
+        browser_pool.start()
+        try:
+            for line in sys.stdin:
+                meeting_url = line.strip()
+                if meeting_url:
+                    record_meeting(meeting_url, args, browser_pool, metrics_server, postprocess_queue,
+                                   selector_registry)
+        finally:
+            browser_pool.close()
+    finally:
+        if postprocess_queue:
+            postprocess_queue.close(wait=True)
+        if metrics_server:
+            metrics_server.stop()
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'meeting_recorder'
+
+
+def current_rss_bytes(pid='self'):
+    """Resident set size of this (or another) process."""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Peak RSS is the best we can do without procfs (kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def render_prometheus(snapshot, labels=None):
+    """Prometheus text format for a recorder metrics snapshot.
+
+    Entries under 'histograms' become histograms; every other numeric value
+    is exported as a gauge named after its path in the snapshot.
+    """
+    label_text = ','.join(f'{key}="{value}"' for key, value in (labels or {}).items())
+    lines = []
+
+    def sample(name, value, extra=''):
+        joined = ','.join(part for part in (label_text, extra) if part)
+        lines.append(f'{name}{{{joined}}} {value}' if joined else f'{name} {value}')
+
+    def gauges(prefix, node):
+        for key, value in node.items():
+            name = f'{prefix}_{key}'
+            if isinstance(value, dict):
+                gauges(name, value)
+            elif isinstance(value, bool):
+                lines.append(f'# TYPE {name} gauge')
+                sample(name, int(value))
+            elif isinstance(value, (int, float)):
+                lines.append(f'# TYPE {name} gauge')
+                sample(name, value)
+
+    gauges(PREFIX, {key: value for key, value in snapshot.items() if key != 'histograms'})
+    for key, histogram in snapshot.get('histograms', {}).items():
+        name = f'{PREFIX}_{key}_seconds'
+        lines.append(f'# TYPE {name} histogram')
+        for bound, count in histogram['buckets']:
+            sample(f'{name}_bucket', count, f'le="{bound}"')
+        sample(f'{name}_bucket', histogram['count'], 'le="+Inf"')
+        sample(f'{name}_sum', histogram['sum'])
+        sample(f'{name}_count', histogram['count'])
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Serves the current recorder's metrics over HTTP.
+
+    /metrics is Prometheus text and /metrics.json the raw snapshot. The
+    source can be swapped between meetings (worker mode) without restarting.
+    """
+
+    def __init__(self, port, host='127.0.0.1', source=None):
+        self.port = port
+        self.host = host
+        self.source = source  # Object with metrics_snapshot(), usually the recorder
+        self._server = None
+        self._thread = None
+
+    def snapshot(self):
+        source = self.source
+        return source.metrics_snapshot() if source else {}
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    if self.path == '/metrics':
+                        body = render_prometheus(server.snapshot()).encode()
+                        content_type = 'text/plain; version=0.0.4'
+                    elif self.path == '/metrics.json':
+                        body = json.dumps(server.snapshot()).encode()
+                        content_type = 'application/json'
+                    else:
+                        self.send_error(404)
+                        return
+                except Exception as e:
+                    logger.error(f"Metrics snapshot failed: {str(e)}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the log
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics available at http://{self.host}:{self._server.server_port}/metrics")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
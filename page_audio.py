@@ -0,0 +1,366 @@
+import os
+import json
+import time
+import base64
+import logging
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+from cdp import CDPSession
+
+logger = logging.getLogger(__name__)
+
+BINDING_NAME = '__recorderAudioSink'
+
+# Runs in every frame before the page's own scripts. Wraps RTCPeerConnection
+# to collect remote audio tracks and, once started, records them with
+# MediaRecorder: all tracks of a frame mixed through WebAudio, or one
+# recorder per track. Opus/WebM chunks go to Python through the DevTools
+# binding as base64 JSON messages {stream, data} / {stream, final}.
+TAP_SCRIPT = r"""
+(() => {
+if (window.__recorderAudioTap || !window.RTCPeerConnection) return;
+const SLICE_MS = 250;
+const frameId = Math.random().toString(36).slice(2, 8);
+const state = {running: false, perTrack: false};
+const tracks = new Map();
+const pending = [];
+const recorders = [];
+const players = [];
+let context = null, mix = null, nextId = 0;
+
+function sink(message) {
+    try { window[BINDING](JSON.stringify(message)); } catch (e) { /* binding gone */ }
+}
+
+function toBase64(buffer) {
+    const bytes = new Uint8Array(buffer);
+    let binary = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(binary);
+}
+
+function record(stream, key) {
+    const recorder = new MediaRecorder(stream, {mimeType: 'audio/webm;codecs=opus', audioBitsPerSecond: 64000});
+    // Chunks are converted asynchronously; chain them so they arrive in order
+    let chain = Promise.resolve();
+    recorder.ondataavailable = event => {
+        if (!event.data.size) return;
+        chain = chain.then(() => event.data.arrayBuffer())
+                     .then(buffer => sink({stream: key, data: toBase64(buffer)}));
+    };
+    recorder.onstop = () => { chain = chain.then(() => sink({stream: key, final: true})); };
+    recorder.start(SLICE_MS);
+    recorders.push(recorder);
+}
+
+function attach(track) {
+    const key = tracks.get(track.id);
+    const stream = new MediaStream([track]);
+    // Remote WebRTC audio only flows into WebAudio while a media element plays it
+    const player = new Audio();
+    player.muted = true;
+    player.srcObject = stream;
+    player.play().catch(() => {});
+    players.push(player);
+    if (state.perTrack) {
+        sink({stream: key, track: {id: track.id, label: track.label}});
+        record(stream, key);
+        return;
+    }
+    if (!context) {
+        context = new AudioContext();
+        mix = context.createMediaStreamDestination();
+        record(mix.stream, 'mix-' + frameId);
+    }
+    context.resume().catch(() => {});
+    context.createMediaStreamSource(stream).connect(mix);
+    sink({stream: 'mix-' + frameId, track: {id: track.id, label: track.label}});
+}
+
+function addTrack(track) {
+    if (track.kind !== 'audio' || tracks.has(track.id)) return;
+    tracks.set(track.id, frameId + '-' + (nextId++));
+    if (state.running) attach(track); else pending.push(track);
+}
+
+const Native = window.RTCPeerConnection;
+function TappedPeerConnection(...args) {
+    const connection = new Native(...args);
+    connection.addEventListener('track', event => addTrack(event.track));
+    return connection;
+}
+TappedPeerConnection.prototype = Native.prototype;
+Object.setPrototypeOf(TappedPeerConnection, Native);
+window.RTCPeerConnection = TappedPeerConnection;
+if (window.webkitRTCPeerConnection) window.webkitRTCPeerConnection = TappedPeerConnection;
+
+function childTaps() {
+    const taps = [];
+    for (const frame of document.querySelectorAll('iframe')) {
+        try {
+            if (frame.contentWindow.__recorderAudioTap) taps.push(frame.contentWindow.__recorderAudioTap);
+        } catch (e) { /* cross-origin */ }
+    }
+    return taps;
+}
+
+window.__recorderAudioTap = {
+    state: state,
+    start(perTrack) {
+        state.running = true;
+        state.perTrack = perTrack;
+        pending.splice(0).forEach(attach);
+        childTaps().forEach(tap => tap.start(perTrack));
+        return tracks.size;
+    },
+    stop() {
+        state.running = false;
+        recorders.forEach(recorder => { if (recorder.state !== 'inactive') recorder.stop(); });
+        players.forEach(player => { player.srcObject = null; });
+        childTaps().forEach(tap => tap.stop());
+        return recorders.length;
+    },
+};
+// Frames created after start() pick up the running state from the top frame
+try {
+    const top = window.top.__recorderAudioTap;
+    if (top && top !== window.__recorderAudioTap && top.state.running) {
+        state.running = true;
+        state.perTrack = top.state.perTrack;
+    }
+} catch (e) { /* cross-origin */ }
+})();
+""".replace('BINDING', repr(BINDING_NAME))
+
+
+class PageAudioTap:
+    """Receives the meeting's remote audio from inside the page over DevTools.
+
+    install() must run before the meeting page creates its peer connections,
+    i.e. before joining. Each recorded stream is Opus in WebM; handlers added
+    with on_chunk() get (stream, bytes, final). With per_track, every remote
+    track is recorded separately and also saved as-is to track_dir.
+    """
+
+    def __init__(self, driver, per_track=False):
+        self.driver = driver
+        self.per_track = per_track
+        self.track_dir = None
+        self.streams = {}  # stream -> {'bytes', 'tracks', 'final', 'file'}
+        self._handlers = []
+        self._session = None
+        self._lock = threading.Lock()
+
+    def install(self):
+        self._session = CDPSession.for_driver(self.driver)
+        self._session.on('Runtime.bindingCalled', self._on_binding)
+        self._session.send('Runtime.enable')
+        self._session.send('Runtime.addBinding', {'name': BINDING_NAME})
+        self._session.send('Page.addScriptToEvaluateOnNewDocument', {'source': TAP_SCRIPT})
+        logger.info("In-page audio tap installed")
+
+    def on_chunk(self, handler):
+        self._handlers.append(handler)
+
+    def start(self, track_dir=None):
+        """Start recording the remote tracks seen so far and every later one."""
+        self.track_dir = track_dir
+        if track_dir:
+            os.makedirs(track_dir, exist_ok=True)
+        result = self._session.send('Runtime.evaluate', {
+            'expression': f'window.__recorderAudioTap ? window.__recorderAudioTap.start({json.dumps(self.per_track)}) : -1',
+            'returnByValue': True,
+        })
+        tracks = result['result'].get('value', -1)
+        if tracks < 0:
+            raise RuntimeError("Audio tap is not present in the page (installed after the page loaded?)")
+        logger.info(f"In-page audio tap started with {tracks} remote track(s)")
+        if not tracks:
+            # Later tracks are still picked up; clients that decode audio outside WebRTC never have any
+            logger.warning("No remote WebRTC audio tracks in the page yet")
+
+    def stop(self, timeout=3.0):
+        """Stop the recorders and wait briefly for their last chunks."""
+        if self._session is None:
+            return
+        try:
+            self._session.send('Runtime.evaluate', {
+                'expression': 'window.__recorderAudioTap && window.__recorderAudioTap.stop()',
+                'returnByValue': True,
+            })
+        except Exception as e:
+            logger.warning(f"Stopping the in-page audio tap failed: {str(e)}")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if all(stream['final'] for stream in self.streams.values()):
+                    break
+            time.sleep(0.05)
+        with self._lock:
+            for stream in self.streams.values():
+                if stream['file']:
+                    stream['file'].close()
+                    stream['file'] = None
+
+    def close(self):
+        if self._session:
+            self._session.close()
+            self._session = None
+
+    def _on_binding(self, params):
+        if params.get('name') != BINDING_NAME:
+            return
+        message = json.loads(params['payload'])
+        key = message['stream']
+        with self._lock:
+            stream = self.streams.get(key)
+            if stream is None:
+                stream = {'bytes': 0, 'tracks': [], 'final': False, 'file': None}
+                if self.track_dir:
+                    stream['path'] = os.path.join(self.track_dir, f'{key}.webm')
+                    stream['file'] = open(stream['path'], 'wb')
+                self.streams[key] = stream
+                logger.info(f"Page audio stream {key} started")
+            if 'track' in message:
+                stream['tracks'].append(message['track'])
+                return
+            data = base64.b64decode(message['data']) if 'data' in message else b''
+            final = bool(message.get('final'))
+            stream['bytes'] += len(data)
+            stream['final'] = stream['final'] or final
+            if stream['file'] and data:
+                stream['file'].write(data)
+        for handler in self._handlers:
+            handler(key, data, final)
+
+    def report(self):
+        with self._lock:
+            return {key: {'bytes': stream['bytes'], 'tracks': stream['tracks'], 'path': stream.get('path')}
+                    for key, stream in self.streams.items()}
+
+
+class _StreamDecoder:
+    """ffmpeg turning one WebM/Opus byte stream into float32 PCM blocks."""
+
+    def __init__(self, samplerate, channels, blocksize, max_blocks):
+        self.process = subprocess.Popen([
+            'ffmpeg', '-loglevel', 'error',
+            # Start decoding from the first cluster instead of probing seconds of input
+            '-probesize', '32768', '-analyzeduration', '0', '-fflags', 'nobuffer',
+            '-f', 'matroska', '-i', 'pipe:0',
+            '-f', 'f32le', '-ar', str(int(samplerate)), '-ac', str(channels), 'pipe:1'
+        ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.blocks = deque(maxlen=max_blocks)  # Oldest audio is dropped if the mixer falls behind
+        self.primed = False  # Set once enough is buffered to ride out the gaps between chunks
+        self._shape = (blocksize, channels)
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def feed(self, data, final):
+        try:
+            if data:
+                self.process.stdin.write(data)
+                self.process.stdin.flush()
+            if final:
+                self.process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    def _read(self):
+        size = self._shape[0] * self._shape[1] * 4
+        while True:
+            data = self.process.stdout.read(size)
+            if len(data) < size:
+                return
+            self.blocks.append(np.frombuffer(data, dtype=np.float32).reshape(self._shape))
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._thread.join(timeout=2)
+
+
+class PageAudioStream:
+    """The tapped page audio as a sounddevice-style input stream.
+
+    Every stream from the tap is decoded by its own ffmpeg; a mixer thread
+    sums one block from each at the nominal rate and hands it to the
+    callback, so the rest of the recorder (A/V sync, VAD, writers) sees an
+    ordinary input device. Chunks arrive in bursts, so each stream joins the
+    mix only after `prebuffer` seconds of it are decoded; until then it is
+    silence, which keeps the timeline running from the first block.
+    """
+
+    def __init__(self, tap, samplerate, channels, callback, blocksize=1024, prebuffer=0.5):
+        self.tap = tap
+        self.samplerate = float(samplerate)
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize
+        self.prebuffer = prebuffer
+        self._decoders = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        tap.on_chunk(self._on_chunk)
+
+    def _on_chunk(self, key, data, final):
+        with self._lock:
+            decoder = self._decoders.get(key)
+            if decoder is None:
+                if self._stop.is_set():
+                    return
+                # Keep at most ~2 s per stream so a stalled mixer cannot grow memory
+                max_blocks = int(2 * self.samplerate / self.blocksize)
+                decoder = _StreamDecoder(self.samplerate, self.channels, self.blocksize, max_blocks)
+                self._decoders[key] = decoder
+        decoder.feed(data, final)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._mix, daemon=True)
+        self._thread.start()
+
+    def _mix(self):
+        interval = self.blocksize / self.samplerate
+        block = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        prebuffer_blocks = max(1, int(self.prebuffer / interval))
+        started = time.monotonic()
+        produced = 0
+        while not self._stop.wait(max(0.0, started + produced * interval - time.monotonic())):
+            block.fill(0.0)
+            with self._lock:
+                decoders = list(self._decoders.values())
+            for decoder in decoders:
+                if not decoder.primed:
+                    decoder.primed = len(decoder.blocks) >= prebuffer_blocks
+                if decoder.primed and decoder.blocks:
+                    block += decoder.blocks.popleft()
+            np.clip(block, -1.0, 1.0, out=block)
+            self.callback(block, self.blocksize, None, None)
+            produced += 1
+
+    def stop(self):
+        self.tap.stop()
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            decoders = list(self._decoders.values())
+            self._decoders = {}
+        for decoder in decoders:
+            decoder.close()
+
+    def close(self):
+        self.stop()
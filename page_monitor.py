@@ -0,0 +1,288 @@
+import logging
+from selector_registry import default_registry
+
+logger = logging.getLogger(__name__)
+
+# Readers shared by the observer and the one-shot state query. They use the
+# platform config passed as the script's first argument, and note in the
+# script's `matched` object which selector index found each element, so the
+# registry can count in-page hits and misses too.
+READ_FUNCTIONS = r"""
+function documents() {
+    const docs = [document];
+    if (config.frame) {
+        const frame = document.querySelector(config.frame);
+        try {
+            if (frame && frame.contentDocument) docs.push(frame.contentDocument);
+        } catch (e) { /* cross-origin */ }
+    }
+    return docs;
+}
+
+function readCount(docs) {
+    for (const doc of docs) {
+        for (const [index, selector] of config.counter.entries()) {
+            const el = doc.querySelector(selector);
+            if (!el) continue;
+            const value = parseInt((el.textContent || '').replace(/[^0-9]/g, ''), 10);
+            if (!isNaN(value)) { matched.counter = index; return value; }
+        }
+    }
+    delete matched.counter;
+    return null;
+}
+
+function nameOf(el) {
+    return (el.getAttribute('data-name') || el.getAttribute('aria-label') || el.textContent || '').trim();
+}
+
+function readNames(docs) {
+    const names = new Set();
+    for (const doc of docs) {
+        for (const selector of config.names || []) {
+            for (const el of doc.querySelectorAll(selector)) {
+                const name = nameOf(el);
+                if (name) names.add(name);
+            }
+        }
+    }
+    return names;
+}
+
+function readFirst(docs, key) {
+    for (const doc of docs) {
+        for (const [index, selector] of (config[key] || []).entries()) {
+            const el = doc.querySelector(selector);
+            if (el) { matched[key] = index; return el; }
+        }
+    }
+    delete matched[key];
+    return null;
+}
+
+function readEnded(docs) {
+    for (const doc of docs) {
+        const candidates = doc.querySelectorAll('[role="dialog"], [role="alert"], [role="heading"], h1, h2');
+        for (const el of candidates) {
+            const text = el.textContent || '';
+            for (const phrase of config.ended) {
+                if (text.includes(phrase)) return phrase;
+            }
+        }
+    }
+    return null;
+}
+
+function readWaiting(docs) {
+    for (const doc of docs) {
+        const text = doc.body ? doc.body.textContent || '' : '';
+        for (const phrase of config.waiting || []) {
+            if (text.includes(phrase)) return true;
+        }
+    }
+    return false;
+}
+
+function readSpeaker(docs) {
+    const el = readFirst(docs, 'speaker');
+    return el ? nameOf(el) || null : null;
+}
+
+function readStage(el) {
+    // Stage box in top-level viewport CSS pixels, plus where the viewport sits on screen
+    if (!el) return null;
+    const rect = el.getBoundingClientRect();
+    let x = rect.left, y = rect.top;
+    if (el.ownerDocument !== document && config.frame) {
+        const frame = document.querySelector(config.frame);
+        if (frame) {
+            const offset = frame.getBoundingClientRect();
+            x += offset.left + frame.clientLeft;
+            y += offset.top + frame.clientTop;
+        }
+    }
+    const left = Math.max(0, x), top = Math.max(0, y);
+    const right = Math.min(innerWidth, x + rect.width), bottom = Math.min(innerHeight, y + rect.height);
+    if (right - left < 16 || bottom - top < 16) return null;
+    return {
+        rect: [Math.round(left), Math.round(top), Math.round(right - left), Math.round(bottom - top)],
+        viewport: [innerWidth, innerHeight],
+        window: [screenX, screenY, outerWidth, outerHeight],
+        scale: devicePixelRatio,
+    };
+}
+"""
+
+# Installs a MutationObserver that re-reads the monitored state (debounced)
+# whenever the page changes and queues an event for every change.
+INSTALL_SCRIPT = r"""
+const config = arguments[0];
+if (window.__recorderMonitor) { window.__recorderMonitor.check(); return 'present'; }
+
+const queue = [];
+const matched = {};
+const state = {participants: undefined, ended: null, names: new Set(), speaker: null, share: false,
+               stage: undefined, stageElement: null, matched: {}};
+let waiter = null;
+let scheduled = null;
+const observed = new WeakSet();
+const resizes = new ResizeObserver(() => schedule());
+window.addEventListener('resize', () => schedule());
+function push(event) {
+    event.time = Date.now();
+    queue.push(event);
+    if (waiter) {
+        const resolve = waiter;
+        waiter = null;
+        resolve(queue.splice(0));
+    }
+}
+
+function check() {
+    scheduled = null;
+    const docs = documents();
+    docs.forEach(observe);
+    const count = readCount(docs);
+    if (count !== state.participants) {
+        state.participants = count;
+        push({type: 'participants', value: count});
+    }
+    const names = readNames(docs);
+    for (const name of names) {
+        if (!state.names.has(name)) push({type: 'joined', name: name});
+    }
+    for (const name of state.names) {
+        if (!names.has(name)) push({type: 'left', name: name});
+    }
+    state.names = names;
+    const speaker = readSpeaker(docs);
+    if (speaker !== state.speaker) {
+        state.speaker = speaker;
+        push({type: 'speaker', name: speaker});
+    }
+    const share = readFirst(docs, 'share') !== null;
+    if (share !== state.share) {
+        state.share = share;
+        push({type: 'share', value: share});
+    }
+    const stageElement = readFirst(docs, 'stage');
+    if (stageElement !== state.stageElement) {
+        // Layout changes that do not touch the DOM (window resize, CSS) still move the stage
+        if (state.stageElement) resizes.unobserve(state.stageElement);
+        if (stageElement) resizes.observe(stageElement);
+        state.stageElement = stageElement;
+    }
+    const stage = readStage(stageElement);
+    const stageKey = JSON.stringify(stage);
+    if (stageKey !== state.stage) {
+        state.stage = stageKey;
+        push({type: 'stage', value: stage});
+    }
+    const ended = readEnded(docs);
+    if (ended && ended !== state.ended) {
+        state.ended = ended;
+        push({type: 'ended', reason: ended});
+    }
+    // Report a selector when it starts matching its element, not on every check
+    const changed = {};
+    for (const key in matched) {
+        if (matched[key] !== state.matched[key]) changed[key] = matched[key];
+    }
+    state.matched = Object.assign({}, matched);
+    if (Object.keys(changed).length) push({type: 'selectors', matched: changed});
+}
+
+function schedule() {
+    // Coalesce mutation bursts into one state read
+    if (!scheduled) scheduled = setTimeout(check, 200);
+}
+
+function observe(doc) {
+    if (observed.has(doc)) return;
+    observed.add(doc);
+    new MutationObserver(schedule).observe(doc, {childList: true, subtree: true, characterData: true});
+}
+
+window.__recorderMonitor = {
+    check: check,
+    wait: function (timeoutMs, resolve) {
+        if (queue.length) { resolve(queue.splice(0)); return; }
+        waiter = resolve;
+        setTimeout(function () {
+            if (waiter === resolve) { waiter = null; resolve([]); }
+        }, timeoutMs);
+    },
+};
+check();
+// Safety net for frames that reload without touching the parent document
+setInterval(check, 5000);
+return 'installed';
+""" + READ_FUNCTIONS
+
+# Everything the recorder monitors, read in one round trip (iframe included)
+STATE_SCRIPT = r"""
+const config = arguments[0];
+const matched = {};
+const docs = documents();
+return {
+    participants: readCount(docs),
+    ended: readEnded(docs),
+    waiting: readWaiting(docs),
+    share: readFirst(docs, 'share') !== null,
+    speaker: readSpeaker(docs),
+    stage: readStage(readFirst(docs, 'stage')),
+    matched: matched,
+};
+""" + READ_FUNCTIONS
+
+# Long-poll: resolves as soon as events are queued, or with [] on timeout.
+# Resolves with null when the page navigated and the observer is gone.
+WAIT_SCRIPT = r"""
+const done = arguments[arguments.length - 1];
+if (!window.__recorderMonitor) { done(null); return; }
+window.__recorderMonitor.wait(arguments[0], done);
+"""
+
+
+class PageEventMonitor:
+    """Receives participant, speaker, screen-share, stage-layout and meeting-ended events pushed by an in-page observer.
+
+    Each wait_events() call is a single WebDriver round trip that returns as
+    soon as the page reports a change, so detection latency is bounded by
+    the observer's debounce rather than a polling interval.
+    """
+
+    def __init__(self, driver, meeting_type, wait_timeout=2.0, registry=None):
+        self.driver = driver
+        self.meeting_type = meeting_type
+        # Selectors and phrases per platform come from the selector registry
+        self.registry = registry or default_registry()
+        self.config = self.registry.page_config(meeting_type)
+        self.wait_timeout = wait_timeout
+
+    def install(self):
+        self.driver.set_script_timeout(self.wait_timeout + 5)
+        result = self.driver.execute_script(INSTALL_SCRIPT, self.config)
+        logger.info(f"Page observer {result}")
+
+    def read_state(self):
+        """Participant count, ended phrase, waiting-room and screen-share flags and stage box in one call.
+
+        Unlike the per-platform Selenium lookups this never waits: missing
+        elements simply read as None / False.
+        """
+        state = self.driver.execute_script(STATE_SCRIPT, self.config)
+        self.registry.record_page_matches(self.meeting_type, self.config, state.pop('matched', {}))
+        return state
+
+    def wait_events(self):
+        """Block up to wait_timeout for events; reinstalls after a navigation."""
+        events = self.driver.execute_async_script(WAIT_SCRIPT, int(self.wait_timeout * 1000))
+        if events is None:
+            self.install()
+            return []
+        # Selector reports feed the registry stats and are not page events
+        for event in events:
+            if event['type'] == 'selectors':
+                self.registry.record_page_matches(self.meeting_type, self.config, event['matched'])
+        return [event for event in events if event['type'] != 'selectors']
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from live_mux import concat_segments
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def merge_audio_video(video_path, audio_path, output_path, video_offset=0.0):
+    """Mux the temporary video and audio tracks into the final MP4 (video is copied)."""
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-itsoffset', f'{video_offset:.4f}',
+        '-i', video_path,
+        '-i', audio_path,
+        '-map', '0:v', '-map', '1:a',
+        '-c:v', 'copy',
+        '-c:a', 'aac',
+        '-strict', 'experimental',
+        '-movflags', '+faststart',
+        output_path
+    ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def remux_faststart(path):
+    """Move the MP4 index to the front so players can start before the download ends."""
+    temp_path = path + '.faststart.mp4'
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error', '-i', path,
+        '-map', '0', '-c', 'copy', '-movflags', '+faststart', temp_path
+    ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    os.replace(temp_path, path)
+
+
+def probe_duration(path):
+    """Container duration in seconds, or None when ffprobe cannot tell."""
+    try:
+        result = subprocess.run([
+            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1', path
+        ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def make_thumbnail(video_path, thumbnail_path, at=5.0, width=640):
+    # Seeking past the end writes no frame, so short recordings use their midpoint
+    # and ones of unknown length their first frame
+    duration = probe_duration(video_path)
+    at = min(at, duration / 2) if duration else 0.0
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error', '-ss', str(at), '-i', video_path,
+        '-frames:v', '1', '-vf', f'scale={width}:-2', thumbnail_path
+    ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _run_step(step):
+    kind = step['type']
+    if kind == 'merge':
+        merge_audio_video(step['video'], step['audio'], step['output'], step.get('video_offset', 0.0))
+    elif kind == 'concat':
+        concat_segments(step['segment_dir'], step['output'])
+    elif kind == 'faststart':
+        remux_faststart(step['path'])
+    elif kind == 'thumbnail':
+        make_thumbnail(step['video'], step['output'], step.get('at', 5.0))
+    elif kind == 'remove':
+        for path in step['paths']:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+    else:
+        raise ValueError(f"Unknown post-processing step: {kind}")
+
+
+def _pid_alive(pid):
+    if not pid or os.name != 'posix':
+        # Signal 0 only probes on POSIX; elsewhere assume the old worker is gone
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _save_job(job_path, job):
+    # Write then rename, so a crash never leaves a half-written status file
+    temp_path = job_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(job, f, indent=2)
+    os.replace(temp_path, job_path)
+
+
+def run_job(job_path):
+    """Run the remaining steps of a job file in order, recording progress in it.
+
+    Runs in a worker process. Steps already marked done are skipped, so a
+    job interrupted by a crash resumes where it stopped.
+    """
+    with open(job_path) as f:
+        job = json.load(f)
+    job['status'] = RUNNING
+    job['started_at'] = time.time()
+    job['pid'] = os.getpid()
+    _save_job(job_path, job)
+    try:
+        for index, step in enumerate(job['steps']):
+            if index < job['steps_done']:
+                continue
+            started = time.perf_counter()
+            _run_step(step)
+            step['seconds'] = round(time.perf_counter() - started, 3)
+            job['steps_done'] = index + 1
+            _save_job(job_path, job)
+        job['status'] = DONE
+    except Exception as e:
+        job['status'] = FAILED
+        job['error'] = str(e)
+    job['finished_at'] = time.time()
+    _save_job(job_path, job)
+    return job
+
+
+class PostProcessQueue:
+    """Finalization jobs (merge, concat, faststart, thumbnails) run in worker processes.
+
+    Each job is a JSON file in job_dir holding its steps and status
+    (queued / running / done / failed), so progress is visible to other
+    processes and unfinished jobs can be picked up again with resume().
+    on_complete is called with the finished job dict, from a thread of
+    this process.
+    """
+
+    def __init__(self, job_dir, workers=1, on_complete=None):
+        self.job_dir = job_dir
+        self.workers = workers
+        self.on_complete = on_complete
+        os.makedirs(job_dir, exist_ok=True)
+        # Never fork: the recorder runs monitor, metrics, DevTools and pool threads, and a
+        # child forked while one of them holds a lock (logging's, say) deadlocks on it
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._executor = ProcessPoolExecutor(max_workers=workers,
+                                             mp_context=multiprocessing.get_context(start_method))
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, steps, output=None):
+        """Persist a new job and queue it; returns the path of its status file."""
+        job_path = os.path.join(self.job_dir, f'{name}.job.json')
+        _save_job(job_path, {
+            'name': name,
+            'output': output,
+            'status': QUEUED,
+            'queued_at': time.time(),
+            'steps': steps,
+            'steps_done': 0,
+        })
+        self._enqueue(job_path)
+        logger.info(f"Queued post-processing job {name} ({', '.join(s['type'] for s in steps)})")
+        return job_path
+
+    def resume(self):
+        """Queue again every job left queued or running by a previous process.
+
+        Running jobs whose worker is still alive (another recorder's queue is
+        working on them) are left alone.
+        """
+        resumed = []
+        for entry in sorted(os.listdir(self.job_dir)):
+            if not entry.endswith('.job.json'):
+                continue
+            job_path = os.path.join(self.job_dir, entry)
+            try:
+                with open(job_path) as f:
+                    job = json.load(f)
+                status = job['status']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Unreadable job file {job_path}: {str(e)}")
+                continue
+            if status == RUNNING and _pid_alive(job.get('pid')):
+                logger.info(f"Post-processing job {job.get('name')} is still running in process {job['pid']}")
+                continue
+            if status in (QUEUED, RUNNING):
+                self._enqueue(job_path)
+                resumed.append(job_path)
+        if resumed:
+            logger.info(f"Resumed {len(resumed)} unfinished post-processing job(s)")
+        return resumed
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _enqueue(self, job_path):
+        future = self._executor.submit(run_job, job_path)
+        with self._lock:
+            self._pending[future] = job_path
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self._lock:
+            job_path = self._pending.pop(future)
+        try:
+            job = future.result()
+        except Exception as e:
+            # The worker process itself died; the job file still says running
+            logger.error(f"Post-processing worker failed on {job_path}: {str(e)}")
+            return
+        if job['status'] == DONE:
+            logger.info(f"Post-processing job {job['name']} done: {job['output']}")
+        else:
+            logger.error(f"Post-processing job {job['name']} failed: {job.get('error')}")
+        if self.on_complete:
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                logger.error(f"Post-processing callback failed: {str(e)}")
+
+    def close(self, wait=True):
+        """Stop accepting jobs; with wait, block until the queued ones finish."""
+        if wait and self.pending:
+            logger.info(f"Waiting for {self.pending} post-processing job(s)")
+        self._executor.shutdown(wait=wait)
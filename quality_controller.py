@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def build_quality_ladder(max_fps, min_fps, fps_step=0.75):
+    """Frame rates from best to cheapest.
+
+    Only the frame rate is stepped: with variable frame rate output it cuts
+    grab, convert and encode work at once, while shrinking frames the encoder
+    still takes at full size costs two resizes per frame and saves nothing.
+    Constant frame rate writers would re-encode repeats of every missing
+    frame, so the recorder only enables this with timestamped output.
+    """
+    ladder = [max_fps]
+    while ladder[-1] > min_fps:
+        ladder.append(max(min_fps, int(ladder[-1] * fps_step)))
+    return ladder
+
+
+def host_load():
+    """1-minute load average per CPU, or None where the OS does not report it."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class QualityController:
+    """Steps the capture frame rate down under pressure and back up when it clears.
+
+    Every interval it compares the pipeline's counters with the previous
+    check: missed grab ticks, frames dropped from full queues and a backed-up
+    encode queue mean video is falling behind. A filling audio buffer or new
+    audio overflows also count as pressure, so video gives way before audio
+    loses samples. Host load is a 1-minute average shared by every recorder
+    on the host, so it lags the checks and would walk each of them to the
+    bottom of the ladder at once; it only steps down after staying above
+    high_load for load_after checks in a row, counted again after every
+    step. Stepping up needs up_after healthy checks in a row, so the level
+    does not oscillate.
+    """
+
+    def __init__(self, pipeline, ladder, audio_writer=None, interval=2.0, up_after=5,
+                 high_load=0.9, low_load=0.7, load_after=15, on_change=None):
+        self.pipeline = pipeline
+        self.ladder = ladder
+        self.audio_writer = audio_writer
+        self.interval = interval
+        self.up_after = up_after
+        self.high_load = high_load
+        self.low_load = low_load
+        self.load_after = load_after
+        self.on_change = on_change  # Called with the new fps after every step
+        self.level = 0
+        self.events = []
+        self._healthy_checks = 0
+        self._loaded_checks = 0
+        self._previous = None
+        self._previous_overflow = 0
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def fps(self):
+        return self.ladder[self.level]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"Quality controller check failed: {str(e)}")
+
+    def check(self):
+        """Compare counters with the previous check and move one level if needed."""
+        stats = self.pipeline.stats()
+        previous, self._previous = self._previous, stats
+        if previous is None:
+            return
+        load = host_load()
+        reasons = self._pressure(stats, previous, load)
+        if reasons:
+            self._healthy_checks = 0
+            if self.level < len(self.ladder) - 1:
+                self._step(self.level + 1, ', '.join(reasons), stats, load)
+                self._loaded_checks = 0
+            return
+        if load is not None and load > self.low_load:
+            # Neither pressured nor clearly idle: hold the current level
+            self._healthy_checks = 0
+            return
+        self._healthy_checks += 1
+        if self.level > 0 and self._healthy_checks >= self.up_after:
+            self._healthy_checks = 0
+            self._step(self.level - 1, 'recovered', stats, load)
+
+    def _pressure(self, stats, previous, load):
+        reasons = []
+        expected_ticks = max(1.0, self.interval * self.fps)
+        missed = stats['ticks_missed'] - previous['ticks_missed']
+        if missed > 0.1 * expected_ticks:
+            reasons.append(f'{missed} ticks missed')
+        dropped = stats['frames_dropped'] - previous['frames_dropped']
+        if dropped > 0:
+            reasons.append(f'{dropped} frames dropped')
+        if stats['encode_queue'] > self.pipeline.queue_size // 2:
+            reasons.append(f"encode queue at {stats['encode_queue']}")
+        if self.audio_writer:
+            ring = self.audio_writer.ring
+            if ring.available() > ring.capacity // 2:
+                reasons.append('audio buffer over half full')
+            if ring.overflow_frames > self._previous_overflow:
+                reasons.append('audio overflow')
+            self._previous_overflow = ring.overflow_frames
+        if load is not None and load > self.high_load:
+            self._loaded_checks += 1
+            if self._loaded_checks >= self.load_after:
+                reasons.append(f'host load {load:.2f} per CPU for {self._loaded_checks} checks')
+        else:
+            self._loaded_checks = 0
+        return reasons
+
+    def _step(self, level, reason, stats, load):
+        old_fps = self.ladder[self.level]
+        self.level = level
+        fps = self.ladder[level]
+        event = {
+            'at': round(time.monotonic() - self._started, 1),
+            'fps': fps,
+            'previous_fps': old_fps,
+            'reason': reason,
+            'host_load': round(load, 2) if load is not None else None,
+            'frames_dropped': stats['frames_dropped'],
+        }
+        self.events.append(event)
+        logger.info(f"Capture quality {old_fps} fps -> {fps} fps ({reason})")
+        self.pipeline.set_fps(fps)
+        if self.on_change:
+            self.on_change(fps)
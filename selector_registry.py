@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+SELECTOR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'selectors.json')
+STATS_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'meeting_recorder', 'selector_stats.json')
+
+# page_config keys holding CSS chains, and the registry elements they come from
+PAGE_ELEMENTS = {
+    'counter': 'participant_count',
+    'names': 'participant_names',
+    'speaker': 'active_speaker',
+    'share': 'screen_share',
+    'stage': 'stage',
+}
+
+LOCATOR_TYPES = {
+    'css': By.CSS_SELECTOR,
+    'xpath': By.XPATH,
+    'id': By.ID,
+}
+
+
+def parse_selector(selector):
+    """'css:button.join' -> (By.CSS_SELECTOR, 'button.join')."""
+    kind, _, value = selector.partition(':')
+    if kind not in LOCATOR_TYPES or not value:
+        raise ValueError(f"Bad selector {selector!r}, expected css:, xpath: or id:")
+    return LOCATOR_TYPES[kind], value
+
+
+class SelectorRegistry:
+    """Per-platform fallback chains for every element the recorder looks for.
+
+    Chains come from a versioned JSON file. A lookup tries each selector of
+    a chain in order on every poll, so a stale one costs a single failed
+    find instead of a whole wait timeout. The selector that matched first
+    is tried first for the rest of the session. Hits, misses and lookup
+    time are counted per selector to spot stale ones. Polling for an element
+    that has not appeared yet is not a miss: misses are counted for
+    selectors passed over by a later one in the chain that matched, and for
+    the whole chain once a wait for the element times out. Matches made by
+    the in-page observer are counted the same way, without timing.
+    """
+
+    def __init__(self, path=SELECTOR_FILE):
+        with open(path) as f:
+            data = json.load(f)
+        self.path = path
+        self.version = data['version']
+        self.platforms = data['platforms']
+        for platform in self.platforms.values():
+            for chain in platform['elements'].values():
+                for selector in chain:
+                    parse_selector(selector)
+        self._preferred = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def chain(self, platform, element):
+        """Selectors for an element, the one that matched before first."""
+        chain = self.platforms[platform]['elements'][element]
+        preferred = self._preferred.get((platform, element))
+        if preferred:
+            return [preferred] + [selector for selector in chain if selector != preferred]
+        return list(chain)
+
+    def css(self, platform, element):
+        """The CSS selectors of a chain, for scripts running in the page."""
+        return [selector.partition(':')[2] for selector in self.chain(platform, element)
+                if selector.startswith('css:')]
+
+    def page_config(self, platform):
+        """What the in-page observer needs for a platform."""
+        entry = self.platforms[platform]
+        config = {key: self.css(platform, element) for key, element in PAGE_ELEMENTS.items()}
+        config.update({
+            'frame': entry['frame'],
+            'ended': entry['phrases']['ended'],
+            'waiting': entry['phrases']['waiting'],
+        })
+        return config
+
+    def record_page_matches(self, platform, config, matched):
+        """Count the matches the in-page scripts report for a page_config.
+
+        matched maps config keys to the index of the CSS selector that found
+        the element; the selectors before it in that list missed it.
+        """
+        for key, index in matched.items():
+            element = PAGE_ELEMENTS.get(key)
+            selectors = config.get(key) or []
+            if element is None or not 0 <= index < len(selectors):
+                continue
+            for selector in selectors[:index]:
+                self._record(platform, element, f'css:{selector}', False, 0.0)
+            self._record(platform, element, f'css:{selectors[index]}', True, 0.0)
+            self._preferred[(platform, element)] = f'css:{selectors[index]}'
+
+    def find(self, driver, platform, element, clickable=False):
+        """First element matched by the chain (None if nothing matches right now)."""
+        passed_over = []
+        for selector in self.chain(platform, element):
+            by, value = parse_selector(selector)
+            started = time.perf_counter()
+            try:
+                found = driver.find_elements(by, value)
+                if clickable:
+                    found = [el for el in found if el.is_displayed() and el.is_enabled()]
+            except StaleElementReferenceException:
+                found = []
+            seconds = time.perf_counter() - started
+            if found:
+                # The element is there, so the selectors before this one missed it
+                for missed, missed_seconds in passed_over:
+                    self._record(platform, element, missed, False, missed_seconds)
+                self._record(platform, element, selector, True, seconds)
+                self._preferred[(platform, element)] = selector
+                return found[0]
+            passed_over.append((selector, seconds))
+        return None
+
+    def missed(self, platform, element):
+        """Count a miss for the whole chain: the element was expected and never showed up."""
+        for selector in self.chain(platform, element):
+            self._record(platform, element, selector, False, 0.0)
+
+    def _condition(self, platform, element, check):
+        # Waiters call condition.missed() when they give up on the element
+        check.missed = lambda: self.missed(platform, element)
+        return check
+
+    def present(self, platform, element):
+        """Wait condition (for WebDriverWait or the join state machine): element in the DOM."""
+        return self._condition(platform, element, lambda driver: self.find(driver, platform, element) or False)
+
+    def clickable(self, platform, element):
+        """Wait condition: element visible and enabled."""
+        return self._condition(platform, element,
+                               lambda driver: self.find(driver, platform, element, clickable=True) or False)
+
+    def frame(self, platform, element):
+        """Wait condition: frame found and switched into."""
+        def condition(driver):
+            frame = self.find(driver, platform, element)
+            if not frame:
+                return False
+            driver.switch_to.frame(frame)
+            return True
+        return self._condition(platform, element, condition)
+
+    def wait(self, driver, condition, timeout):
+        """WebDriverWait for a condition from this registry; a timeout counts as a miss."""
+        try:
+            return WebDriverWait(driver, timeout).until(condition)
+        except TimeoutException:
+            condition.missed()
+            raise
+
+    def _record(self, platform, element, selector, hit, seconds):
+        key = f'{platform}.{element}|{selector}'
+        with self._lock:
+            stats = self._stats.setdefault(key, {'hits': 0, 'misses': 0, 'seconds': 0.0})
+            stats['hits' if hit else 'misses'] += 1
+            stats['seconds'] += seconds
+
+    def stats(self):
+        """Per-selector counters since the last save: {platform.element: {selector: {...}}}."""
+        report = {}
+        with self._lock:
+            for key, stats in self._stats.items():
+                element, selector = key.split('|', 1)
+                lookups = stats['hits'] + stats['misses']
+                report.setdefault(element, {})[selector] = {
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'mean_ms': round(1000 * stats['seconds'] / lookups, 2),
+                }
+        return report
+
+    def save_stats(self, path=STATS_FILE):
+        """Add the counters to the running totals kept across sessions and start over."""
+        try:
+            with open(path) as f:
+                totals = json.load(f)
+        except (OSError, ValueError):
+            totals = {}
+        if totals.get('version') != self.version:
+            # Counts for an older registry describe selectors that may be gone
+            totals = {'version': self.version, 'selectors': {}}
+        with self._lock:
+            for key, stats in self._stats.items():
+                total = totals['selectors'].setdefault(key, {'hits': 0, 'misses': 0, 'seconds': 0.0})
+                for field in ('hits', 'misses', 'seconds'):
+                    total[field] += stats[field]
+            self._stats = {}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(totals, f, indent=2)
+
+
+_default_registry = None
+
+
+def default_registry():
+    """Registry shared by every recorder in this process, so learned selectors carry over."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = SelectorRegistry()
+    return _default_registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Selector hit rates collected across recordings')
+    parser.add_argument('--stats', default=STATS_FILE, help='Stats file to report on')
+    args = parser.parse_args()
+
+    with open(args.stats) as f:
+        totals = json.load(f)
+    print(f"registry version {totals['version']}")
+    print(f"{'element':<32} {'hits':>7} {'misses':>7} {'mean ms':>8}  selector")
+    for key, stats in sorted(totals['selectors'].items()):
+        element, selector = key.split('|', 1)
+        lookups = stats['hits'] + stats['misses']
+        flag = '  STALE?' if stats['hits'] == 0 and stats['misses'] > 0 else ''
+        print(f"{element:<32} {stats['hits']:>7} {stats['misses']:>7} "
+              f"{1000 * stats['seconds'] / lookups:>8.2f}  {selector}{flag}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+
+
+def stage_crop(stage, backend):
+    """Rectangle (x, y, width, height) of the meeting stage in the backend's capture pixels.
+
+    stage is the box the page observer reports (see page_monitor.readStage):
+    CSS pixels in the top-level viewport plus the window geometry needed to
+    find that viewport on screen. Returns None when there is no stage.
+    """
+    if not stage or not backend.region:
+        return None
+    x, y, width, height = stage['rect']
+    viewport_width, viewport_height = stage['viewport']
+    if backend.captures_page:
+        # Frames are the viewport itself, at whatever size they were requested
+        scale = backend.region[2] / viewport_width
+        left, top = x * scale, y * scale
+    else:
+        # Browser borders are split evenly left and right; the rest of the
+        # height difference is toolbars above the page
+        scale = stage['scale']
+        screen_x, screen_y, outer_width, outer_height = stage['window']
+        origin_x = screen_x + (outer_width - viewport_width) / 2
+        origin_y = screen_y + outer_height - viewport_height
+        left = (origin_x + x) * scale - backend.region[0]
+        top = (origin_y + y) * scale - backend.region[1]
+    return int(round(left)), int(round(top)), int(round(width * scale)), int(round(height * scale))
+
+
+def letterbox(frame, width, height):
+    """Fit frame into width x height without distorting it, padding with black."""
+    frame_height, frame_width = frame.shape[:2]
+    if frame_width == width and frame_height == height:
+        return frame
+    scale = min(width / frame_width, height / frame_height)
+    fit_width = min(width, max(2, int(round(frame_width * scale))))
+    fit_height = min(height, max(2, int(round(frame_height * scale))))
+    resized = cv2.resize(frame, (fit_width, fit_height),
+                         interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+    if fit_width == width and fit_height == height:
+        return resized
+    canvas = np.zeros((height, width, frame.shape[2]), dtype=frame.dtype)
+    x, y = (width - fit_width) // 2, (height - fit_height) // 2
+    canvas[y:y + fit_height, x:x + fit_width] = resized
+    return canvas
@@ -0,0 +1,92 @@
+import time
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticScreen:
+    """Generated screen content for benchmarks that must run without a display.
+
+    A static gradient background with a small "speaker tile" that changes on
+    every frame, roughly what a meeting with one active camera looks like.
+    Frames are BGRA, the layout X11 grabs return.
+    """
+
+    def __init__(self, width, height, tile_fraction=0.25):
+        self.width = width
+        self.height = height
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        self._background = np.empty((height, width, 4), dtype=np.uint8)
+        self._background[:, :, 0] = gradient
+        self._background[:, :, 1] = gradient[::-1]
+        self._background[:, :, 2] = 96
+        self._background[:, :, 3] = 255
+        self._tile_height = max(2, int(height * tile_fraction))
+        self._tile_width = max(2, int(width * tile_fraction))
+        self._frame_number = 0
+
+    def render(self, out):
+        """Draw the next frame into out (an HxWx4 uint8 array)."""
+        out[:] = self._background
+        self._frame_number += 1
+        n = self._frame_number
+        top = self.height - self._tile_height
+        left = self.width - self._tile_width
+        tile = out[top:, left:]
+        tile[:, :, :3] = (n * 3) & 0xFF
+        # Moving bar so consecutive frames differ inside the tile
+        bar = n % self._tile_height
+        tile[bar:bar + 4, :, :3] = 255
+        return out
+
+
+class SyntheticAudioStream:
+    """A 440 Hz tone with a little noise, delivered in device-sized blocks.
+
+    A background thread hands each block to callback at the pace a sound
+    card would, so audio buffering and A/V sync behave as in a real
+    recording while benchmarks run on machines without any audio device.
+    """
+
+    def __init__(self, samplerate, channels, callback, blocksize=1024, frequency=440.0):
+        self.samplerate = float(samplerate)
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize
+        self.frequency = frequency
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        rng = np.random.default_rng(0)
+        block = np.empty((self.blocksize, self.channels), dtype=np.float32)
+        interval = self.blocksize / self.samplerate
+        position = 0
+        next_block_time = time.monotonic()
+        while not self._stop.is_set():
+            t = (np.arange(self.blocksize) + position) / self.samplerate
+            tone = 0.2 * np.sin(2 * np.pi * self.frequency * t)
+            block[:] = (tone + 0.01 * rng.standard_normal(self.blocksize))[:, None]
+            position += self.blocksize
+            self.callback(block, self.blocksize, None, None)
+            # Pace blocks like a real device so writers see realistic timing
+            next_block_time += interval
+            delay = next_block_time - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def close(self):
+        self.stop()